@@ -10,6 +10,9 @@ from PIL import Image
 import pytesseract
 import fitz  # PyMuPDF for PDFs
 
+from app.services.ocr_service import get_ocr_backend
+from app.utils.export_stream import iter_csv_rows, iter_json
+
 # ✅ Initialize Flask
 app = Flask(__name__)
 CORS(app)
@@ -90,17 +93,18 @@ def upload_file():
             # ✅ Process PDF with PyMuPDF
             pdf_bytes = file.read()
             pdf = fitz.open(stream=pdf_bytes, filetype="pdf")
+            engine = get_ocr_backend()
 
             for page_num in range(len(pdf)):
                 page = pdf.load_page(page_num)
                 pix = page.get_pixmap()
                 img = Image.open(io.BytesIO(pix.tobytes("png")))
-                text += pytesseract.image_to_string(img) + "\n"
+                text += engine.image_to_string(img, psm=3) + "\n"
 
         else:
             # ✅ Process Image (JPG, PNG, etc.)
             img = Image.open(io.BytesIO(file.read()))
-            text = pytesseract.image_to_string(img)
+            text = get_ocr_backend().image_to_string(img, psm=3)
 
         # ✅ Parse OCR into structured JSON
         structured = parse_ocr_text(text)
@@ -123,7 +127,8 @@ def export_json():
         if not data:
             return jsonify({"error": "No data provided"}), 400
 
-        response = Response(json.dumps(data, indent=2), mimetype="application/json")
+        # Encoded incrementally so the response starts before the whole document is built
+        response = Response(iter_json(data, indent=2, sort_keys=False), mimetype="application/json")
         response.headers["Content-Disposition"] = "attachment; filename=sof_export.json"
         return response
 
@@ -139,31 +144,7 @@ def export_csv():
         if not data or "data" not in data:
             return jsonify({"error": "No data provided"}), 400
 
-        output = io.StringIO()
-        writer = csv.writer(output)
-
-        # --- Write EVENTS ---
-        writer.writerow(["Section", "Event", "Start Time", "End Time", "Date"])
-        for ev in data["data"].get("events", []):
-            writer.writerow(["Event", ev.get("event"), ev.get("start_time"), ev.get("end_time"), ev.get("date")])
-
-        # --- Write CARGO ---
-        writer.writerow([])
-        writer.writerow(["Section", "Description", "Tonnage"])
-        for cg in data["data"].get("cargo", []):
-            writer.writerow(["Cargo", cg.get("description"), cg.get("tonnage")])
-
-        # --- Write REMARKS ---
-        writer.writerow([])
-        writer.writerow(["Section", "Remarks"])
-        writer.writerow(["Remarks", data["data"].get("remarks", "")])
-
-        # --- Write Total Cargo ---
-        writer.writerow([])
-        writer.writerow(["Section", "Total Cargo"])
-        writer.writerow(["Cargo Summary", data["data"].get("total_cargo", 0)])
-
-        response = Response(output.getvalue(), mimetype="text/csv")
+        response = Response(iter_csv_rows(_csv_export_rows(data["data"])), mimetype="text/csv")
         response.headers["Content-Disposition"] = "attachment; filename=sof_export.csv"
         return response
 
@@ -171,6 +152,30 @@ def export_csv():
         return jsonify({"error": str(e)}), 500
 
 
+def _csv_export_rows(data):
+    """Rows of the sectioned CSV export, produced lazily for streaming."""
+    # --- Write EVENTS ---
+    yield ["Section", "Event", "Start Time", "End Time", "Date"]
+    for ev in data.get("events", []):
+        yield ["Event", ev.get("event"), ev.get("start_time"), ev.get("end_time"), ev.get("date")]
+
+    # --- Write CARGO ---
+    yield []
+    yield ["Section", "Description", "Tonnage"]
+    for cg in data.get("cargo", []):
+        yield ["Cargo", cg.get("description"), cg.get("tonnage")]
+
+    # --- Write REMARKS ---
+    yield []
+    yield ["Section", "Remarks"]
+    yield ["Remarks", data.get("remarks", "")]
+
+    # --- Write Total Cargo ---
+    yield []
+    yield ["Section", "Total Cargo"]
+    yield ["Cargo Summary", data.get("total_cargo", 0)]
+
+
 # --- Main entry point ---
 if __name__ == "__main__":
     app.run(debug=True, host="0.0.0.0", port=5000)
@@ -1,40 +1,63 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, jsonify, request
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
-import pytesseract
-from PIL import Image
-import fitz  # PyMuPDF for PDFs
-pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+
+from .config import get_config
+from .parsers.event_table import dumps
+
+
+class EventJSONProvider(DefaultJSONProvider):
+    """jsonify() that writes EventTables straight from their columns."""
+
+    def dumps(self, obj, **kwargs):
+        kwargs.setdefault("default", self.default)
+        kwargs.setdefault("ensure_ascii", self.ensure_ascii)
+        kwargs.setdefault("sort_keys", self.sort_keys)
+        return dumps(obj, **kwargs)
+
+
 def create_app():
     app = Flask(__name__)
+    app.json = EventJSONProvider(app)
     CORS(app)
-	
-    @app.route("/api/upload", methods=["POST"])
-    def upload_file():
-        if "file" not in request.files:
-            return jsonify({"error": "No file part"}), 400
-
-        file = request.files["file"]
-        if file.filename == "":
-            return jsonify({"error": "No selected file"}), 400
-
-        text = ""
-        if file.filename.lower().endswith(".pdf"):
-            # Read PDF pages and OCR them
-            pdf_bytes = file.read()
-            doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-            for page in doc:
-                pix = page.get_pixmap()
-                img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-                text += pytesseract.image_to_string(img) + "\n"
-        else:
-            # OCR image files
-            image = Image.open(file.stream)
-            text = pytesseract.image_to_string(image)
-
-        return jsonify({
-            "message": "Upload successful",
-            "filename": file.filename,
-            "text": text[:2000]  # return first 2000 chars
-        }), 200
+
+    # Werkzeug rejects larger bodies with 413 before they are read
+    app.config["MAX_CONTENT_LENGTH"] = get_config()["UPLOAD_MAX_MB"] * 1024 * 1024
+
+    @app.errorhandler(413)
+    def too_large(exc):
+        limit = request.max_content_length or app.config["MAX_CONTENT_LENGTH"]
+        return jsonify({"error": f"Upload exceeds the {limit // (1024 * 1024)} MB limit"}), 413
+
+    # Imported here so `import app.parsers...` doesn't pull in the web/DB stack
+    from .routes import api_bp
+
+    # OCR + parsing pipeline, jobs, exports: see routes.py
+    app.register_blueprint(api_bp, url_prefix="/api")
+
+    # Registers request hooks only when PROFILE_SAMPLE_RATE or PROFILE_TOKEN is set
+    from .services.profiling import install_profiling
+
+    install_profiling(app)
+
+    # Heavy dependencies load lazily; optionally pay that cost before taking traffic
+    app.config["WARMUP_MS"] = None
+    if get_config()["WARMUP_ON_START"]:
+        from .services.warmup import warm_up
+
+        app.config["WARMUP_MS"] = warm_up()
+        print(f"Warm-up finished: {app.config['WARMUP_MS']}")
+
+    @app.get("/health")
+    def health():
+        """Liveness/readiness probe; the app only serves once warm-up (if enabled) is done."""
+        return jsonify({"status": "ok", "warmup_ms": app.config["WARMUP_MS"]}), 200
+
+    @app.get("/metrics")
+    def metrics():
+        """Prometheus scrape endpoint: stage histograms, page/byte/cache counters."""
+        from .services.metrics import get_metrics
+
+        return Response(get_metrics().render(), mimetype="text/plain; version=0.0.4")
 
     return app
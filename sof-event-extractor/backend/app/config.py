@@ -1,4 +1,5 @@
 import os
+import tempfile
 from typing import Dict, Any
 
 
@@ -12,16 +13,104 @@ def get_config() -> Dict[str, Any]:
         "AZURE_STORAGE_CONTAINER": os.getenv("AZURE_STORAGE_CONTAINER", "files"),
         "AZURE_STORAGE_ACCOUNT_NAME": os.getenv("AZURE_STORAGE_ACCOUNT_NAME", "sofstor123"),
         "AZURE_STORAGE_ACCOUNT_KEY": os.getenv("AZURE_STORAGE_ACCOUNT_KEY", ""),
+        # Uploads run on a background queue with retries; point the connection string at Azurite to test locally
+        "BLOB_UPLOAD_ASYNC": os.getenv("BLOB_UPLOAD_ASYNC", "1") == "1",
+        "BLOB_UPLOAD_WORKERS": int(os.getenv("BLOB_UPLOAD_WORKERS", "2")),
+        "BLOB_UPLOAD_MAX_PENDING": int(os.getenv("BLOB_UPLOAD_MAX_PENDING", "32")),  # beyond this uploads run inline
+        "BLOB_UPLOAD_RETRIES": int(os.getenv("BLOB_UPLOAD_RETRIES", "3")),
+        "BLOB_UPLOAD_BACKOFF_SECONDS": float(os.getenv("BLOB_UPLOAD_BACKOFF_SECONDS", "0.5")),
+        "BLOB_MAX_CONCURRENCY": int(os.getenv("BLOB_MAX_CONCURRENCY", "4")),  # parallel blocks per large upload
+        "BLOB_SINGLE_PUT_MB": int(os.getenv("BLOB_SINGLE_PUT_MB", "8")),  # larger files use block upload
+        
+        # Load OCR engine, language data and heavy imports in create_app instead of on first request
+        "WARMUP_ON_START": os.getenv("WARMUP_ON_START", "0") == "1",
         
         # Upload settings
-        "UPLOAD_MAX_MB": int(os.getenv("UPLOAD_MAX_MB", "25")),
+        "UPLOAD_MAX_MB": int(os.getenv("UPLOAD_MAX_MB", "25")),  # request body limit (413 above it)
+        "UPLOAD_SPOOL_MB": int(os.getenv("UPLOAD_SPOOL_MB", "4")),  # larger uploads are spooled to a temp file
+        "UPLOAD_SPOOL_DIR": os.getenv("UPLOAD_SPOOL_DIR", ""),  # empty = system temp dir
         "ENV": os.getenv("FLASK_ENV", "development"),
         
+        # OCR settings
+        "OCR_BACKEND": os.getenv("OCR_BACKEND", "auto"),  # auto | tesserocr | pytesseract
+        "OCR_LANG": os.getenv("OCR_LANG", "eng"),
+        "OCR_TESSDATA": os.getenv("TESSDATA_PREFIX"),  # tessdata dir for the tesserocr engine
+        "OCR_WORKERS": int(os.getenv("OCR_WORKERS", "1")),  # >1 enables the process pool
+        "OCR_PAGE_WINDOW": int(os.getenv("OCR_PAGE_WINDOW", "0")),  # pages rendered at once; 0 = OCR_WORKERS
+        "OCR_PREPROCESS": os.getenv("OCR_PREPROCESS", "numpy"),  # numpy (fused) | pil
+        "OCR_BINARIZE": os.getenv("OCR_BINARIZE", "0") == "1",
+        "OCR_DESKEW": os.getenv("OCR_DESKEW", "0") == "1",
+        "OCR_ADAPTIVE_DPI": os.getenv("OCR_ADAPTIVE_DPI", "1") == "1",  # size render DPI from text height
+        "OCR_MIN_DPI": int(os.getenv("OCR_MIN_DPI", "150")),
+        "OCR_MAX_DPI": int(os.getenv("OCR_MAX_DPI", "400")),
+        "PDF_TEXT_LAYER": os.getenv("PDF_TEXT_LAYER", "1") == "1",  # read born-digital pages without OCR
+        "PDF_TEXT_MIN_CHARS": int(os.getenv("PDF_TEXT_MIN_CHARS", "32")),
+        
+        # OCR quality ladder: fast low-DPI pass, escalating weak pages to full DPI, then to OCR_LADDER_ALT_PSM
+        "OCR_LADDER": os.getenv("OCR_LADDER", "1") == "1",
+        "OCR_LADDER_FAST_DPI": int(os.getenv("OCR_LADDER_FAST_DPI", "150")),
+        "OCR_LADDER_MIN_SCORE": float(os.getenv("OCR_LADDER_MIN_SCORE", "75")),  # mean word confidence (0-100) + hit bonus
+        "OCR_LADDER_HIT_BONUS": float(os.getenv("OCR_LADDER_HIT_BONUS", "10")),  # added when the parser finds events on the page
+        "OCR_LADDER_ALT_PSM": int(os.getenv("OCR_LADDER_ALT_PSM", "4")),  # 4 = single column of variable-size text
+        
+        # Page-level OCR reuse for recurring templates (exact binarized-page digest, SQLite index); off by default
+        "OCR_PAGE_CACHE_ENABLED": os.getenv("OCR_PAGE_CACHE_ENABLED", "0") == "1",
+        "OCR_PAGE_CACHE_PATH": os.getenv("OCR_PAGE_CACHE_PATH", os.path.join(tempfile.gettempdir(), "sof-page-cache.db")),
+        "OCR_PAGE_CACHE_MAX_ENTRIES": int(os.getenv("OCR_PAGE_CACHE_MAX_ENTRIES", "5000")),  # LRU beyond this
+        
+        # Per-stage timing histograms and counters on GET /metrics
+        "METRICS_ENABLED": os.getenv("METRICS_ENABLED", "1") == "1",
+        
+        # On-demand request profiling: off unless a sample rate or admin token is set
+        "PROFILE_SAMPLE_RATE": float(os.getenv("PROFILE_SAMPLE_RATE", "0")),  # share of matching requests, 0-1
+        "PROFILE_TOKEN": os.getenv("PROFILE_TOKEN", ""),  # send as X-Profile-Token to profile one request; required to read profiles
+        "PROFILE_PATHS": [p for p in os.getenv("PROFILE_PATHS", "/api/upload,/api/jobs").split(",") if p],
+        "PROFILE_INTERVAL_MS": float(os.getenv("PROFILE_INTERVAL_MS", "5")),
+        "PROFILE_DIR": os.getenv("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "sof-profiles")),
+        "PROFILE_KEEP": int(os.getenv("PROFILE_KEEP", "50")),
+        
+        # Extraction result cache (memory LRU + disk)
+        "RESULT_CACHE_ENABLED": os.getenv("RESULT_CACHE_ENABLED", "1") == "1",
+        "RESULT_CACHE_DIR": os.getenv("RESULT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "sof-result-cache")),
+        "RESULT_CACHE_MEMORY_MB": int(os.getenv("RESULT_CACHE_MEMORY_MB", "64")),
+        "RESULT_CACHE_DISK_MB": int(os.getenv("RESULT_CACHE_DISK_MB", "1024")),
+        
+        # Background extraction jobs (POST /api/jobs)
+        "JOB_WORKERS": int(os.getenv("JOB_WORKERS", "2")),
+        "JOB_QUEUE_DEPTH": int(os.getenv("JOB_QUEUE_DEPTH", "16")),  # waiting jobs before 503
+        "JOB_TTL_SECONDS": int(os.getenv("JOB_TTL_SECONDS", "3600")),  # how long finished results are kept
+        
+        # Results kept server-side for GET /api/results/<id>/export
+        "RESULT_STORE_MAX_RESULTS": int(os.getenv("RESULT_STORE_MAX_RESULTS", "1000")),
+        "RESULT_STORE_TTL_SECONDS": int(os.getenv("RESULT_STORE_TTL_SECONDS", "3600")),
+        "EXPORT_GZIP_LEVEL": int(os.getenv("EXPORT_GZIP_LEVEL", "6")),  # 0 turns response compression off
+        
+        # Batch uploads (POST /api/batch)
+        "BATCH_WORKERS": int(os.getenv("BATCH_WORKERS", "4")),  # documents extracted concurrently
+        "BATCH_MAX_FILES": int(os.getenv("BATCH_MAX_FILES", "100")),
+        "BATCH_MAX_MB": int(os.getenv("BATCH_MAX_MB", "500")),  # whole batch request; each file is still capped at UPLOAD_MAX_MB
+        
+        # Incremental laytime sessions (PUT /api/laytime/sessions/<document_id>)
+        "LAYTIME_MAX_SESSIONS": int(os.getenv("LAYTIME_MAX_SESSIONS", "500")),
+        "LAYTIME_SESSION_TTL_SECONDS": int(os.getenv("LAYTIME_SESSION_TTL_SECONDS", "3600")),
+        
         # SQL Database settings (if needed)
         "SQL_SERVER": os.getenv("SQL_SERVER", "sof-sql-server.database.windows.net,1433"),
         "SQL_DATABASE": os.getenv("SQL_DATABASE", "sof_dob"),
         "SQL_USER": os.getenv("SQL_USER", "adminuser"),
         "SQL_PASSWORD": os.getenv("SQL_PASSWORD", "admin@123"),
+        "SQL_CONNECT_TIMEOUT_SECONDS": int(os.getenv("SQL_CONNECT_TIMEOUT_SECONDS", "30")),
+        "SQL_POOL_SIZE": int(os.getenv("SQL_POOL_SIZE", "5")),  # max open connections
+        "SQL_POOL_TIMEOUT_SECONDS": float(os.getenv("SQL_POOL_TIMEOUT_SECONDS", "30")),  # wait for a free one
+        "SQL_POOL_HEALTH_CHECK_SECONDS": float(os.getenv("SQL_POOL_HEALTH_CHECK_SECONDS", "60")),  # ping if idle longer
+        
+        # Persisting documents, events and laytime results: "" (off) | sqlserver | sqlite
+        "PERSISTENCE_BACKEND": os.getenv("PERSISTENCE_BACKEND", ""),
+        "PERSISTENCE_SQLITE_PATH": os.getenv("PERSISTENCE_SQLITE_PATH", os.path.join(tempfile.gettempdir(), "sof-events.db")),
+        
+        # Bulk Arrow/Parquet export from the persistence store: rows per row group bound memory
+        "BULK_EXPORT_ROW_GROUP_ROWS": int(os.getenv("BULK_EXPORT_ROW_GROUP_ROWS", "50000")),
+        "BULK_EXPORT_PARQUET_COMPRESSION": os.getenv("BULK_EXPORT_PARQUET_COMPRESSION", "zstd"),
     }
 
 
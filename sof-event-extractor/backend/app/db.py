@@ -1,25 +1,140 @@
 from __future__ import annotations
 
 import os
-import pyodbc
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
+from .config import get_config
 
-def get_sql_connection():
-	"""Create and return a pyodbc connection to Azure SQL.
 
-	Relies on environment variables for secrets. Example variables:
-	- SQL_SERVER: sof-sql-server.database.windows.net,1433
-	- SQL_DATABASE: sof_dob
-	- SQL_USER: adminuser
-	- SQL_PASSWORD: admin@123
+class PoolTimeoutError(Exception):
+	"""Raised when no pooled connection frees up within the checkout timeout."""
+
+
+class ConnectionPool:
+	"""Bounded pool of DB-API connections, reused instead of reconnecting per call.
+
+	At most ``max_size`` connections are open at once; checkout waits up
+	to ``timeout`` seconds for one to come back. A connection idle for
+	longer than ``health_check_seconds`` is pinged with ``health_query``
+	before reuse and replaced if the ping fails. ``connection()`` commits
+	on success and rolls back on error; a connection that cannot even roll
+	back is treated as broken and closed.
 	"""
+
+	def __init__(
+		self,
+		connect: Callable[[], Any],
+		max_size: int = 5,
+		timeout: float = 30.0,
+		health_check_seconds: float = 60.0,
+		health_query: str = "SELECT 1",
+	) -> None:
+		self._connect = connect
+		self._max_size = max(1, max_size)
+		self._timeout = timeout
+		self._health_check_seconds = health_check_seconds
+		self._health_query = health_query
+		self._idle: List[Tuple[Any, float]] = []  # (connection, last returned), most recent last
+		self._size = 0
+		self._cond = threading.Condition()
+
+	@contextmanager
+	def connection(self) -> Iterator[Any]:
+		conn = self._acquire()
+		try:
+			yield conn
+			conn.commit()
+		except BaseException:
+			try:
+				conn.rollback()
+			except Exception:
+				self._discard(conn)
+				raise
+			self._release(conn)
+			raise
+		else:
+			self._release(conn)
+
+	def stats(self) -> Dict[str, int]:
+		with self._cond:
+			return {"open": self._size, "idle": len(self._idle), "max_size": self._max_size}
+
+	def close_all(self) -> None:
+		"""Close idle connections; ones checked out are closed when returned."""
+		with self._cond:
+			idle, self._idle = self._idle, []
+			self._size -= len(idle)
+			self._cond.notify_all()
+		for conn, _ in idle:
+			self._close(conn)
+
+	def _acquire(self) -> Any:
+		deadline = time.monotonic() + self._timeout
+		while True:
+			with self._cond:
+				while not self._idle and self._size >= self._max_size:
+					remaining = deadline - time.monotonic()
+					if remaining <= 0:
+						raise PoolTimeoutError(f"No database connection free within {self._timeout}s")
+					self._cond.wait(remaining)
+				if self._idle:
+					conn, last_used = self._idle.pop()
+				else:
+					self._size += 1
+					conn, last_used = None, None
+			if conn is None:
+				try:
+					return self._connect()
+				except BaseException:
+					with self._cond:
+						self._size -= 1
+						self._cond.notify()
+					raise
+			if time.monotonic() - last_used < self._health_check_seconds or self._healthy(conn):
+				return conn
+			self._discard(conn)
+
+	def _healthy(self, conn: Any) -> bool:
+		try:
+			cursor = conn.cursor()
+			cursor.execute(self._health_query)
+			cursor.fetchone()
+			return True
+		except Exception as exc:
+			print(f"Dropping unhealthy database connection: {exc}")
+			return False
+
+	def _release(self, conn: Any) -> None:
+		with self._cond:
+			self._idle.append((conn, time.monotonic()))
+			self._cond.notify()
+
+	def _discard(self, conn: Any) -> None:
+		self._close(conn)
+		with self._cond:
+			self._size -= 1
+			self._cond.notify()
+
+	@staticmethod
+	def _close(conn: Any) -> None:
+		try:
+			conn.close()
+		except Exception:
+			pass
+
+
+def _connection_string() -> str:
 	server = os.getenv("SQL_SERVER", "")
 	database = os.getenv("SQL_DATABASE", "")
 	user = os.getenv("SQL_USER", "")
 	password = os.getenv("SQL_PASSWORD", "")
 	driver = os.getenv("SQL_DRIVER", "ODBC Driver 18 for SQL Server")
+	timeout = get_config()["SQL_CONNECT_TIMEOUT_SECONDS"]
 
-	conn_str = (
+	return (
 		f"DRIVER={{{driver}}};"
 		f"SERVER={server};"
 		f"DATABASE={database};"
@@ -27,8 +142,46 @@ def get_sql_connection():
 		f"PWD={password};"
 		"Encrypt=yes;"
 		"TrustServerCertificate=no;"
-		"Connection Timeout=30;"
+		f"Connection Timeout={timeout};"
 	)
-	return pyodbc.connect(conn_str)
 
 
+def connect_sql():
+	"""Open a new pyodbc connection to Azure SQL.
+
+	Relies on environment variables for secrets. Example variables:
+	- SQL_SERVER: sof-sql-server.database.windows.net,1433
+	- SQL_DATABASE: sof_dob
+	- SQL_USER: adminuser
+	- SQL_PASSWORD: admin@123
+	"""
+	import pyodbc  # optional: needs the ODBC driver installed, only loaded when SQL is used
+
+	return pyodbc.connect(_connection_string())
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_sql_pool() -> ConnectionPool:
+	global _pool
+	with _pool_lock:
+		if _pool is None:
+			cfg = get_config()
+			_pool = ConnectionPool(
+				connect_sql,
+				max_size=cfg["SQL_POOL_SIZE"],
+				timeout=cfg["SQL_POOL_TIMEOUT_SECONDS"],
+				health_check_seconds=cfg["SQL_POOL_HEALTH_CHECK_SECONDS"],
+			)
+		return _pool
+
+
+def get_sql_connection():
+	"""Check out a pooled Azure SQL connection: ``with get_sql_connection() as conn``.
+
+	Commits when the block exits cleanly, rolls back on error and returns
+	the connection to the pool either way.
+	"""
+	return get_sql_pool().connection()
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import re
+from itertools import islice
+from typing import List, Tuple
+
+from app.parsers.event_table import EventTable
+
+
+# Event keyword groups, in the order their events are emitted per line
+EVENT_GROUPS = [
+    r'cargo\s+loading|loading\s+cargo',
+    r'berthing|anchoring',
+    r'pilot\s+onboard|pilot\s+embarked',
+    r'shifting|mooring',
+    r'discharge|unloading',
+    r'arrival|departure',
+    r'bunkering|crew\s+change',
+]
+
+# Keywords that qualify a dated line with two times as a medium-confidence event
+MARITIME_KEYWORDS = [
+    "loading", "unloading", "berthing", "anchorage", "shifting",
+    "cargo", "discharge", "arrival", "departure", "pilot", "tug",
+    "mooring", "unmooring", "bunkering", "crew"
+]
+
+KEYWORDS = [
+    "loading", "berthing", "anchorage", "shifting", "unloading",
+    "cargo", "discharge", "arrival", "departure", "pilot", "tug",
+    "mooring", "unmooring", "bunkering", "crew change"
+]
+
+TIME_PATTERN = re.compile(
+    # Matches various forms like 08:30, 8:30, 01/07/2025 08:30, 2025-07-01 08:30, etc.
+    r"((\d{1,2}:\d{2})|((\d{1,2}[/-]\d{1,2}[/-]\d{2,4})\s+\d{1,2}:\d{2})|(\d{4}-\d{2}-\d{2}\s+\d{1,2}:\d{2}))",
+    re.IGNORECASE,
+)
+
+# Prefilter: one case-insensitive literal alternation covering every keyword
+# above. No keyword contains a line break, so it can run over the whole text.
+_CANDIDATE_RE = re.compile(
+    r"cargo|loading|berthing|anchor|pilot|shifting|mooring|discharge"
+    r"|arrival|departure|bunkering|crew|tug",
+    re.IGNORECASE,
+)
+
+# All event groups in one zero-width scan. No two groups can start on the
+# same character, so the lookahead reports every (possibly overlapping)
+# keyword hit for all groups in a single pass.
+_EVENT_SCAN = re.compile(
+    "(?=" + "|".join(f"({group})" for group in EVENT_GROUPS) + ")",
+    re.IGNORECASE,
+)
+
+_TIME_TOKEN = re.compile(r'\d{1,2}:\d{2}')
+_DATE_ANY = re.compile(r'\d{1,2}/\d{1,2}/\d{2,4}|\d{4}-\d{2}-\d{2}|\d{1,2}-\d{1,2}-\d{2,4}')
+_MARITIME_RE = re.compile("|".join(re.escape(k) for k in MARITIME_KEYWORDS))
+_FALLBACK_RE = re.compile("|".join(re.escape(k) for k in KEYWORDS))
+
+# Line breaks that str.splitlines() honours but str.split('\n') does not
+_EXTRA_LINE_BREAKS = re.compile(r'\r(?!\n)|[\v\f\x1c\x1d\x1e\x85\u2028\u2029]')
+
+
+def _candidate_lines(text: str):
+    """Yield the stripped '\\n'-delimited lines that contain any keyword."""
+    pos = 0
+    while True:
+        hit = _CANDIDATE_RE.search(text, pos)
+        if hit is None:
+            return
+        start = text.rfind('\n', 0, hit.start()) + 1
+        end = text.find('\n', hit.end())
+        if end == -1:
+            end = len(text)
+        yield text[start:end].strip()
+        pos = end + 1
+
+
+def _high_events(line: str, events: EventTable) -> None:
+    """Keyword-then-two-times events, same output as the per-group `.*?` patterns.
+
+    Instead of letting `kw.*?(t).*?(t)` backtrack across the line, each
+    keyword hit is followed by two forward searches for time tokens. If a
+    hit has no two times after it, no later hit of that group can either,
+    so the group is done: the work per line stays linear.
+    """
+    hits: List[List[Tuple[int, int, str]]] = [[] for _ in EVENT_GROUPS]
+    for m in _EVENT_SCAN.finditer(line):
+        group = m.lastindex
+        hits[group - 1].append((m.start(group), m.end(group), m.group(group)))
+
+    for group_hits in hits:
+        pos = 0
+        for start, end, keyword in group_hits:
+            if start < pos:
+                continue
+            first = _TIME_TOKEN.search(line, end)
+            if first is None:
+                break
+            second = _TIME_TOKEN.search(line, first.end())
+            if second is None:
+                break
+            events.add(keyword.title(), first.group(), second.group(), "high")
+            pos = second.end()
+
+
+def _scan_line(line: str, events: EventTable) -> None:
+    # Every enhanced event needs two time tokens on the line
+    times = _TIME_TOKEN.findall(line)
+    if len(times) < 2:
+        return
+
+    _high_events(line, events)
+
+    if _DATE_ANY.search(line) and _MARITIME_RE.search(line.lower()):
+        # First 100 chars as event name
+        events.add(line[:100], times[0], times[1], "medium")
+
+
+def _fallback_event(line: str, events: EventTable) -> None:
+    if not _FALLBACK_RE.search(line.lower()):
+        return
+    # Pick up to two time-like tokens
+    times = [m.group(1) for m in islice(TIME_PATTERN.finditer(line), 2)]
+    events.add(
+        line,
+        times[0] if len(times) >= 1 else "",
+        times[1] if len(times) >= 2 else "",
+    )
+
+
+def enhanced_events(text: str) -> EventTable:
+    """High/medium confidence events from keyword + time patterns, line by line."""
+    events = EventTable()
+    for line in _candidate_lines(text):
+        _scan_line(line, events)
+    return events
+
+
+def fallback_events(text: str) -> EventTable:
+    """One loose event per keyword line, with up to two time-like tokens."""
+    results = EventTable()
+    for ln in text.splitlines():
+        if _CANDIDATE_RE.search(ln):
+            _fallback_event(ln.strip(), results)
+    return results
+
+
+def match_events(text: str) -> EventTable:
+    """Enhanced extraction, falling back to the loose extractor when it finds nothing.
+
+    Both extractors are served from a single pass over the keyword lines:
+    fallback candidates are remembered while scanning so an empty enhanced
+    result does not trigger a second scan of the whole text.
+    """
+    if _EXTRA_LINE_BREAKS.search(text):
+        # Line splitting differs between the two extractors; run them separately
+        return enhanced_events(text) or fallback_events(text)
+
+    events = EventTable()
+    candidates: List[str] = []
+    for line in _candidate_lines(text):
+        _scan_line(line, events)
+        if not events:
+            candidates.append(line)
+
+    if events:
+        return events
+
+    results = EventTable()
+    for line in candidates:
+        _fallback_event(line, results)
+    return results
@@ -0,0 +1,335 @@
+from __future__ import annotations
+
+import json
+from array import array
+from collections.abc import Mapping, Sequence
+from itertools import chain, repeat
+from json.encoder import encode_basestring, encode_basestring_ascii
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.parsers.timestamps import resolve_times
+from app.utils.export_stream import CHUNK_SIZE, _buffered, iter_csv_rows
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+FIELDS = ("name", "start", "end", "confidence", "start_ts", "end_ts")
+# Stands in for None in the int64 timestamp columns
+NO_TS = -(2 ** 63)
+
+
+class Event:
+    """One event as a plain record; what ``EventTable.record`` returns."""
+
+    __slots__ = FIELDS
+
+    def __init__(
+        self,
+        name: str,
+        start: str = "",
+        end: str = "",
+        confidence: Optional[str] = None,
+        start_ts: Optional[int] = None,
+        end_ts: Optional[int] = None,
+    ) -> None:
+        self.name = name
+        self.start = start
+        self.end = end
+        self.confidence = confidence
+        self.start_ts = start_ts
+        self.end_ts = end_ts
+
+    def __repr__(self) -> str:
+        return f"Event({self.name!r}, {self.start!r}, {self.end!r}, {self.confidence!r})"
+
+
+class EventView(Mapping):
+    """Read-only dict-like view of one table row, for callers written against event dicts.
+
+    Keys match the dicts the extractors used to build: ``confidence`` only
+    when the event has one, ``start_ts``/``end_ts`` once the table is
+    normalized.
+    """
+
+    __slots__ = ("_table", "_index")
+
+    def __init__(self, table: "EventTable", index: int) -> None:
+        self._table = table
+        self._index = index
+
+    def __getitem__(self, key: str) -> Any:
+        table, i = self._table, self._index
+        if key == "name":
+            return table._types[table._type[i]]
+        if key == "start":
+            return table._stamps[table._start[i]]
+        if key == "end":
+            return table._stamps[table._end[i]]
+        if key == "confidence" and table._confidence[i]:
+            return table._confidences[table._confidence[i]]
+        if key in ("start_ts", "end_ts") and table.normalized:
+            ts = (table._start_ts if key == "start_ts" else table._end_ts)[i]
+            return None if ts == NO_TS else ts
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        yield "name"
+        yield "start"
+        yield "end"
+        if self._table._confidence[self._index]:
+            yield "confidence"
+        if self._table.normalized:
+            yield "start_ts"
+            yield "end_ts"
+
+    def __len__(self) -> int:
+        return 3 + bool(self._table._confidence[self._index]) + 2 * self._table.normalized
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class EventTable(Sequence):
+    """Column-oriented events: typed arrays of codes into interned string pools.
+
+    Names (the event type for keyword events, the source line for the
+    others) and the raw start/end stamps are interned, so a repeated
+    ``Loading`` or ``08:00`` is stored once and each event costs a few
+    bytes per column instead of a dict. Indexing yields ``EventView``
+    mappings, so code written for lists of event dicts keeps working, and
+    a table compares equal to the equivalent list of dicts.
+
+    The timestamp and type-code columns convert to NumPy without copying
+    (``timestamps``, ``type_codes``). Those views share the table's
+    buffers, so the table cannot grow while one is alive.
+    """
+
+    def __init__(self) -> None:
+        self._types: List[str] = []
+        self._type_codes: Dict[str, int] = {}
+        self._stamps: List[str] = [""]
+        self._stamp_codes: Dict[str, int] = {"": 0}
+        self._confidences: List[Optional[str]] = [None, "high", "medium"]
+        self._confidence_codes: Dict[Optional[str], int] = {None: 0, "high": 1, "medium": 2}
+        self._type = array("I")
+        self._start = array("I")
+        self._end = array("I")
+        self._confidence = array("I")
+        self._start_ts = array("q")
+        self._end_ts = array("q")
+        self.normalized = False
+
+    @classmethod
+    def from_dicts(cls, events: Iterable[Mapping[str, Any]], timestamps: bool = True) -> "EventTable":
+        """Build from event mappings; only the event fields are kept.
+
+        With ``timestamps``, ``start_ts``/``end_ts`` are taken over when
+        every event has them, as in normalized events read back from JSON.
+        A table is returned as it is.
+        """
+        if isinstance(events, EventTable):
+            return events
+        table = cls()
+        pairs: List[Tuple[Any, Any]] = []
+        has_ts = timestamps
+        for event in events:
+            table.add(
+                str(event.get("name") or ""),
+                str(event.get("start") or ""),
+                str(event.get("end") or ""),
+                event.get("confidence"),
+            )
+            if has_ts and "start_ts" in event:
+                pairs.append((event.get("start_ts"), event.get("end_ts")))
+            else:
+                has_ts = False
+        if has_ts and pairs:
+            table._set_timestamps(pairs)
+        return table
+
+    def add(self, name: str, start: str = "", end: str = "", confidence: Optional[str] = None) -> None:
+        self._type.append(_intern(self._types, self._type_codes, name))
+        self._start.append(_intern(self._stamps, self._stamp_codes, start))
+        self._end.append(_intern(self._stamps, self._stamp_codes, end))
+        self._confidence.append(_intern(self._confidences, self._confidence_codes, confidence))
+        if self.normalized:
+            self._start_ts.append(NO_TS)
+            self._end_ts.append(NO_TS)
+
+    def normalize(self, start_date: Optional[str] = None) -> "EventTable":
+        """Resolve epoch ``start_ts``/``end_ts`` for every event in place; returns the table."""
+        self._set_timestamps(resolve_times(self, start_date))
+        return self
+
+    def _set_timestamps(self, pairs: Iterable[Tuple[Optional[int], Optional[int]]]) -> None:
+        starts, ends = array("q"), array("q")
+        for start, end in pairs:
+            starts.append(NO_TS if start is None else int(start))
+            ends.append(NO_TS if end is None else int(end))
+        self._start_ts, self._end_ts = starts, ends
+        self.normalized = True
+
+    # Sequence / dict-compatible access
+
+    def __len__(self) -> int:
+        return len(self._type)
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return [EventView(self, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("event index out of range")
+        return EventView(self, index)
+
+    def __iter__(self) -> Iterator[EventView]:
+        return (EventView(self, i) for i in range(len(self)))
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, (EventTable, list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"EventTable({len(self)} events, {len(self._types)} types)"
+
+    def record(self, index: int) -> Event:
+        view = self[index]
+        return Event(
+            view["name"], view["start"], view["end"], view.get("confidence"), view.get("start_ts"), view.get("end_ts")
+        )
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        return [dict(view) for view in self]
+
+    # Columns
+
+    @property
+    def types(self) -> List[str]:
+        """Interned event names; ``type_codes()`` indexes into this list."""
+        return self._types
+
+    def type_codes(self) -> "np.ndarray":
+        """Per-event index into ``types``, as a read-only zero-copy NumPy view."""
+        return _numpy_view(self._type)
+
+    def timestamps(self, start_date: Optional[str] = None) -> Tuple["np.ndarray", "np.ndarray"]:
+        """int64 epoch ``(start, end)`` columns with NO_TS where unresolved.
+
+        Zero-copy views of a normalized table; with a ``start_date`` (or
+        before ``normalize``) the times are resolved into new arrays and the
+        table is left as it is.
+        """
+        import numpy as np
+
+        if self.normalized and start_date is None:
+            return _numpy_view(self._start_ts), _numpy_view(self._end_ts)
+        pairs = resolve_times(self, start_date)
+        starts = np.array([NO_TS if s is None else s for s, _ in pairs], dtype=np.int64)
+        ends = np.array([NO_TS if e is None else e for _, e in pairs], dtype=np.int64)
+        return starts, ends
+
+    def nbytes(self) -> int:
+        """Bytes held by the column arrays (the interned strings are shared and not counted)."""
+        columns = (self._type, self._start, self._end, self._confidence, self._start_ts, self._end_ts)
+        return sum(column.itemsize * len(column) for column in columns)
+
+    # Serialization
+
+    def _json_items(self, ensure_ascii: bool = True) -> Iterator[str]:
+        """One JSON object per event with keys sorted, each pooled string encoded once."""
+        encode = encode_basestring_ascii if ensure_ascii else encode_basestring
+        types = ['"name":' + encode(s) for s in self._types]
+        starts = ['"start":' + encode(s) for s in self._stamps]
+        ends = ['"end":' + encode(s) for s in self._stamps]
+        confidences = [""] + ['"confidence":' + encode(str(c)) + "," for c in self._confidences[1:]]
+        start_ts, end_ts = self._start_ts, self._end_ts
+        for i in range(len(self)):
+            if self.normalized:
+                s, e = start_ts[i], end_ts[i]
+                yield (
+                    "{" + confidences[self._confidence[i]] + ends[self._end[i]]
+                    + ',"end_ts":' + ("null" if e == NO_TS else str(e)) + "," + types[self._type[i]]
+                    + "," + starts[self._start[i]] + ',"start_ts":' + ("null" if s == NO_TS else str(s)) + "}"
+                )
+            else:
+                yield (
+                    "{" + confidences[self._confidence[i]] + ends[self._end[i]]
+                    + "," + types[self._type[i]] + "," + starts[self._start[i]] + "}"
+                )
+
+    def to_json(self, ensure_ascii: bool = True) -> str:
+        """The JSON array ``json.dumps(self.to_dicts(), sort_keys=True)`` would give, without the dicts."""
+        return "[" + ",".join(self._json_items(ensure_ascii)) + "]"
+
+    def iter_json(self, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        items = self._json_items()
+        first = next(items, None)
+        if first is None:
+            return iter([b"[]"])
+        return _buffered(chain(("[", first), ("," + item for item in items), ("]",)), chunk_size)
+
+    def iter_csv(self, fieldnames: Sequence[str] = FIELDS, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        """CSV with a header row straight from the columns; missing fields become ''."""
+        columns = [self._column(field) for field in fieldnames]
+        return iter_csv_rows(chain([list(fieldnames)], zip(*columns)), chunk_size)
+
+    def _column(self, field: str) -> Iterable[Any]:
+        if field == "name":
+            return map(self._types.__getitem__, self._type)
+        if field in ("start", "end"):
+            return map(self._stamps.__getitem__, self._start if field == "start" else self._end)
+        if field == "confidence":
+            return map([c or "" for c in self._confidences].__getitem__, self._confidence)
+        if field in ("start_ts", "end_ts") and self.normalized:
+            return ("" if ts == NO_TS else ts for ts in (self._start_ts if field == "start_ts" else self._end_ts))
+        return repeat("", len(self))
+
+
+def _intern(pool: List[Any], codes: Dict[Any, int], value: Any) -> int:
+    code = codes.get(value)
+    if code is None:
+        code = codes[value] = len(pool)
+        pool.append(value)
+    return code
+
+
+def _numpy_view(column: array) -> "np.ndarray":
+    import numpy as np
+
+    # Unsigned array typecodes are the upper-case ones
+    kind = "u" if column.typecode.isupper() else "i"
+    view = np.frombuffer(column, dtype=np.dtype(f"{kind}{column.itemsize}"))
+    view.flags.writeable = False
+    return view
+
+
+_MARKER = "\x00event-table-{}\x00"
+
+
+def dumps(obj: Any, **kwargs: Any) -> str:
+    """``json.dumps`` that writes each EventTable from its columns instead of via dicts.
+
+    Tables are encoded as placeholder strings first and their JSON is
+    spliced in afterwards, so nothing builds a dict per event.
+    """
+    tables: List[EventTable] = []
+    fallback = kwargs.pop("default", None)
+
+    def default(value: Any) -> Any:
+        if isinstance(value, EventTable):
+            tables.append(value)
+            return _MARKER.format(len(tables) - 1)
+        if fallback is not None:
+            return fallback(value)
+        raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+    text = json.dumps(obj, default=default, **kwargs)
+    ensure_ascii = kwargs.get("ensure_ascii", True)
+    for i, table in enumerate(tables):
+        text = text.replace(json.dumps(_MARKER.format(i), ensure_ascii=ensure_ascii), table.to_json(ensure_ascii), 1)
+    return text
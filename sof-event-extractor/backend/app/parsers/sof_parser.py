@@ -1,26 +1,75 @@
 from __future__ import annotations
 
-import os
-import re
-from typing import Dict, Any, List, Optional
+from typing import Callable, Dict, Any, Optional
 
-from app.utils.text_extract import bytes_to_text
+from app.parsers.event_matcher import (  # KEYWORDS/TIME_PATTERN kept importable from here
+    KEYWORDS,
+    TIME_PATTERN,
+    enhanced_events,
+    fallback_events,
+    match_events,
+)
+from app.parsers.event_table import EventTable
+from app.services.metrics import count, stage
+from app.services.ocr_service import OCRService
+from app.services.result_cache import get_result_cache
+from app.utils.text_extract import Source, document_cache_key, extract_document_text
+
+
+# Bump when the extraction rules change so cached event results are not reused
+PARSER_VERSION = 2
+
+
+def extract_events(
+    source: Source,
+    filename: str,
+    progress: Optional[Callable[[int, int], None]] = None,
+    ocr_service: Optional[OCRService] = None,
+) -> Dict[str, Any]:
+    """Extract events from SoF documents using OCR + pattern matching.
 
+    ``progress(pages_done, pages_total)`` is called as pages are extracted;
+    ``ocr_service`` lets batch callers share one OCR service. ``source`` is
+    the file's bytes or a SpooledDocument.
+    """
+    cache = get_result_cache()
+    cache_key = None
+    if cache is not None:
+        cache_key = document_cache_key(source, filename)
+        cached = cache.get(f"events-v{PARSER_VERSION}", cache_key)
+        if cached is not None:
+            if progress is not None:
+                total = len(cached.get("pages") or []) or 1
+                progress(total, total)
+            # Disk-tier hits come back as event dicts
+            return {**cached, "events": EventTable.from_dicts(cached["events"]), "filename": filename}
 
-def extract_events(file_bytes: bytes, filename: str) -> Dict[str, Any]:
-    """Extract events from SoF documents using OCR + pattern matching."""
     # Extract text from document
-    text = bytes_to_text(file_bytes, filename)
+    document = extract_document_text(
+        source, filename, cache_key=cache_key, progress=progress, ocr_service=ocr_service
+    )
+    text = document["text"]
     
     if not text:
         return {"filename": filename, "events": _demo_events(), "extraction_method": "fallback"}
     
-    # Use enhanced regex extraction for event detection
-    events = _enhanced_regex_extract(text)
+    with stage("parse"):
+        result = _parse_text(text, filename)
+        # Epoch start_ts/end_ts resolved once here for interval queries and laytime
+        result["events"].normalize()
+    count("sof_events_extracted_total", len(result["events"]))
+    # How each page was read: embedded text layer, OCR, plain text or docx
+    result["pages"] = document["pages"]
+    if cache is not None and document["complete"]:
+        cache.put(f"events-v{PARSER_VERSION}", cache_key, result)
+    return result
+
+
+def _parse_text(text: str, filename: str) -> Dict[str, Any]:
+    """Run the event extractors over already-extracted document text."""
     
-    # Fallback to simple regex if enhanced doesn't find events
-    if not events:
-        events = _regex_extract(text)
+    # Enhanced regex extraction, falling back to simple regex if it finds nothing
+    events = match_events(text)
     
     return {
         "filename": filename, 
@@ -30,126 +79,20 @@ def extract_events(file_bytes: bytes, filename: str) -> Dict[str, Any]:
     }
 
 
-def _enhanced_regex_extract(text: str) -> List[Dict[str, str]]:
+def _enhanced_regex_extract(text: str) -> EventTable:
     """Enhanced regex extraction with better maritime event patterns."""
-    events = []
-    
-    # Maritime event patterns with context
-    event_patterns = [
-        r'(cargo\s+loading|loading\s+cargo).*?(\d{1,2}:\d{2}).*?(\d{1,2}:\d{2})',
-        r'(berthing|anchoring).*?(\d{1,2}:\d{2}).*?(\d{1,2}:\d{2})',
-        r'(pilot\s+onboard|pilot\s+embarked).*?(\d{1,2}:\d{2}).*?(\d{1,2}:\d{2})',
-        r'(shifting|mooring).*?(\d{1,2}:\d{2}).*?(\d{1,2}:\d{2})',
-        r'(discharge|unloading).*?(\d{1,2}:\d{2}).*?(\d{1,2}:\d{2})',
-        r'(arrival|departure).*?(\d{1,2}:\d{2}).*?(\d{1,2}:\d{2})',
-        r'(bunkering|crew\s+change).*?(\d{1,2}:\d{2}).*?(\d{1,2}:\d{2})',
-    ]
-    
-    # Date patterns
-    date_patterns = [
-        r'\d{1,2}/\d{1,2}/\d{2,4}',  # DD/MM/YYYY
-        r'\d{4}-\d{2}-\d{2}',  # YYYY-MM-DD
-        r'\d{1,2}-\d{1,2}-\d{2,4}',  # DD-MM-YYYY
-    ]
-    
-    lines = text.split('\n')
-    
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-            
-        # Check for event patterns
-        for pattern in event_patterns:
-            matches = re.findall(pattern, line, re.IGNORECASE)
-            if matches:
-                for match in matches:
-                    if len(match) >= 3:
-                        event = {
-                            "name": match[0].title(),
-                            "start": match[1],
-                            "end": match[2],
-                            "confidence": "high"
-                        }
-                        events.append(event)
-        
-        # Check for date + time patterns
-        dates = []
-        for date_pattern in date_patterns:
-            date_matches = re.findall(date_pattern, line)
-            dates.extend(date_matches)
-        
-        # If we found dates, look for time patterns
-        if dates:
-            time_pattern = r'\d{1,2}:\d{2}'
-            times = re.findall(time_pattern, line)
-            
-            if len(times) >= 2:
-                # Look for maritime keywords in the line
-                maritime_keywords = [
-                    "loading", "unloading", "berthing", "anchorage", "shifting",
-                    "cargo", "discharge", "arrival", "departure", "pilot", "tug",
-                    "mooring", "unmooring", "bunkering", "crew"
-                ]
-                
-                if any(keyword in line.lower() for keyword in maritime_keywords):
-                    event = {
-                        "name": line[:100],  # First 100 chars as event name
-                        "start": times[0],
-                        "end": times[1],
-                        "confidence": "medium"
-                    }
-                    events.append(event)
-    
-    return events
+    return enhanced_events(text)
 
 
-def _demo_events() -> List[Dict[str, str]]:
+def _demo_events() -> EventTable:
     """Demo events for testing when extraction fails."""
-    return [
+    return EventTable.from_dicts([
         {"name": "Vessel Arrived", "start": "2025-07-01T08:00:00Z", "end": "2025-07-01T08:15:00Z"},
         {"name": "Pilot Onboard", "start": "2025-07-01T08:30:00Z", "end": "2025-07-01T08:45:00Z"},
         {"name": "Berthing", "start": "2025-07-01T09:00:00Z", "end": "2025-07-01T09:30:00Z"},
-    ]
-
-
-KEYWORDS = [
-    "loading", "berthing", "anchorage", "shifting", "unloading",
-    "cargo", "discharge", "arrival", "departure", "pilot", "tug",
-    "mooring", "unmooring", "bunkering", "crew change"
-]
-
-TIME_PATTERN = re.compile(
-    # Matches various forms like 08:30, 8:30, 01/07/2025 08:30, 2025-07-01 08:30, etc.
-    r"((\d{1,2}:\d{2})|((\d{1,2}[/-]\d{1,2}[/-]\d{2,4})\s+\d{1,2}:\d{2})|(\d{4}-\d{2}-\d{2}\s+\d{1,2}:\d{2}))",
-    re.IGNORECASE,
-)
+    ])
 
 
-def _regex_extract(text: str) -> List[Dict[str, str]]:
+def _regex_extract(text: str) -> EventTable:
     """Fallback regex extraction for events and times."""
-    lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
-    results: List[Dict[str, str]] = []
-    
-    for ln in lines:
-        low = ln.lower()
-        if any(k in low for k in KEYWORDS):
-            matches = TIME_PATTERN.findall(ln)
-            # Flatten matches and pick up to two time-like tokens
-            times: List[str] = []
-            for m in matches:
-                candidate = m[0] if isinstance(m, tuple) else m
-                if candidate:
-                    times.append(candidate)
-                if len(times) >= 2:
-                    break
-            
-            results.append({
-                "name": ln,
-                "start": times[0] if len(times) >= 1 else "",
-                "end": times[1] if len(times) >= 2 else "",
-            })
-    
-    return results
-
-
+    return fallback_events(text)
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import re
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+DAY = 86400
+HOUR = 3600
+
+# Dated stamps in the forms TIME_PATTERN extracts; slashed dates are day-first
+_DATE_TIME = [
+    (re.compile(r'^(\d{4})-(\d{2})-(\d{2})[ T]+(\d{1,2}):(\d{2})'), "ymd"),
+    (re.compile(r'^(\d{1,2})[/-](\d{1,2})[/-](\d{2,4})\s+(\d{1,2}):(\d{2})'), "dmy"),
+]
+_TIME_ONLY = re.compile(r'^(\d{1,2}):(\d{2})$')
+_DATE_ONLY = re.compile(r'^(\d{4})-(\d{2})-(\d{2})$')
+# A date anywhere in an event name, e.g. the full line of a medium-confidence event
+_NAME_DATE = re.compile(r'\b(?:(\d{4})-(\d{2})-(\d{2})|(\d{1,2})[/-](\d{1,2})[/-](\d{2,4}))\b')
+
+
+def _epoch(year: int, month: int, day: int) -> Optional[int]:
+    """Midnight of a naive SOF date as epoch seconds (UTC keeps day arithmetic exact)."""
+    if year < 100:
+        year += 2000
+    try:
+        return int(datetime(year, month, day, tzinfo=timezone.utc).timestamp())
+    except ValueError:
+        return None
+
+
+def parse_date(value: str) -> int:
+    """Epoch seconds of a ``YYYY-MM-DD`` date; raises ValueError otherwise."""
+    m = _DATE_ONLY.match(str(value).strip())
+    day_start = _epoch(int(m.group(1)), int(m.group(2)), int(m.group(3))) if m else None
+    if day_start is None:
+        raise ValueError(f"Expected YYYY-MM-DD date, got {value!r}")
+    return day_start
+
+
+def _clock(day_start: int, hour: int, minute: int) -> Optional[int]:
+    if hour > 24 or minute > 59:
+        return None
+    return day_start + hour * HOUR + minute * 60
+
+
+def parse_timestamp(value: str, day_start: Optional[int]) -> Tuple[Optional[int], Optional[int]]:
+    """Parse one SOF time string to ``(epoch_seconds, day_start)``.
+
+    Dated forms set the carried day; time-only forms need a carried
+    ``day_start``. Returns ``(None, day_start)`` when the value cannot be
+    placed in time.
+    """
+    value = (value or "").strip()
+    if not value:
+        return None, day_start
+    for pattern, order in _DATE_TIME:
+        m = pattern.match(value)
+        if m:
+            a, b, c, hour, minute = (int(g) for g in m.groups())
+            date = _epoch(a, b, c) if order == "ymd" else _epoch(c, b, a)
+            if date is None:
+                return None, day_start
+            return _clock(date, hour, minute), date
+    m = _TIME_ONLY.match(value)
+    if m and day_start is not None:
+        return _clock(day_start, int(m.group(1)), int(m.group(2))), day_start
+    return None, day_start
+
+
+def name_date(name: Any) -> Optional[int]:
+    """Midnight of the first date mentioned in an event name, if any."""
+    m = _NAME_DATE.search(str(name or ""))
+    if not m:
+        return None
+    if m.group(1):
+        return _epoch(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+    return _epoch(int(m.group(6)), int(m.group(5)), int(m.group(4)))
+
+
+def resolve_time(raw: Any, day_start: Optional[int], floor: Optional[int]) -> Tuple[Optional[int], Optional[int]]:
+    """Parse one stamp, rolling a time-only value forward by days until it reaches ``floor``."""
+    raw = str(raw or "").strip()
+    ts, day_start = parse_timestamp(raw, day_start)
+    if ts is not None and floor is not None and _TIME_ONLY.match(raw):
+        while ts < floor:
+            ts += DAY
+            day_start += DAY
+    return ts, day_start
+
+
+# What resolving one event carries to the next: (day_start, previous start)
+CarriedState = Tuple[Optional[int], Optional[int]]
+
+
+def resolve_event(
+    event: Dict[str, Any], state: CarriedState
+) -> Tuple[Tuple[Optional[int], Optional[int]], CarriedState]:
+    """Epoch ``(start, end)`` of one event and the state carried past it; see resolve_times."""
+    day_start, previous = state
+    floor = previous
+    named = name_date(event.get("name"))
+    if named is not None:
+        day_start, floor = named, None
+    start, day_start = resolve_time(event.get("start"), day_start, floor)
+    end, day_start = resolve_time(event.get("end"), day_start, start)
+    return (start, end), (day_start, previous if start is None else start)
+
+
+def resolve_times(
+    events: Iterable[Dict[str, Any]], start_date: Optional[str] = None
+) -> List[Tuple[Optional[int], Optional[int]]]:
+    """Epoch ``(start, end)`` for each event in document order, None where unusable.
+
+    Dates carry forward from the last dated stamp. A date in the event name
+    (the source line of medium-confidence events) anchors its time-only
+    stamps to that day. Otherwise a time-only start earlier than the
+    previous event's start rolls over to the next day. A time-only end
+    before its own start is taken to be past midnight.
+    """
+    state: CarriedState = (parse_date(start_date) if start_date else None, None)
+    resolved: List[Tuple[Optional[int], Optional[int]]] = []
+    for event in events:
+        times, state = resolve_event(event, state)
+        resolved.append(times)
+    return resolved
+
+
+def normalize_events(events: List[Dict[str, Any]], start_date: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Copies of ``events`` with integer epoch ``start_ts``/``end_ts`` (None if unresolved)."""
+    return [
+        {**event, "start_ts": start, "end_ts": end}
+        for event, (start, end) in zip(events, resolve_times(events, start_date))
+    ]
@@ -1,23 +1,95 @@
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, Response, request, jsonify, send_file, url_for
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import io
-import csv
+import os
+import time
+import zipfile
+import zlib
 
 from .config import get_config
 from .db import get_sql_connection
-from .services.blob_service import BlobUploader
+from .services.blob_service import BlobUploadQueue, get_blob_uploader
+from .services.job_queue import Job, QueueFullError, get_job_manager
+from .services.metrics import request_timings, stage
+from .services.persistence import get_event_store
+from .services.profiling import authorized, get_profile_store
+from .services.result_cache import get_result_cache
+from .services.result_store import get_result_store
+from .services.ocr_service import OCRService
+from .utils.export_stream import iter_csv, iter_gzip, iter_json, iter_ndjson
+from .utils.upload_spool import SpooledDocument, UploadTooLarge, as_document
+from .parsers.event_table import EventTable, dumps
 from .parsers.sof_parser import extract_events
+from .parsers.timestamps import parse_date, parse_timestamp
 
 
 api_bp = Blueprint("api", __name__)
 
 
-def _get_uploader() -> BlobUploader | None:
+_CONFIGURED = object()
+
+
+def _spool(stream, filename: str, max_bytes=None) -> SpooledDocument:
+	"""Copy an upload stream into memory, or into a temp file above UPLOAD_SPOOL_MB."""
 	cfg = get_config()
-	connection_string = cfg.get("AZURE_STORAGE_CONNECTION_STRING")
-	container = cfg.get("AZURE_STORAGE_CONTAINER")
-	if not connection_string or not container:
-		return None
-	return BlobUploader(connection_string, container)
+	return SpooledDocument.from_stream(
+		stream, filename, cfg["UPLOAD_SPOOL_MB"] * 1024 * 1024, max_bytes, cfg["UPLOAD_SPOOL_DIR"] or None
+	)
+
+
+def _process_upload(document, filename: str, progress=None, ocr_service=None, uploader=_CONFIGURED) -> dict:
+	"""OCR + parse a document and store the original; shared by sync, job and batch uploads.
+
+	``document`` is a SpooledDocument (or raw bytes); the caller owns it and
+	closes it afterwards. Batch callers pass a shared ``ocr_service`` so it
+	is built once per batch rather than once per file; ``uploader`` defaults
+	to the process-wide one (None skips storage).
+	"""
+	document = as_document(document, filename)
+	# Parse events using OCR + NLP pipeline
+	parsed = extract_events(document, filename, progress=progress, ocr_service=ocr_service)
+	# Keys server-side state for this document, e.g. laytime sessions
+	document_id = document.sha256
+	# Exports fetch the result by id instead of posting it back
+	result_id = get_result_store().put(parsed).id
+
+	# Upload original document to Azure Blob if configured; queued uploads return at once
+	blob_name = None
+	try:
+		if uploader is _CONFIGURED:
+			uploader = get_blob_uploader()
+		if uploader is not None:
+			blob_name = uploader.upload_document(document)
+	except Exception as exc:
+		# Continue even if upload fails; surface message
+		return {
+			"result": parsed, "result_id": result_id, "document_id": document_id, "blob": None, "upload_error": str(exc),
+		}
+
+	return {"result": parsed, "result_id": result_id, "document_id": document_id, "blob": blob_name}
+
+
+def _persist_documents(outcomes: list, vessel=None) -> None:
+	"""Save extracted documents and their events in one bulk write, if persistence is on."""
+	try:
+		store = get_event_store()
+		if store is None or not outcomes:
+			return
+		with stage("persist"):
+			store.save_documents([
+				{
+					"document_id": outcome["document_id"],
+					"filename": outcome["result"].get("filename"),
+					"vessel": vessel,
+					"blob": outcome.get("blob"),
+					"extraction_method": outcome["result"].get("extraction_method"),
+					"events": outcome["result"].get("events") or [],
+				}
+				for outcome in outcomes
+			])
+	except Exception as exc:
+		# Extraction results are still returned when the database is unavailable
+		print(f"Persisting {len(outcomes)} document(s) failed: {exc}")
 
 
 @api_bp.post("/upload")
@@ -26,22 +98,169 @@ def upload():
 		return {"error": "Missing file form field 'file'"}, 400
 
 	uploaded_file = request.files["file"]
-	file_bytes = uploaded_file.read()
 
-	# Parse events using OCR + NLP pipeline
-	parsed = extract_events(file_bytes, uploaded_file.filename)
+	# ?timings=1 adds the per-stage breakdown of this request to the response
+	with request_timings() as stages, _spool(uploaded_file.stream, uploaded_file.filename) as document:
+		start = time.perf_counter()
+		outcome = _process_upload(document, uploaded_file.filename)
+		_persist_documents([outcome], request.form.get("vessel"))
+		total = time.perf_counter() - start
+	if request.args.get("timings") in ("1", "true"):
+		outcome["timings"] = {
+			"total_ms": round(total * 1000, 2),
+			"stages_ms": {name: round(seconds * 1000, 2) for name, seconds in stages.items()},
+		}
+	return jsonify(outcome), 200
 
-	# Upload original document to Azure Blob if configured
-	uploader = _get_uploader()
-	blob_name = None
-	if uploader is not None:
+
+@api_bp.post("/jobs")
+def create_job():
+	"""Queue an upload for background extraction and return its job id at once."""
+	if "file" not in request.files:
+		return {"error": "Missing file form field 'file'"}, 400
+
+	uploaded_file = request.files["file"]
+	filename = uploaded_file.filename
+	# Spooled into a file the job owns; Werkzeug's copy goes away with the request
+	document = _spool(uploaded_file.stream, filename)
+	vessel = request.form.get("vessel")
+
+	def work(job: Job) -> dict:
+		with document:
+			outcome = _process_upload(document, filename, progress=job.set_progress)
+		_persist_documents([outcome], vessel)
+		return outcome
+
+	try:
+		job = get_job_manager().submit(work, filename)
+	except QueueFullError as exc:
+		document.close()
+		return jsonify({"error": "Extraction queue is full, retry later", "detail": str(exc)}), 503, {"Retry-After": "30"}
+
+	return jsonify(job.to_dict()), 202, {"Location": url_for("api.get_job", job_id=job.id)}
+
+
+@api_bp.get("/jobs/<job_id>")
+def get_job(job_id: str):
+	job = get_job_manager().get(job_id)
+	if job is None:
+		return jsonify({"error": "Unknown or expired job id"}), 404
+	return jsonify(job.to_dict()), 200
+
+
+def _spool_member(read, name: str, max_file_bytes: int):
+	"""Spool one batch file; a file that is too large or corrupt becomes its error instead."""
+	try:
+		with read() as stream:
+			return _spool(stream, name, max_file_bytes)
+	except (UploadTooLarge, zipfile.BadZipFile, zlib.error, EOFError) as exc:
+		return exc
+
+
+def _batch_documents(max_files: int, max_file_bytes: int) -> list:
+	"""Collect (filename, SpooledDocument or error) pairs from multipart files or a single ZIP upload.
+
+	ZIP members are decompressed straight into spooled documents, so a large
+	archive is never expanded in memory. A file over the size limit or a
+	corrupt ZIP member is paired with its exception and reported on its own
+	line instead of failing the batch. On error every document collected so
+	far is closed.
+	"""
+	uploads = request.files.getlist("files") or request.files.getlist("file")
+	documents = []
+	try:
+		if len(uploads) == 1 and (uploads[0].filename or "").lower().endswith(".zip"):
+			with zipfile.ZipFile(uploads[0].stream) as archive:
+				for info in archive.infolist():
+					name = os.path.basename(info.filename)
+					# Skip folders and archive metadata such as __MACOSX/._foo.pdf
+					if info.is_dir() or not name or name.startswith(".") or info.filename.startswith("__MACOSX/"):
+						continue
+					if len(documents) >= max_files:
+						raise ValueError(f"Batch is limited to {max_files} files")
+					if info.file_size > max_file_bytes:
+						documents.append((name, UploadTooLarge(f"{name} exceeds the per-file size limit")))
+						continue
+					documents.append((name, _spool_member(lambda: archive.open(info), name, max_file_bytes)))
+			return documents
+
+		if len(uploads) > max_files:
+			raise ValueError(f"Batch is limited to {max_files} files")
+		for f in uploads:
+			if f.filename:
+				documents.append((f.filename, _spool_member(lambda: f.stream, f.filename, max_file_bytes)))
+		return documents
+	except BaseException:
+		for _, document in documents:
+			if isinstance(document, SpooledDocument):
+				document.close()
+		raise
+
+
+@api_bp.post("/batch")
+def batch_upload():
+	"""Extract many documents concurrently and stream one NDJSON line per document.
+
+	Accepts repeated ``files`` form fields or a single ZIP archive. Lines are
+	written as documents finish, so fast files are not held back by slow ones;
+	``index`` gives each document's position in the request. Files that are
+	too large, corrupt or fail extraction get an ``error`` line. The last
+	line is ``{"summary": {"files", "extracted", "failed"}}``.
+	"""
+	cfg = get_config()
+	# A batch may exceed the single-upload body limit; each file is still held to it
+	request.max_content_length = cfg["BATCH_MAX_MB"] * 1024 * 1024
+	try:
+		documents = _batch_documents(cfg["BATCH_MAX_FILES"], cfg["UPLOAD_MAX_MB"] * 1024 * 1024)
+	except (ValueError, zipfile.BadZipFile) as exc:
+		return jsonify({"error": str(exc)}), 400
+	if not documents:
+		return {"error": "Missing file form field 'files'"}, 400
+
+	ocr_service = OCRService()
+	vessel = request.form.get("vessel")
+
+	def process(index: int, filename: str, document) -> dict:
+		if isinstance(document, Exception):
+			return {"index": index, "filename": filename, "error": str(document)}
 		try:
-			blob_name = uploader.upload_bytes(file_bytes, uploaded_file.filename)
+			with document:
+				outcome = _process_upload(document, filename, ocr_service=ocr_service)
 		except Exception as exc:
-			# Continue even if upload fails; surface message
-			return jsonify({"result": parsed, "blob": None, "upload_error": str(exc)}), 200
+			return {"index": index, "filename": filename, "error": str(exc)}
+		return {"index": index, "filename": filename, **outcome}
 
-	return jsonify({"result": parsed, "blob": blob_name}), 200
+	def generate():
+		with ThreadPoolExecutor(max_workers=max(1, cfg["BATCH_WORKERS"])) as pool:
+			futures = [pool.submit(process, i, name, document) for i, (name, document) in enumerate(documents)]
+			documents.clear()
+			extracted = []
+			for future in as_completed(futures):
+				line = future.result()
+				if "document_id" in line:
+					extracted.append(line)
+				yield dumps(line) + "\n"
+			summary = {"files": len(futures), "extracted": len(extracted), "failed": len(futures) - len(extracted)}
+			yield dumps({"summary": summary}) + "\n"
+		# One bulk write for the whole batch once every line is out
+		_persist_documents(extracted, vessel)
+
+	return Response(generate(), mimetype="application/x-ndjson")
+
+
+@api_bp.get("/blobs/<path:blob_name>")
+def blob_status(blob_name: str):
+	"""Background upload state of a stored document: queued, uploading, uploaded or failed."""
+	try:
+		uploader = get_blob_uploader()
+	except Exception as exc:
+		return jsonify({"error": f"Blob storage unavailable: {exc}"}), 503
+	if not isinstance(uploader, BlobUploadQueue):
+		return jsonify({"error": "Background uploads are not enabled"}), 404
+	status = uploader.status(blob_name)
+	if status is None:
+		return jsonify({"error": "Unknown blob"}), 404
+	return jsonify({"blob": blob_name, **status}), 200
 
 
 @api_bp.get("/test-ocr")
@@ -77,28 +296,304 @@ def test_ocr():
 	}), 200
 
 
+@api_bp.get("/profiles")
+def list_profiles():
+	"""Recent request profiles, newest first; needs the configured X-Profile-Token."""
+	store = get_profile_store()
+	if store is None:
+		return jsonify({"error": "Profiling is disabled"}), 404
+	if not authorized(request.headers):
+		return jsonify({"error": "Missing or invalid profiling token"}), 403
+	profiles = store.list()
+	for profile in profiles:
+		profile["download"] = url_for("api.get_profile", profile_id=profile["id"])
+	return jsonify({"profiles": profiles}), 200
+
+
+@api_bp.get("/profiles/<profile_id>")
+def get_profile(profile_id: str):
+	"""One profile in collapsed-stack format, ready for flamegraph.pl or speedscope."""
+	store = get_profile_store()
+	if store is None:
+		return jsonify({"error": "Profiling is disabled"}), 404
+	if not authorized(request.headers):
+		return jsonify({"error": "Missing or invalid profiling token"}), 403
+	path = store.collapsed_path(profile_id)
+	if path is None:
+		return jsonify({"error": "Unknown profile"}), 404
+	return send_file(path, mimetype="text/plain", as_attachment=True, download_name=f"{profile_id}.collapsed")
+
+
+@api_bp.get("/cache/stats")
+def cache_stats():
+	cache = get_result_cache()
+	if cache is None:
+		return jsonify({"enabled": False}), 200
+	return jsonify({"enabled": True, **cache.stats()}), 200
+
+
+def _laytime_sessions():
+	# The laytime engine is NumPy-backed; it is loaded on the first laytime request
+	from .services.laytime_session import get_laytime_sessions
+
+	return get_laytime_sessions()
+
+
+@api_bp.post("/laytime")
+def laytime():
+	"""Laytime statement for ``{"events", "terms"}``, or many with ``{"voyages": [...]}``."""
+	from .services.laytime import compute_laytime_batch
+
+	payload = request.get_json(silent=True)
+	if not isinstance(payload, dict):
+		return jsonify({"error": "Expected a JSON object"}), 400
+	if "voyages" in payload:
+		voyages = payload["voyages"]
+		if not isinstance(voyages, list) or not all(isinstance(v, dict) for v in voyages):
+			return jsonify({"error": "voyages must be a list of {events, terms} objects"}), 400
+		results = compute_laytime_batch(voyages)
+		_persist_laytime(voyages, results)
+		return jsonify({"results": results}), 200
+
+	result = compute_laytime_batch([{"events": payload.get("events"), "terms": payload.get("terms")}])[0]
+	if "error" in result:
+		return jsonify(result), 400
+	_persist_laytime([payload], [result])
+	return jsonify(result), 200
+
+
+def _persist_laytime(voyages: list, results: list) -> None:
+	"""Store statements of voyages that name their ``document_id``, in one bulk write."""
+	rows = [
+		{"document_id": voyage["document_id"], **result}
+		for voyage, result in zip(voyages, results)
+		if voyage.get("document_id") and "error" not in result
+	]
+	try:
+		store = get_event_store()
+		if store is not None and rows:
+			store.save_laytime(rows)
+	except Exception as exc:
+		print(f"Persisting {len(rows)} laytime result(s) failed: {exc}")
+
+
+@api_bp.post("/events/query")
+def query_events():
+	"""Interval queries over the events of one or more voyages.
+
+	Body: ``{"voyages": [{"events", "start_date"?}]}`` (or a single ``events``
+	list) plus either ``"window": {"start", "end", "voyage"?}`` for events
+	overlapping a time range or ``"overlap": {"a": [...], "b": [...]}`` for
+	keyword-a events overlapping keyword-b events in the same voyage.
+	"""
+	payload = request.get_json(silent=True)
+	if not isinstance(payload, dict):
+		return jsonify({"error": "Expected a JSON object"}), 400
+	voyages = payload.get("voyages")
+	if voyages is None:
+		voyages = [{"events": payload.get("events"), "start_date": payload.get("start_date")}]
+	if not isinstance(voyages, list) or not all(isinstance(v, dict) for v in voyages):
+		return jsonify({"error": "voyages must be a list of {events, start_date} objects"}), 400
+
+	from .services.event_index import EventIndex
+
+	try:
+		index = EventIndex(voyages)
+	except (AttributeError, TypeError, ValueError) as e:
+		return jsonify({"error": f"Invalid events: {e}"}), 400
+
+	window = payload.get("window")
+	overlap = payload.get("overlap")
+	if isinstance(window, dict):
+		start, _ = parse_timestamp(str(window.get("start") or ""), None)
+		end, _ = parse_timestamp(str(window.get("end") or ""), None)
+		if start is None or end is None:
+			return jsonify({"error": "window start and end must be dated times, e.g. 2025-07-01 08:00"}), 400
+		return jsonify({"events": index.window(start, end, window.get("voyage"))}), 200
+	if isinstance(overlap, dict):
+		a, b = overlap.get("a"), overlap.get("b")
+		if not isinstance(a, list) or not isinstance(b, list):
+			return jsonify({"error": "overlap needs keyword lists a and b"}), 400
+		return jsonify({"overlaps": index.overlaps(a, b)}), 200
+	return jsonify({"error": "Expected a window or overlap query"}), 400
+
+
+@api_bp.put("/laytime/sessions/<document_id>")
+def open_laytime_session(document_id: str):
+	"""Start (or restart) incremental laytime for a document from its events and terms."""
+	payload = request.get_json(silent=True) or {}
+	events = payload.get("events") or []
+	if not isinstance(events, list) or not all(isinstance(e, dict) for e in events):
+		return jsonify({"error": "events must be a list of objects"}), 400
+	try:
+		session = _laytime_sessions().open(document_id, events, payload.get("terms"))
+	except (TypeError, ValueError) as exc:
+		return jsonify({"error": str(exc)}), 400
+	return jsonify(session.snapshot()), 200
+
+
+@api_bp.get("/laytime/sessions/<document_id>")
+def get_laytime_session(document_id: str):
+	session = _laytime_sessions().get(document_id)
+	if session is None:
+		return jsonify({"error": "Unknown or expired laytime session"}), 404
+	return jsonify(session.snapshot()), 200
+
+
+@api_bp.delete("/laytime/sessions/<document_id>")
+def close_laytime_session(document_id: str):
+	if not _laytime_sessions().close(document_id):
+		return jsonify({"error": "Unknown or expired laytime session"}), 404
+	return "", 204
+
+
+@api_bp.post("/laytime/sessions/<document_id>/events")
+@api_bp.patch("/laytime/sessions/<document_id>/events/<event_id>")
+@api_bp.delete("/laytime/sessions/<document_id>/events/<event_id>")
+def edit_laytime_event(document_id: str, event_id: str | None = None):
+	"""Insert, edit or delete one event; responds with only the statement fields that changed."""
+	session = _laytime_sessions().get(document_id)
+	if session is None:
+		return jsonify({"error": "Unknown or expired laytime session"}), 404
+	payload = request.get_json(silent=True) or {}
+	if not isinstance(payload, dict):
+		return jsonify({"error": "Expected a JSON object"}), 400
+	try:
+		if request.method == "POST":
+			event = payload.get("event")
+			if not isinstance(event, dict):
+				return jsonify({"error": "Missing event object"}), 400
+			return jsonify(session.insert(event, payload.get("position"))), 201
+		if request.method == "PATCH":
+			return jsonify(session.update(event_id, payload)), 200
+		return jsonify(session.delete(event_id)), 200
+	except KeyError:
+		return jsonify({"error": f"Unknown event id {event_id}"}), 404
+	except (TypeError, ValueError) as exc:
+		return jsonify({"error": str(exc)}), 400
+
+
+EVENT_FIELDS = ["name", "start", "end"]
+
+
+def _attachment(chunks, mimetype: str, filename: str) -> Response:
+	"""Stream chunks as a download; no Content-Length, so it goes out chunked."""
+	response = Response(chunks, mimetype=mimetype)
+	response.headers["Content-Disposition"] = f"attachment; filename={filename}"
+	return response
+
+
 @api_bp.post("/export/json")
 def export_json():
+	"""Echo the payload as JSON, or its events as NDJSON with ?format=ndjson."""
 	payload = request.get_json(silent=True) or {}
-	return jsonify(payload), 200
+	if request.args.get("format") == "ndjson":
+		return _attachment(iter_ndjson(payload.get("events", [])), "application/x-ndjson", "events.ndjson")
+	return Response(iter_json(payload), mimetype="application/json")
 
 
 @api_bp.post("/export/csv")
 def export_csv():
 	payload = request.get_json(silent=True) or {}
 	events = payload.get("events", [])
-	output = io.StringIO()
-	writer = csv.DictWriter(output, fieldnames=["name", "start", "end"])
-	writer.writeheader()
-	for e in events:
-		writer.writerow({
-			"name": e.get("name", ""),
-			"start": e.get("start", ""),
-			"end": e.get("end", ""),
-		})
-	mem = io.BytesIO(output.getvalue().encode("utf-8"))
-	mem.seek(0)
-	return send_file(mem, mimetype="text/csv", as_attachment=True, download_name="events.csv")
+	return _attachment(iter_csv(events, EVENT_FIELDS), "text/csv", "events.csv")
+
+
+def _bulk_bound(value):
+	"""Epoch seconds of a ``YYYY-MM-DD`` date or dated time, None when absent."""
+	if not value:
+		return None
+	ts, _ = parse_timestamp(value, None)
+	return ts if ts is not None else parse_date(value)
+
+
+def _list_arg(name: str) -> list:
+	"""Repeated and/or comma-separated query values, e.g. ?vessel=A&vessel=B,C."""
+	return [item.strip() for value in request.args.getlist(name) for item in value.split(",") if item.strip()]
+
+
+@api_bp.get("/export/bulk/<dataset>")
+def export_bulk(dataset: str):
+	"""Stored events or laytime results across documents as Parquet or an Arrow IPC stream.
+
+	Query: ``format`` (parquet | arrow), ``from``/``to`` bounding event
+	start times (``to`` exclusive), ``vessel`` and ``type`` (event-name
+	keyword), the last two repeatable. Laytime rows are those of documents
+	with a matching event.
+	"""
+	from .services.persistence import EVENT_EXPORT_COLUMNS, LAYTIME_EXPORT_COLUMNS
+	from .utils.columnar_export import FORMATS, iter_columnar
+
+	if dataset not in ("events", "laytime"):
+		return jsonify({"error": "dataset must be events or laytime"}), 404
+	fmt = request.args.get("format", "parquet")
+	if fmt not in FORMATS:
+		return jsonify({"error": f"format must be one of {', '.join(FORMATS)}"}), 400
+	try:
+		filters = {
+			"since": _bulk_bound(request.args.get("from")),
+			"until": _bulk_bound(request.args.get("to")),
+			"vessels": _list_arg("vessel"),
+			"event_types": _list_arg("type"),
+		}
+	except ValueError:
+		return jsonify({"error": "from and to must be dates or dated times, e.g. 2025-07-01 or 2025-07-01 08:00"}), 400
+	store = get_event_store()
+	if store is None:
+		return jsonify({"error": "Persistence is not enabled"}), 404
+
+	cfg = get_config()
+	if dataset == "events":
+		columns, batches = EVENT_EXPORT_COLUMNS, store.iter_event_rows(**filters)
+	else:
+		columns, batches = LAYTIME_EXPORT_COLUMNS, store.iter_laytime_rows(**filters)
+	try:
+		chunks = iter_columnar(
+			columns, batches, fmt,
+			row_group_rows=cfg["BULK_EXPORT_ROW_GROUP_ROWS"],
+			compression=cfg["BULK_EXPORT_PARQUET_COMPRESSION"],
+		)
+	except ImportError:
+		batches.close()
+		return jsonify({"error": "Bulk export needs pyarrow installed"}), 501
+	mimetype, extension = FORMATS[fmt]
+	return _attachment(chunks, mimetype, f"{dataset}.{extension}")
+
+
+@api_bp.get("/results/<result_id>/export")
+def export_result(result_id: str):
+	"""A stored extraction result as JSON, or its events as CSV, by result id.
+
+	Results never change once stored, so the ETag is the id and format and
+	a matching If-None-Match gets 304 without encoding anything. Responses
+	are gzipped when the client accepts it.
+	"""
+	fmt = request.args.get("format", "json")
+	if fmt not in ("json", "csv"):
+		return jsonify({"error": "format must be json or csv"}), 400
+	stored = get_result_store().get(result_id)
+	if stored is None:
+		return jsonify({"error": "Unknown or expired result id"}), 404
+
+	etag = f"{result_id}-{fmt}"
+	if request.if_none_match.contains_weak(etag):
+		response = Response(status=304)
+	else:
+		if fmt == "json":
+			chunks = [dumps(stored.result, sort_keys=True, separators=(",", ":")).encode("utf-8")]
+			response = _attachment(chunks, "application/json", "sof_export.json")
+		else:
+			events = EventTable.from_dicts(stored.result.get("events") or [])
+			response = _attachment(events.iter_csv(EVENT_FIELDS), "text/csv", "sof_export.csv")
+		level = get_config()["EXPORT_GZIP_LEVEL"]
+		if level and request.accept_encodings["gzip"]:
+			response.response = iter_gzip(response.response, level)
+			response.headers["Content-Encoding"] = "gzip"
+	# Weak: the same tag covers the gzipped and identity encodings
+	response.set_etag(etag, weak=True)
+	response.headers["Cache-Control"] = "private, no-cache"
+	response.vary.add("Accept-Encoding")
+	return response
 
 
 @api_bp.get("/db/version")
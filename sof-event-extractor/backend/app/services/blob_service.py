@@ -1,23 +1,227 @@
+from __future__ import annotations
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from azure.storage.blob import BlobServiceClient
+from typing import Any, Dict, Optional, Tuple
+
+from app.config import get_config
+from app.services.metrics import stage
+from app.utils.upload_spool import SpooledDocument
 
 
 class BlobUploader:
-	def __init__(self, connection_string: str, container_name: str) -> None:
-		self._client = BlobServiceClient.from_connection_string(connection_string)
+	"""Uploads documents to one container through a shared BlobServiceClient.
+
+	``client`` may be any object with the BlobServiceClient surface
+	(``get_container_client``/``get_blob_client``), e.g. an Azurite-backed
+	client or an in-memory stand-in in tests. The container is checked on
+	the first upload only, not per request.
+	"""
+
+	def __init__(
+		self,
+		connection_string: Optional[str],
+		container_name: str,
+		client: Any = None,
+		max_concurrency: int = 4,
+		single_put_bytes: int = 8 * 1024 * 1024,
+	) -> None:
+		if client is None:
+			from azure.storage.blob import BlobServiceClient  # slow import, deferred until storage is used
+
+			# Above max_single_put_size the SDK switches to staged block uploads
+			client = BlobServiceClient.from_connection_string(
+				connection_string, max_single_put_size=single_put_bytes, max_block_size=4 * 1024 * 1024
+			)
+		self._client = client
 		self._container = container_name
-		self._ensure_container_exists()
+		self._max_concurrency = max(1, max_concurrency)
+		self._single_put_bytes = single_put_bytes
+		self._container_ready = False
+		self._lock = threading.Lock()
 
 	def _ensure_container_exists(self) -> None:
-		container = self._client.get_container_client(self._container)
-		if not container.exists():
-			container.create_container()
+		if self._container_ready:
+			return
+		with self._lock:
+			if self._container_ready:
+				return
+			container = self._client.get_container_client(self._container)
+			if not container.exists():
+				container.create_container()
+			self._container_ready = True
 
-	def upload_bytes(self, data: bytes, filename: str) -> str:
+	@staticmethod
+	def blob_name(filename: str) -> str:
 		stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%fZ")
-		blob_name = f"uploads/{stamp}-{filename}"
+		return f"uploads/{stamp}-{filename}"
+
+	def upload_bytes(self, data: bytes, filename: str, blob_name: Optional[str] = None) -> str:
+		return self.upload_document(SpooledDocument.from_bytes(data, filename), blob_name=blob_name)
+
+	def upload_document(self, document: SpooledDocument, blob_name: Optional[str] = None) -> str:
+		"""Upload a spooled document; files on disk are streamed rather than read into memory."""
+		self._ensure_container_exists()
+		blob_name = blob_name or self.blob_name(document.filename)
 		blob_client = self._client.get_blob_client(container=self._container, blob=blob_name)
-		blob_client.upload_blob(data, overwrite=True)
+		# Large files go up as blocks in parallel; small ones in a single put
+		concurrency = self._max_concurrency if document.size > self._single_put_bytes else 1
+		with stage("blob_upload"):
+			if document.in_memory:
+				blob_client.upload_blob(document.getvalue(), overwrite=True, max_concurrency=concurrency)
+			else:
+				with document.open() as stream:
+					blob_client.upload_blob(
+						stream, length=document.size, overwrite=True, max_concurrency=concurrency
+					)
 		return blob_name
 
 
+class BlobUploadQueue:
+	"""Moves blob uploads off the request path onto a small worker pool.
+
+	``upload_document`` returns the blob name at once and the upload runs in
+	the background, retried with exponential backoff and jitter. When
+	``max_pending`` uploads are already waiting the caller uploads inline,
+	so a slow storage account slows requests down rather than growing
+	memory without bound. Outcomes are kept per blob for ``status``.
+	"""
+
+	def __init__(
+		self,
+		uploader: BlobUploader,
+		workers: int = 2,
+		max_pending: int = 32,
+		retries: int = 3,
+		backoff_seconds: float = 0.5,
+		history: int = 1000,
+	) -> None:
+		self.uploader = uploader
+		self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="sof-blob")
+		self._max_pending = max_pending
+		self._retries = max(0, retries)
+		self._backoff = backoff_seconds
+		self._history = history
+		self._pending = 0
+		self._status: Dict[str, Dict[str, Any]] = {}
+		self._lock = threading.Lock()
+
+	def upload_bytes(self, data: bytes, filename: str) -> str:
+		document = SpooledDocument.from_bytes(data, filename)
+		try:
+			return self.upload_document(document)
+		finally:
+			document.close()
+
+	def upload_document(self, document: SpooledDocument) -> str:
+		"""Queue ``document``; it is retained until its upload finishes, so callers may close it."""
+		blob_name = self.uploader.blob_name(document.filename)
+		with self._lock:
+			inline = self._pending >= self._max_pending
+			if not inline:
+				self._pending += 1
+			self._record(blob_name, "uploading" if inline else "queued")
+		if inline:
+			self._upload(document, blob_name)
+		else:
+			self._executor.submit(self._run, document.retain(), blob_name)
+		return blob_name
+
+	def status(self, blob_name: str) -> Optional[Dict[str, Any]]:
+		with self._lock:
+			entry = self._status.get(blob_name)
+			return dict(entry) if entry is not None else None
+
+	def stats(self) -> Dict[str, int]:
+		with self._lock:
+			counts = {"pending": self._pending}
+			for entry in self._status.values():
+				counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+			return counts
+
+	def wait(self, timeout: float = 30.0) -> bool:
+		"""Block until no uploads are pending; True if the queue drained in time."""
+		deadline = time.monotonic() + timeout
+		while time.monotonic() < deadline:
+			with self._lock:
+				if self._pending == 0:
+					return True
+			time.sleep(0.01)
+		return False
+
+	def _record(self, blob_name: str, status: str, **extra: Any) -> None:
+		"""Lock held. Keeps the most recent ``history`` outcomes."""
+		self._status.pop(blob_name, None)
+		self._status[blob_name] = {"status": status, **extra}
+		while len(self._status) > self._history:
+			self._status.pop(next(iter(self._status)))
+
+	def _upload(self, document: SpooledDocument, blob_name: str) -> None:
+		attempt = 0
+		while True:
+			try:
+				self.uploader.upload_document(document, blob_name=blob_name)
+			except Exception as exc:
+				if attempt >= self._retries:
+					print(f"Blob upload failed for {blob_name} after {attempt + 1} attempts: {exc}")
+					with self._lock:
+						self._record(blob_name, "failed", attempts=attempt + 1, error=str(exc))
+					return
+				delay = self._backoff * (2 ** attempt)
+				time.sleep(delay + random.uniform(0, delay))
+				attempt += 1
+			else:
+				with self._lock:
+					self._record(blob_name, "uploaded", attempts=attempt + 1)
+				return
+
+	def _run(self, document: SpooledDocument, blob_name: str) -> None:
+		try:
+			with self._lock:
+				self._record(blob_name, "uploading")
+			self._upload(document, blob_name)
+		finally:
+			document.close()
+			with self._lock:
+				self._pending -= 1
+
+
+_uploaders: Dict[Tuple[str, str], Any] = {}
+_uploaders_lock = threading.Lock()
+
+
+def get_blob_uploader() -> Optional[Any]:
+	"""Process-wide uploader for the configured account, or None if storage is not configured.
+
+	Returns a BlobUploadQueue when BLOB_UPLOAD_ASYNC is on, else the
+	BlobUploader itself; both expose ``upload_bytes(data, filename)`` and
+	``upload_document(document)``.
+	"""
+	cfg = get_config()
+	connection_string = cfg.get("AZURE_STORAGE_CONNECTION_STRING")
+	container = cfg.get("AZURE_STORAGE_CONTAINER")
+	if not connection_string or not container:
+		return None
+	key = (connection_string, container)
+	with _uploaders_lock:
+		uploader = _uploaders.get(key)
+		if uploader is None:
+			uploader = BlobUploader(
+				connection_string,
+				container,
+				max_concurrency=cfg["BLOB_MAX_CONCURRENCY"],
+				single_put_bytes=cfg["BLOB_SINGLE_PUT_MB"] * 1024 * 1024,
+			)
+			if cfg["BLOB_UPLOAD_ASYNC"]:
+				uploader = BlobUploadQueue(
+					uploader,
+					workers=cfg["BLOB_UPLOAD_WORKERS"],
+					max_pending=cfg["BLOB_UPLOAD_MAX_PENDING"],
+					retries=cfg["BLOB_UPLOAD_RETRIES"],
+					backoff_seconds=cfg["BLOB_UPLOAD_BACKOFF_SECONDS"],
+				)
+			_uploaders[key] = uploader
+		return uploader
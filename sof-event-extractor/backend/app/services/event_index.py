@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.parsers.timestamps import HOUR, normalize_events
+from app.services.laytime import matches_keywords
+from app.utils.interval_index import IntervalIndex
+
+
+class EventIndex:
+    """Normalized events of one or more voyages behind an IntervalIndex.
+
+    Events are normalized once on construction; events without an end are
+    indexed as one-second instants and events that cannot be placed in
+    time are left out.
+    """
+
+    def __init__(self, voyages: List[Dict[str, Any]]) -> None:
+        self.events: List[Dict[str, Any]] = []
+        starts: List[int] = []
+        ends: List[int] = []
+        labels: List[int] = []
+        for number, voyage in enumerate(voyages):
+            for event in normalize_events(voyage.get("events") or [], voyage.get("start_date")):
+                start, end = event["start_ts"], event["end_ts"]
+                if start is None:
+                    continue
+                self.events.append({"voyage": number, **event})
+                starts.append(start)
+                ends.append(end if end is not None and end > start else start + 1)
+                labels.append(number)
+        self._starts = np.array(starts, dtype=np.int64)
+        self._ends = np.array(ends, dtype=np.int64)
+        self._labels = np.array(labels, dtype=np.int64)
+        self.index = IntervalIndex(self._starts, self._ends, self._labels)
+
+    def window(self, start: int, end: int, voyage: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Events overlapping [start, end), across all voyages unless one is given."""
+        return [self.events[i] for i in self.index.overlapping(start, end, voyage)]
+
+    def _subset(self, keywords: List[str]) -> np.ndarray:
+        return np.array(
+            [i for i, event in enumerate(self.events) if matches_keywords(str(event.get("name") or ""), keywords)],
+            dtype=np.int64,
+        )
+
+    def overlaps(self, probe_keywords: List[str], target_keywords: List[str]) -> List[Dict[str, Any]]:
+        """Pairs within the same voyage where a probe event (e.g. rain) overlaps a
+        target event (e.g. cargo working), with the overlapping time in hours."""
+        probes = self._subset(probe_keywords)
+        targets = self._subset(target_keywords)
+        if len(probes) == 0 or len(targets) == 0:
+            return []
+        probe_index = IntervalIndex(self._starts[probes], self._ends[probes], self._labels[probes])
+        target_index = IntervalIndex(self._starts[targets], self._ends[targets], self._labels[targets])
+        results = []
+        for i, j in target_index.overlap_pairs(probe_index):
+            a, b = probes[i], targets[j]
+            if a == b:
+                continue
+            overlap = min(self._ends[a], self._ends[b]) - max(self._starts[a], self._starts[b])
+            results.append({
+                "voyage": self.events[a]["voyage"],
+                "event": self.events[a],
+                "overlaps": self.events[b],
+                "overlap_hours": round(float(overlap) / HOUR, 4),
+            })
+        return results
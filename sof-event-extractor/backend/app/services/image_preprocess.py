@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import math
+from typing import Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageEnhance, ImageFilter
+
+
+# Rows processed per pass of the NumPy pipeline. Working buffers are sized
+# to one strip, so peak memory stays flat regardless of page size.
+STRIP_ROWS = 256
+
+# Line height (px) Tesseract reads best: 10pt body text rendered at 300 DPI
+TARGET_LINE_PX = 40
+PROBE_DPI = 72
+
+
+def preprocess_pil(
+    image: Image.Image, contrast: float, blur_radius: float, sharpness: float
+) -> Image.Image:
+    """Reference pipeline: four full-image PIL passes, each allocating a new image."""
+    # Convert to grayscale
+    if image.mode != 'L':
+        image = image.convert('L')
+
+    # Enhance contrast
+    image = ImageEnhance.Contrast(image).enhance(contrast)
+
+    # Apply slight blur to reduce noise
+    image = image.filter(ImageFilter.GaussianBlur(radius=blur_radius))
+
+    # Enhance sharpness
+    return ImageEnhance.Sharpness(image).enhance(sharpness)
+
+
+def preprocess_numpy(
+    image: Image.Image,
+    contrast: float,
+    blur_radius: float,
+    sharpness: float,
+    binarize: bool = False,
+    deskew: bool = False,
+    strip_rows: int = STRIP_ROWS,
+) -> Image.Image:
+    """Fused equivalent of ``preprocess_pil`` over a single uint8 output buffer.
+
+    Contrast, Gaussian blur and PIL's sharpness blend are applied per strip
+    of rows in three reused float32 buffers; blur and sharpen are linear, so
+    both collapse into separable passes over the same strip. Optional Otsu
+    binarization and projection-profile deskew run on the result in place.
+    """
+    gray = np.asarray(image if image.mode == 'L' else image.convert('L'))
+    height, width = gray.shape
+    out = np.empty_like(gray)
+    if height == 0 or width == 0:
+        return Image.fromarray(out)
+
+    # ImageEnhance.Contrast blends towards the rounded mean grey level
+    mean = int(gray.mean() + 0.5)
+    gauss = _gaussian_kernel(blur_radius)
+    box = np.ones(3, dtype=np.float32)
+    # ImageEnhance.Sharpness: f*img + (1-f)*SMOOTH(img), SMOOTH = (box3x3 + 4*img) / 13
+    keep = sharpness + 4.0 * (1.0 - sharpness) / 13.0
+    spread = (1.0 - sharpness) / 13.0
+
+    halo = len(gauss) // 2 + 1
+    rows = min(strip_rows, height) + 2 * halo
+    buf = np.empty((rows, width), dtype=np.float32)
+    scratch = np.empty_like(buf)
+    blurred = np.empty_like(buf)
+
+    for top in range(0, height, strip_rows):
+        bottom = min(top + strip_rows, height)
+        lo, hi = max(0, top - halo), min(height, bottom + halo)
+        n = hi - lo
+        b, s, g = buf[:n], scratch[:n], blurred[:n]
+
+        b[...] = gray[lo:hi]
+        b *= contrast
+        b += mean * (1.0 - contrast)
+        np.clip(b, 0, 255, out=b)
+
+        _convolve(b, s, gauss, axis=1)
+        _convolve(s, g, gauss, axis=0)
+        _convolve(g, s, box, axis=1)
+        _convolve(s, b, box, axis=0)
+
+        g *= keep
+        b *= spread
+        b += g
+        np.clip(b, 0, 255, out=b)
+        np.rint(b, out=b)
+        out[top:bottom] = b[top - lo:top - lo + bottom - top]
+
+    if deskew:
+        angle = estimate_skew(out)
+        if abs(angle) >= 0.1:
+            rotated = Image.fromarray(out).rotate(-angle, resample=Image.BILINEAR, fillcolor=255)
+            out = np.array(rotated)
+
+    if binarize:
+        threshold = otsu_threshold(out)
+        ink = out <= threshold
+        out.fill(255)
+        out[ink] = 0
+
+    return Image.fromarray(out)
+
+
+def _gaussian_kernel(radius: float) -> np.ndarray:
+    """Normalised 1-D Gaussian with sigma=radius, truncated at 2 sigma."""
+    if radius <= 0:
+        return np.ones(1, dtype=np.float32)
+    taps = max(1, int(math.ceil(2 * radius)))
+    x = np.arange(-taps, taps + 1, dtype=np.float32)
+    kernel = np.exp(-(x * x) / (2 * radius * radius))
+    return (kernel / kernel.sum()).astype(np.float32)
+
+
+def _convolve(src: np.ndarray, dst: np.ndarray, kernel: np.ndarray, axis: int) -> None:
+    """dst = src convolved with a symmetric 1-D kernel along ``axis``, edges replicated."""
+    s = np.moveaxis(src, axis, 0)
+    d = np.moveaxis(dst, axis, 0)
+    n = s.shape[0]
+    r = len(kernel) // 2
+    np.multiply(s, kernel[r], out=d)
+    for i in range(1, r + 1):
+        w = kernel[r + i]
+        if i < n:
+            d[i:] += w * s[:-i]
+            d[:-i] += w * s[i:]
+        edge = min(i, n)
+        d[:edge] += w * s[:1]
+        d[n - edge:] += w * s[-1:]
+
+
+def otsu_threshold(gray: np.ndarray) -> int:
+    """Grey level that best separates ink from paper (Otsu's method)."""
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    weight_bg = np.cumsum(hist)
+    weight_fg = weight_bg[-1] - weight_bg
+    levels = np.cumsum(hist * np.arange(256))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_bg = levels / weight_bg
+        mean_fg = (levels[-1] - levels) / weight_fg
+        between = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+    return int(np.nanargmax(between)) if np.isfinite(between).any() else 127
+
+
+def _ink_mask(gray: np.ndarray, max_side: int) -> Tuple[np.ndarray, int]:
+    """Downsampled ink mask and the step used to sample it."""
+    step = max(1, int(math.ceil(max(gray.shape) / max_side)))
+    small = gray[::step, ::step]
+    return small <= min(otsu_threshold(small), 200), step
+
+
+def estimate_skew(gray: np.ndarray, max_angle: float = 5.0, steps: int = 41, max_points: int = 50000) -> float:
+    """Skew of the text lines in degrees, counter-clockwise like ``Image.rotate``.
+
+    Scores every candidate angle at once: ink coordinates are projected onto
+    rotated row axes and the angle whose row histogram is sharpest wins.
+    """
+    ink, _ = _ink_mask(gray, 1000)
+    ys, xs = np.nonzero(ink)
+    if len(ys) < 100:
+        return 0.0
+    if len(ys) > max_points:
+        pick = np.random.default_rng(0).choice(len(ys), max_points, replace=False)
+        ys, xs = ys[pick], xs[pick]
+
+    angles = np.linspace(-max_angle, max_angle, steps)
+    theta = np.radians(angles)[:, None]
+    rows = np.rint(ys * np.cos(theta) + xs * np.sin(theta)).astype(np.int64)
+    rows -= rows.min()
+    span = int(rows.max()) + 1
+    offsets = (np.arange(steps) * span)[:, None]
+    hist = np.bincount((rows + offsets).ravel(), minlength=steps * span).reshape(steps, span)
+    scores = (hist.astype(np.float64) ** 2).sum(axis=1)
+    return float(angles[int(np.argmax(scores))])
+
+
+def estimate_line_height(gray: np.ndarray) -> Optional[float]:
+    """Median height in pixels of the text lines on a page, None if no text is found."""
+    ink, step = _ink_mask(gray, 4000)
+    inked_rows = ink.sum(axis=1) > max(1, ink.shape[1] // 500)
+    # Runs of consecutive inked rows are text lines
+    edges = np.diff(inked_rows.astype(np.int8), prepend=0, append=0)
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    heights = (ends - starts) * step
+    heights = heights[heights >= 3]
+    if len(heights) == 0:
+        return None
+    return float(np.median(heights))
+
+
+def choose_dpi(probe: Image.Image, probe_dpi: int, min_dpi: int, max_dpi: int, default_dpi: int) -> int:
+    """Render resolution that brings the detected line height to ``TARGET_LINE_PX``."""
+    gray = np.asarray(probe if probe.mode == 'L' else probe.convert('L'))
+    line_px = estimate_line_height(gray)
+    if line_px is None:
+        return default_dpi
+    dpi = probe_dpi * TARGET_LINE_PX / line_px
+    # Round to 25 DPI steps so near-identical pages share cache keys
+    dpi = int(round(dpi / 25.0)) * 25
+    return max(min_dpi, min(max_dpi, dpi))
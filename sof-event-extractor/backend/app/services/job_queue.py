@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from app.config import get_config
+
+
+class QueueFullError(Exception):
+    """Raised when the job pool and its queue are both saturated."""
+
+
+class Job:
+    """State of one background extraction, safe to poll from request threads."""
+
+    def __init__(self, filename: str) -> None:
+        self.id = uuid.uuid4().hex
+        self.filename = filename
+        self.status = "queued"  # queued -> running -> done | failed
+        self.pages_done = 0
+        self.pages_total: Optional[int] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def set_progress(self, pages_done: int, pages_total: int) -> None:
+        with self._lock:
+            self.pages_done = pages_done
+            self.pages_total = pages_total
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            data: Dict[str, Any] = {
+                "id": self.id,
+                "filename": self.filename,
+                "status": self.status,
+                "progress": {"pages_done": self.pages_done, "pages_total": self.pages_total},
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+            }
+            if self.status == "done":
+                data["result"] = self.result
+            if self.error is not None:
+                data["error"] = self.error
+            return data
+
+
+class JobManager:
+    """Bounded in-process worker pool for extraction jobs; no external broker.
+
+    At most ``workers`` jobs run at once and at most ``max_queue`` more wait
+    for a worker. Beyond that ``submit`` raises QueueFullError so the API
+    can shed load instead of piling up work. Finished jobs are kept for
+    ``ttl_seconds`` so clients can collect their results.
+    """
+
+    def __init__(self, workers: int, max_queue: int, ttl_seconds: int) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sof-job")
+        self._capacity = workers + max_queue
+        self._ttl = ttl_seconds
+        self._jobs: Dict[str, Job] = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def submit(self, work: Callable[[Job], Dict[str, Any]], filename: str) -> Job:
+        """Queue ``work(job)``; its return value becomes the job result."""
+        job = Job(filename)
+        with self._lock:
+            self._expire()
+            if self._pending >= self._capacity:
+                raise QueueFullError(f"{self._pending} jobs pending")
+            self._pending += 1
+            self._jobs[job.id] = job
+        try:
+            self._executor.submit(self._run, job, work)
+        except RuntimeError:
+            with self._lock:
+                self._pending -= 1
+                self._jobs.pop(job.id, None)
+            raise
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            self._expire()
+            return self._jobs.get(job_id)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"pending": self._pending, "capacity": self._capacity, "tracked": len(self._jobs)}
+
+    def _run(self, job: Job, work: Callable[[Job], Dict[str, Any]]) -> None:
+        with job._lock:
+            job.status = "running"
+            job.started_at = time.time()
+        try:
+            result = work(job)
+        except Exception as exc:
+            with job._lock:
+                job.status = "failed"
+                job.error = str(exc) or type(exc).__name__
+                job.finished_at = time.time()
+        else:
+            with job._lock:
+                job.status = "done"
+                job.result = result
+                job.finished_at = time.time()
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def _expire(self) -> None:
+        """Forget finished jobs older than the TTL (lock held)."""
+        cutoff = time.time() - self._ttl
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+_manager: Optional[JobManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    """Return the process-wide job manager, created from config on first use."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            cfg = get_config()
+            _manager = JobManager(cfg["JOB_WORKERS"], cfg["JOB_QUEUE_DEPTH"], cfg["JOB_TTL_SECONDS"])
+        return _manager
@@ -0,0 +1,333 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.parsers.event_table import NO_TS, EventTable
+from app.parsers.timestamps import DAY, HOUR, parse_date, parse_timestamp, resolve_times
+
+
+DEFAULT_TERMS: Dict[str, Any] = {
+    "calendar": "SHINC",  # SHINC: Sundays/holidays count; SHEX: they are excepted
+    "excepted_weekdays": [6],  # Monday=0 .. Sunday=6, applied under SHEX
+    "holidays": [],  # "YYYY-MM-DD" dates excepted under SHEX
+    "working_keywords": ["cargo", "loading", "discharg", "unloading"],
+    "exclusion_keywords": ["rain", "weather", "stoppage", "breakdown", "strike", "shifting"],
+    "demurrage_rate": 0.0,  # per day
+    "despatch_rate": None,  # per day, defaults to half the demurrage rate
+    "once_on_demurrage": True,
+    "commenced": None,  # explicit laytime start, otherwise first working event
+    "completed": None,  # explicit laytime end, otherwise last working event
+    "start_date": None,  # "YYYY-MM-DD" for time-only events before any dated one
+}
+
+def event_intervals(events: Iterable[Dict[str, Any]], start_date: Optional[str] = None) -> List[Tuple[str, int, Optional[int]]]:
+    """``(name, start, end)`` epoch intervals, dropping events without a usable start."""
+    events = list(events)
+    return [
+        (str(event.get("name") or ""), start, end)
+        for event, (start, end) in zip(events, resolve_times(events, start_date))
+        if start is not None
+    ]
+
+
+def _merge_intervals(
+    voyage: np.ndarray, start: np.ndarray, end: np.ndarray, origin: np.ndarray, span: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Union overlapping intervals per voyage in one vectorized pass.
+
+    Times are shifted to ``voyage * span + (t - origin)`` so all voyages sit on
+    one monotonic axis and a single running maximum finds every merged run.
+    """
+    if len(start) == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty
+    order = np.lexsort((start, voyage))
+    voyage, start, end = voyage[order], start[order], end[order]
+    shift = voyage * span - origin[voyage]
+    s, e = start + shift, end + shift
+    running = np.maximum.accumulate(e)
+    new_run = np.empty(len(s), dtype=bool)
+    new_run[0] = True
+    new_run[1:] = s[1:] > running[:-1]
+    heads = np.flatnonzero(new_run)
+    merged_voyage = voyage[heads]
+    merged_start = s[heads] - shift[heads]
+    merged_end = np.maximum.reduceat(e, heads) - shift[heads]
+    return merged_voyage, merged_start, merged_end
+
+
+def laytime_arrays(
+    window_start: np.ndarray,
+    window_end: np.ndarray,
+    allowed: np.ndarray,
+    ex_voyage: np.ndarray,
+    ex_start: np.ndarray,
+    ex_end: np.ndarray,
+    once_on_demurrage: np.ndarray,
+) -> Dict[str, np.ndarray]:
+    """Core laytime arithmetic for many voyages at once, all times in seconds.
+
+    Voyage ``v`` counts time over ``[window_start[v], window_end[v])`` minus
+    the union of its exclusion intervals. With once-on-demurrage, exclusions
+    stop applying from the moment ``allowed[v]`` seconds have been used.
+    """
+    voyages = len(window_start)
+    duration = (window_end - window_start).astype(np.float64)
+
+    s = np.maximum(ex_start, window_start[ex_voyage])
+    e = np.minimum(ex_end, window_end[ex_voyage])
+    keep = e > s
+    span = int(duration.max()) + 1 if voyages else 1
+    seg_voyage, seg_start, seg_end = _merge_intervals(ex_voyage[keep], s[keep], e[keep], window_start, span)
+    seg_len = (seg_end - seg_start).astype(np.float64)
+
+    excluded = np.bincount(seg_voyage, weights=seg_len, minlength=voyages)
+    counted = duration - excluded
+
+    # Time counted when each exclusion segment begins, to find where laytime expires
+    excluded_before = np.cumsum(seg_len) - seg_len
+    first_seg = np.searchsorted(seg_voyage, np.arange(voyages))
+    base = np.zeros(voyages)
+    has_seg = first_seg < len(seg_voyage)
+    base[has_seg] = excluded_before[first_seg[has_seg]]
+    excluded_before -= base[seg_voyage]
+    counted_at_seg = (seg_start - window_start[seg_voyage]) - excluded_before
+
+    excluded_at_expiry = excluded.copy()
+    hits = np.flatnonzero(counted_at_seg >= allowed[seg_voyage])
+    if len(hits):
+        hit_voyage, first = np.unique(seg_voyage[hits], return_index=True)
+        excluded_at_expiry[hit_voyage] = excluded_before[hits[first]]
+    expiry = allowed + excluded_at_expiry  # seconds after window_start
+
+    over = counted > allowed
+    demurrage = np.where(
+        once_on_demurrage,
+        np.where(over, duration - expiry, 0.0),
+        np.maximum(counted - allowed, 0.0),
+    )
+    used = np.where(over & once_on_demurrage, allowed + demurrage, counted)
+    return {
+        "duration": duration,
+        "excluded": np.where(over & once_on_demurrage, excluded_at_expiry, excluded),
+        "used": used,
+        "demurrage": demurrage,
+        "saved": np.maximum(allowed - used, 0.0),
+        "on_demurrage": over,
+        "expiry": np.where(over, window_start + expiry, np.nan),
+    }
+
+
+def normalize_terms(raw: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Charter-party terms merged over ``DEFAULT_TERMS``; raises ValueError if invalid."""
+    terms = {**DEFAULT_TERMS, **(raw or {})}
+    if terms.get("allowed_hours") is None:
+        raise ValueError("terms.allowed_hours is required")
+    terms["allowed_hours"] = float(terms["allowed_hours"])
+    if terms["allowed_hours"] < 0:
+        raise ValueError("terms.allowed_hours must not be negative")
+    calendar = str(terms["calendar"]).upper()
+    if calendar not in ("SHINC", "SHEX"):
+        raise ValueError("terms.calendar must be SHINC or SHEX")
+    terms["calendar"] = calendar
+    terms["demurrage_rate"] = float(terms["demurrage_rate"] or 0.0)
+    if terms["despatch_rate"] is None:
+        terms["despatch_rate"] = terms["demurrage_rate"] / 2
+    terms["despatch_rate"] = float(terms["despatch_rate"])
+    return terms
+
+
+def matches_keywords(name: str, keywords: List[str]) -> bool:
+    """Case-insensitive substring match of an event name against term keywords."""
+    low = name.lower()
+    return any(k.lower() in low for k in keywords)
+
+
+def _type_mask(events: EventTable, keywords: List[str]) -> np.ndarray:
+    """Per-event keyword match, testing each distinct event name once."""
+    matched = np.array([matches_keywords(name, keywords) for name in events.types], dtype=bool)
+    return matched[events.type_codes()]
+
+
+def _voyage_window(
+    events: EventTable, starts: np.ndarray, ends: np.ndarray, terms: Dict[str, Any]
+) -> Tuple[int, int]:
+    """Laytime counting window: explicit terms first, else the span of working events."""
+    timed = starts != NO_TS
+    working = timed & _type_mask(events, terms["working_keywords"])
+    if not working.any():
+        working = timed
+    start = end = None
+    if working.any():
+        start = int(starts[working].min())
+        end = int(np.where(ends[working] != NO_TS, ends[working], starts[working]).max())
+    day_start = parse_date(terms["start_date"]) if terms.get("start_date") else None
+    if terms.get("commenced"):
+        start, _ = parse_timestamp(str(terms["commenced"]), day_start)
+    if terms.get("completed"):
+        end, _ = parse_timestamp(str(terms["completed"]), day_start)
+    if start is None or end is None:
+        raise ValueError("No timed events to derive the laytime window from")
+    if end < start:
+        raise ValueError("Laytime completes before it commences")
+    return start, end
+
+
+def _excepted_days(
+    voyage: np.ndarray, window_start: np.ndarray, window_end: np.ndarray, weekdays: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Whole excepted calendar days overlapping each SHEX window, vectorized.
+
+    ``weekdays`` is a (voyages, 7) boolean table of excepted weekdays.
+    """
+    first = window_start[voyage] // DAY
+    last = (window_end[voyage] - 1) // DAY
+    counts = np.maximum(last - first + 1, 0)
+    rep = np.repeat(voyage, counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    day = np.repeat(first, counts) + offsets
+    weekday = (day + 3) % 7  # 1970-01-01 was a Thursday
+    hit = weekdays[rep, weekday]
+    return rep[hit], day[hit] * DAY
+
+
+def _iso(ts: Optional[int]) -> Optional[str]:
+    if ts is None:
+        return None
+    return datetime.fromtimestamp(int(ts), tz=timezone.utc).strftime("%Y-%m-%dT%H:%M")
+
+
+def compute_laytime_batch(voyages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Laytime statements for many voyages in one vectorized calculation.
+
+    Each voyage is ``{"events": [...], "terms": {...}}`` with events as
+    produced by ``extract_events``. Voyages that cannot be calculated get
+    ``{"error": ...}`` in their slot instead of failing the whole batch.
+    """
+    results: List[Dict[str, Any]] = [{} for _ in voyages]
+    rows: List[int] = []
+    win_start: List[int] = []
+    win_end: List[int] = []
+    allowed: List[float] = []
+    ood: List[bool] = []
+    prepared: List[Dict[str, Any]] = []
+    # Exclusion intervals as one array chunk per voyage and source
+    ex_voyage: List[np.ndarray] = []
+    ex_start: List[np.ndarray] = []
+    ex_end: List[np.ndarray] = []
+    shex_rows: List[int] = []
+    weekday_table: List[List[bool]] = []
+
+    for index, voyage in enumerate(voyages):
+        try:
+            terms = normalize_terms(voyage.get("terms"))
+            # Times are always resolved from the raw stamps, as the terms' start_date may differ
+            events = EventTable.from_dicts(voyage.get("events") or [], timestamps=False)
+            starts, ends = events.timestamps(terms.get("start_date"))
+            start, end = _voyage_window(events, starts, ends, terms)
+            holidays = [parse_date(str(day)) for day in terms["holidays"]]
+        except (AttributeError, TypeError, ValueError) as exc:
+            results[index] = {"error": str(exc)}
+            continue
+
+        row = len(rows)
+        rows.append(index)
+        win_start.append(start)
+        win_end.append(end)
+        allowed.append(terms["allowed_hours"] * HOUR)
+        ood.append(bool(terms["once_on_demurrage"]))
+        used = int(np.count_nonzero(starts != NO_TS))
+        prepared.append({"terms": terms, "events_used": used, "events_skipped": len(events) - used})
+
+        excluded = (starts != NO_TS) & (ends != NO_TS) & _type_mask(events, terms["exclusion_keywords"])
+        ex_voyage.append(np.full(int(excluded.sum()), row, dtype=np.int64))
+        ex_start.append(starts[excluded])
+        ex_end.append(ends[excluded])
+        excepted = [False] * 7
+        if terms["calendar"] == "SHEX":
+            for weekday in terms["excepted_weekdays"]:
+                excepted[int(weekday) % 7] = True
+            shex_rows.append(row)
+            days = np.array(holidays, dtype=np.int64)
+            ex_voyage.append(np.full(len(days), row, dtype=np.int64))
+            ex_start.append(days)
+            ex_end.append(days + DAY)
+        weekday_table.append(excepted)
+
+    if not rows:
+        return results
+
+    window_start = np.array(win_start, dtype=np.int64)
+    window_end = np.array(win_end, dtype=np.int64)
+    voyage_ids = np.concatenate(ex_voyage)
+    starts = np.concatenate(ex_start)
+    ends = np.concatenate(ex_end)
+    if shex_rows:
+        day_voyage, day_start = _excepted_days(
+            np.array(shex_rows, dtype=np.int64), window_start, window_end, np.array(weekday_table, dtype=bool)
+        )
+        voyage_ids = np.concatenate([voyage_ids, day_voyage])
+        starts = np.concatenate([starts, day_start])
+        ends = np.concatenate([ends, day_start + DAY])
+
+    out = laytime_arrays(
+        window_start, window_end, np.array(allowed, dtype=np.float64),
+        voyage_ids, starts, ends, np.array(ood, dtype=bool),
+    )
+
+    seconds = {key: out[key].tolist() for key in ("excluded", "used", "demurrage", "saved", "expiry")}
+    for row, index in enumerate(rows):
+        info = prepared[row]
+        expiry = seconds["expiry"][row]
+        results[index] = build_statement(
+            info["terms"], int(window_start[row]), int(window_end[row]),
+            seconds["excluded"][row], seconds["used"][row], seconds["demurrage"][row], seconds["saved"][row],
+            None if np.isnan(expiry) else int(expiry), info["events_used"], info["events_skipped"],
+        )
+    return results
+
+
+def build_statement(
+    terms: Dict[str, Any],
+    window_start: int,
+    window_end: int,
+    excluded: float,
+    used: float,
+    demurrage: float,
+    saved: float,
+    expiry: Optional[int],
+    events_used: int,
+    events_skipped: int,
+) -> Dict[str, Any]:
+    """Laytime statement dict from per-voyage totals in seconds."""
+    demurrage_due = round(demurrage / DAY * terms["demurrage_rate"], 2)
+    despatch_due = round(saved / DAY * terms["despatch_rate"], 2)
+    return {
+        "commenced": _iso(window_start),
+        "completed": _iso(window_end),
+        "calendar": terms["calendar"],
+        "allowed_hours": round(terms["allowed_hours"], 4),
+        "elapsed_hours": round((window_end - window_start) / HOUR, 4),
+        "excluded_hours": round(excluded / HOUR, 4),
+        "time_used_hours": round(used / HOUR, 4),
+        "time_on_demurrage_hours": round(demurrage / HOUR, 4),
+        "time_saved_hours": round(saved / HOUR, 4),
+        "on_demurrage": expiry is not None,
+        "laytime_expired": _iso(expiry),
+        "demurrage_due": demurrage_due,
+        "despatch_due": despatch_due,
+        "net_due": round(demurrage_due - despatch_due, 2),
+        "events_used": events_used,
+        "events_skipped": events_skipped,
+    }
+
+
+def compute_laytime(events: List[Dict[str, Any]], terms: Dict[str, Any]) -> Dict[str, Any]:
+    """Laytime statement for a single voyage; raises ValueError if it cannot be computed."""
+    result = compute_laytime_batch([{"events": events, "terms": terms}])[0]
+    if "error" in result:
+        raise ValueError(result["error"])
+    return result
@@ -0,0 +1,420 @@
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import get_config
+from app.parsers.timestamps import DAY, HOUR, CarriedState, parse_date, parse_timestamp, resolve_event
+from app.services.laytime import build_statement, matches_keywords, normalize_terms
+
+
+EVENT_FIELDS = ("name", "start", "end")
+
+
+class _Coverage:
+    """Step function counting how many exclusion intervals cover each instant.
+
+    ``points`` are sorted breakpoints and ``counts[i]`` is the coverage on
+    ``[points[i], points[i + 1])``. Adding or removing an interval touches
+    only the breakpoints inside it, so updates cost O(log n + k).
+    """
+
+    def __init__(self) -> None:
+        self.points: List[int] = []
+        self.counts: List[int] = []
+
+    def _split(self, t: int) -> int:
+        i = bisect_left(self.points, t)
+        if i == len(self.points) or self.points[i] != t:
+            self.points.insert(i, t)
+            self.counts.insert(i, self.counts[i - 1] if i > 0 else 0)
+        return i
+
+    def _compact(self, i: int) -> None:
+        """Drop breakpoint ``i`` if it no longer changes the coverage."""
+        if 0 <= i < len(self.points):
+            left = self.counts[i - 1] if i > 0 else 0
+            if self.counts[i] == left:
+                del self.points[i]
+                del self.counts[i]
+
+    def add(self, start: int, end: int, step: int, lo: int, hi: int) -> int:
+        """Add ``step`` (+1/-1) coverage on [start, end); returns the change in
+        covered seconds inside [lo, hi)."""
+        if end <= start:
+            return 0
+        a, b = max(start, lo), min(end, hi)
+        before = self.covered(a, b)
+        i = self._split(start)
+        j = self._split(end)
+        for k in range(i, j):
+            self.counts[k] += step
+        self._compact(j)
+        self._compact(i)
+        return self.covered(a, b) - before
+
+    def covered(self, lo: int, hi: int) -> int:
+        """Seconds in [lo, hi) covered by at least one interval."""
+        if hi <= lo or not self.points:
+            return 0
+        total = 0
+        i = bisect_right(self.points, lo) - 1
+        t = lo
+        while t < hi:
+            nxt = self.points[i + 1] if i + 1 < len(self.points) else hi
+            nxt = min(nxt, hi)
+            if i >= 0 and self.counts[i] > 0:
+                total += nxt - t
+            t = nxt
+            i += 1
+        return total
+
+    def reach(self, lo: int, hi: int, amount: float) -> Optional[float]:
+        """Earliest instant after ``lo`` by which ``amount`` uncovered seconds have passed."""
+        if amount <= 0:
+            return lo
+        acc = 0.0
+        i = bisect_right(self.points, lo) - 1
+        t = lo
+        while t < hi:
+            nxt = self.points[i + 1] if i + 1 < len(self.points) else hi
+            nxt = min(nxt, hi)
+            if i < 0 or self.counts[i] == 0:
+                if acc + (nxt - t) >= amount:
+                    return t + (amount - acc)
+                acc += nxt - t
+            t = nxt
+            i += 1
+        return None
+
+
+class LaytimeSession:
+    """Server-side laytime state for one document that updates incrementally.
+
+    Keeps each event's resolved interval, sorted start/end indexes for the
+    laytime window and a coverage map of exclusions, plus the running
+    excluded total inside the window. Time-only stamps take their day from
+    the events before them, so each event also keeps the state it carries
+    forward; an edit re-resolves the following events only until that state
+    is what it was before the edit (usually at the next dated stamp). Only
+    events whose interval changed touch the indexes, and the laytime expiry
+    point is re-walked only when a change lands before it.
+    """
+
+    def __init__(self, document_id: str, events: List[Dict[str, Any]], terms: Dict[str, Any]) -> None:
+        self.document_id = document_id
+        self.terms = normalize_terms(terms)
+        self.touched_at = time.time()
+        self._lock = threading.Lock()
+        self._allowed = self.terms["allowed_hours"] * HOUR
+        self._start_date = parse_date(self.terms["start_date"]) if self.terms.get("start_date") else None
+        self._holidays = {parse_date(str(day)) for day in self.terms["holidays"]}
+        self._weekdays = {int(day) % 7 for day in self.terms["excepted_weekdays"]}
+        self._fixed_start = self._fixed(self.terms.get("commenced"))
+        self._fixed_end = self._fixed(self.terms.get("completed"))
+
+        self._events: Dict[str, Dict[str, Any]] = {}
+        self._times: Dict[str, Tuple[Optional[int], Optional[int]]] = {}
+        # State each event carries to the next, as in resolve_times
+        self._carried: Dict[str, CarriedState] = {}
+        self._order: List[str] = []
+        self._next_id = 1
+        self._coverage = _Coverage()
+        # Sorted starts and ends (end, or start when open) of working / all events
+        self._starts: Dict[str, List[int]] = {"working": [], "all": []}
+        self._ends: Dict[str, List[int]] = {"working": [], "all": []}
+        self._skipped = 0
+        self._window: Optional[Tuple[int, int]] = None
+        self._excluded = 0  # covered seconds inside the window
+        self._expiry: Optional[float] = None
+        self._expiry_stale = True
+
+        for event in events:
+            record = self._new_record(event)
+            self._order.append(record["id"])
+            self._events[record["id"]] = record
+            self._resolve(record["id"], self._incoming(len(self._order) - 1))
+        self._move_window()
+
+    def _fixed(self, value: Any) -> Optional[int]:
+        if not value:
+            return None
+        ts, _ = parse_timestamp(str(value), self._start_date)
+        if ts is None:
+            raise ValueError(f"Cannot parse laytime boundary {value!r}")
+        return ts
+
+    def _new_record(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        record = {key: event.get(key, "") for key in EVENT_FIELDS}
+        record.update({k: v for k, v in event.items() if k not in EVENT_FIELDS + ("id", "start_ts", "end_ts")})
+        record["id"] = str(self._next_id)
+        self._next_id += 1
+        return record
+
+    # --- public API -------------------------------------------------------
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            self.touched_at = time.time()
+            return {
+                "document_id": self.document_id,
+                "terms": self.terms,
+                "events": [self._events[event_id] for event_id in self._order],
+                "result": self._statement(),
+            }
+
+    def insert(self, event: Dict[str, Any], position: Optional[int] = None) -> Dict[str, Any]:
+        """Insert an event (appended by default); time-only stamps follow the events before it."""
+        with self._lock:
+            before = self._statement()
+            position = len(self._order) if position is None else max(0, min(int(position), len(self._order)))
+            record = self._new_record(event)
+            # Carried into the new event, and what the event after it saw before
+            previous = self._incoming(position)
+            self._order.insert(position, record["id"])
+            self._events[record["id"]] = record
+            self._resolve(record["id"], previous)
+            self._carry(position + 1, previous)
+            self._move_window()
+            return self._delta("insert", record, before)
+
+    def update(self, event_id: str, fields: Dict[str, Any]) -> Dict[str, Any]:
+        """Edit name/start/end of one event, re-resolving later events that take their day from it."""
+        with self._lock:
+            record = self._get(event_id)
+            before = self._statement()
+            self._index(event_id, -1)
+            for key in EVENT_FIELDS:
+                if key in fields:
+                    record[key] = fields[key]
+            position = self._order.index(event_id)
+            previous = self._carried[event_id]
+            self._resolve(event_id, self._incoming(position))
+            self._carry(position + 1, previous)
+            self._move_window()
+            return self._delta("update", record, before)
+
+    def delete(self, event_id: str) -> Dict[str, Any]:
+        with self._lock:
+            record = self._get(event_id)
+            before = self._statement()
+            self._index(event_id, -1)
+            position = self._order.index(event_id)
+            previous = self._carried.pop(event_id)
+            del self._order[position]
+            del self._events[event_id]
+            del self._times[event_id]
+            self._carry(position, previous)
+            self._move_window()
+            return self._delta("delete", record, before)
+
+    # --- incremental bookkeeping ------------------------------------------
+
+    def _get(self, event_id: str) -> Dict[str, Any]:
+        record = self._events.get(event_id)
+        if record is None:
+            raise KeyError(event_id)
+        return record
+
+    def _set_times(self, record: Dict[str, Any], times: Tuple[Optional[int], Optional[int]]) -> None:
+        self._times[record["id"]] = times
+        record["start_ts"], record["end_ts"] = times
+
+    def _incoming(self, position: int) -> CarriedState:
+        """State carried into the event at ``position``."""
+        return self._carried[self._order[position - 1]] if position > 0 else (self._start_date, None)
+
+    def _resolve(self, event_id: str, state: CarriedState) -> None:
+        """Resolve and index one event that is not indexed, from the state carried into it."""
+        times, self._carried[event_id] = resolve_event(self._events[event_id], state)
+        self._set_times(self._events[event_id], times)
+        self._index(event_id, +1)
+
+    def _carry(self, position: int, previous: CarriedState) -> None:
+        """Re-resolve events from ``position`` on until the carried state is ``previous``
+        again, the state the event at that point saw before the edit."""
+        state = self._incoming(position)
+        for event_id in self._order[position:]:
+            if state == previous:
+                return
+            previous = self._carried[event_id]
+            times, state = resolve_event(self._events[event_id], state)
+            self._carried[event_id] = state
+            if times != self._times[event_id]:
+                self._index(event_id, -1)
+                self._set_times(self._events[event_id], times)
+                self._index(event_id, +1)
+
+    def _index(self, event_id: str, step: int) -> None:
+        """Add (+1) or remove (-1) one event from the indexes and running totals."""
+        start, end = self._times[event_id]
+        if start is None:
+            self._skipped += step
+            return
+        name = str(self._events[event_id]["name"] or "")
+        close = end if end is not None else start
+        groups = ["all"]
+        if matches_keywords(name, self.terms["working_keywords"]):
+            groups.append("working")
+        for group in groups:
+            if step > 0:
+                insort(self._starts[group], start)
+                insort(self._ends[group], close)
+            else:
+                del self._starts[group][bisect_left(self._starts[group], start)]
+                del self._ends[group][bisect_left(self._ends[group], close)]
+        if end is not None and matches_keywords(name, self.terms["exclusion_keywords"]):
+            self._cover(start, end, step)
+            self._invalidate(start)
+
+    def _cover(self, start: int, end: int, step: int) -> None:
+        lo, hi = self._window if self._window else (0, 0)
+        self._excluded += self._coverage.add(start, end, step, lo, hi)
+
+    def _invalidate(self, since: int) -> None:
+        if self._expiry is None or since < self._expiry:
+            self._expiry_stale = True
+
+    def _target_window(self) -> Optional[Tuple[int, int]]:
+        group = "working" if self._starts["working"] else "all"
+        start = self._fixed_start if self._fixed_start is not None else (
+            self._starts[group][0] if self._starts[group] else None)
+        end = self._fixed_end if self._fixed_end is not None else (
+            self._ends[group][-1] if self._ends[group] else None)
+        if start is None or end is None or end < start:
+            return None
+        return start, end
+
+    def _move_window(self) -> None:
+        """Shift the window to its new edges, adjusting totals for the edge ranges only."""
+        new = self._target_window()
+        old = self._window
+        if new == old:
+            return
+        coverage = self._coverage
+        if old is None or new is None or new[0] >= old[1] or old[0] >= new[1]:
+            self._excluded = coverage.covered(*new) if new else 0
+        else:
+            (a, b), (c, d) = old, new
+            self._excluded += (coverage.covered(c, a) - coverage.covered(a, c)
+                               + coverage.covered(b, d) - coverage.covered(d, b))
+        self._window = new
+        if self.terms["calendar"] == "SHEX":
+            self._sync_excepted_days(old, new)
+        if old is None or new is None or old[0] != new[0]:
+            # Expiry is measured from the window start
+            self._expiry_stale = True
+
+    def _day_range(self, window: Optional[Tuple[int, int]]) -> range:
+        if window is None:
+            return range(0)
+        start, end = window
+        return range(start // DAY, max(start, end - 1) // DAY + 1)
+
+    def _excepted(self, day: int) -> bool:
+        return (day + 3) % 7 in self._weekdays or day * DAY in self._holidays
+
+    def _sync_excepted_days(self, old: Optional[Tuple[int, int]], new: Optional[Tuple[int, int]]) -> None:
+        """Cover excepted SHEX days the window newly spans and uncover ones it left."""
+        old_days, new_days = self._day_range(old), self._day_range(new)
+        for day in old_days:
+            if day not in new_days and self._excepted(day):
+                self._cover(day * DAY, (day + 1) * DAY, -1)
+        for day in new_days:
+            if day not in old_days and self._excepted(day):
+                self._cover(day * DAY, (day + 1) * DAY, +1)
+
+    # --- results ----------------------------------------------------------
+
+    def _statement(self) -> Dict[str, Any]:
+        if self._window is None:
+            return {"error": "No timed events to derive the laytime window from"}
+        start, end = self._window
+        duration = end - start
+        counted = duration - self._excluded
+        allowed = self._allowed
+        expiry = None
+        excluded, used, demurrage = float(self._excluded), float(counted), 0.0
+        if counted > allowed:
+            if self._expiry_stale:
+                self._expiry = self._coverage.reach(start, end, allowed)
+                self._expiry_stale = False
+            expiry = self._expiry
+            if self.terms["once_on_demurrage"]:
+                excluded = (expiry - start) - allowed
+                demurrage = end - expiry
+                used = allowed + demurrage
+            else:
+                demurrage = counted - allowed
+        else:
+            self._expiry = None
+            self._expiry_stale = True
+        return build_statement(
+            self.terms, start, end, excluded, used, demurrage, max(allowed - used, 0.0),
+            None if expiry is None else int(expiry), len(self._times) - self._skipped, self._skipped,
+        )
+
+    def _delta(self, action: str, record: Dict[str, Any], before: Dict[str, Any]) -> Dict[str, Any]:
+        after = self._statement()
+        self.touched_at = time.time()
+        changes = {
+            key: {"from": before.get(key), "to": value}
+            for key, value in after.items() if before.get(key) != value
+        }
+        return {"action": action, "event": record, "changes": changes}
+
+
+class LaytimeSessionStore:
+    """Sessions keyed by document id, least recently used evicted past ``max_sessions``."""
+
+    def __init__(self, max_sessions: int, ttl_seconds: int) -> None:
+        self._max = max_sessions
+        self._ttl = ttl_seconds
+        self._sessions: "OrderedDict[str, LaytimeSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def open(self, document_id: str, events: List[Dict[str, Any]], terms: Dict[str, Any]) -> LaytimeSession:
+        """Create (or replace) the session for a document."""
+        session = LaytimeSession(document_id, events, terms)
+        with self._lock:
+            self._expire()
+            self._sessions.pop(document_id, None)
+            self._sessions[document_id] = session
+            while len(self._sessions) > self._max:
+                self._sessions.popitem(last=False)
+        return session
+
+    def get(self, document_id: str) -> Optional[LaytimeSession]:
+        with self._lock:
+            self._expire()
+            session = self._sessions.get(document_id)
+            if session is not None:
+                self._sessions.move_to_end(document_id)
+            return session
+
+    def close(self, document_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(document_id, None) is not None
+
+    def _expire(self) -> None:
+        """Drop sessions idle longer than the TTL (lock held)."""
+        cutoff = time.time() - self._ttl
+        for document_id in [d for d, s in self._sessions.items() if s.touched_at < cutoff]:
+            del self._sessions[document_id]
+
+
+_store: Optional[LaytimeSessionStore] = None
+_store_lock = threading.Lock()
+
+
+def get_laytime_sessions() -> LaytimeSessionStore:
+    """Return the process-wide session store, created from config on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            cfg = get_config()
+            _store = LaytimeSessionStore(cfg["LAYTIME_MAX_SESSIONS"], cfg["LAYTIME_SESSION_TTL_SECONDS"])
+        return _store
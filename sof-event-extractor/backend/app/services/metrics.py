@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app.config import get_config
+
+
+# Upper bounds in seconds; a page can take anywhere from a millisecond (text
+# layer) to tens of seconds (high-DPI OCR)
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+METRIC_HELP = {
+    "sof_stage_seconds": ("histogram", "Time spent per pipeline stage invocation."),
+    "sof_pages_total": ("counter", "Document pages extracted, by extraction method."),
+    "sof_bytes_processed_total": ("counter", "Document bytes extracted, by file format."),
+    "sof_documents_total": ("counter", "Documents extracted, by file format."),
+    "sof_events_extracted_total": ("counter", "Events found by the parser."),
+    "sof_cache_lookups_total": ("counter", "Result cache lookups, by namespace and hit or miss."),
+    "sof_page_cache_lookups_total": ("counter", "Page OCR cache lookups, by hit or miss."),
+    "sof_ocr_tier_total": ("counter", "OCR'd pages by the quality-ladder tier whose text was kept."),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class MetricsRegistry:
+    """In-process counters and histograms rendered in Prometheus text format.
+
+    Metrics are per process: with several gunicorn workers each serves its
+    own numbers, which Prometheus sums across scrape targets.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = STAGE_BUCKETS) -> None:
+        self._buckets = buckets
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        # name -> labels -> [per-bucket counts..., +Inf count, sum]
+        self._histograms: Dict[str, Dict[Labels, List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + amount
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            slots = series.get(key)
+            if slots is None:
+                slots = series[key] = [0.0] * (len(self._buckets) + 2)
+            for i, bound in enumerate(self._buckets):
+                if value <= bound:
+                    slots[i] += 1
+                    break
+            else:
+                slots[len(self._buckets)] += 1
+            slots[-1] += value
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render(self) -> str:
+        """Prometheus text exposition format 0.0.4."""
+        lines: List[str] = []
+        with self._lock:
+            for name in sorted(self._counters):
+                self._header(lines, name, "counter")
+                for labels, value in sorted(self._counters[name].items()):
+                    lines.append(f"{name}{_labels(labels)} {value:g}")
+            for name in sorted(self._histograms):
+                self._header(lines, name, "histogram")
+                for labels, slots in sorted(self._histograms[name].items()):
+                    cumulative = 0.0
+                    for bound, count in zip(self._buckets, slots):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_labels(labels + (('le', f'{bound:g}'),))} {cumulative:g}")
+                    cumulative += slots[len(self._buckets)]
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', '+Inf'),))} {cumulative:g}")
+                    lines.append(f"{name}_sum{_labels(labels)} {slots[-1]:.6f}")
+                    lines.append(f"{name}_count{_labels(labels)} {cumulative:g}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _header(lines: List[str], name: str, kind: str) -> None:
+        kind, text = METRIC_HELP.get(name, (kind, name))
+        lines.append(f"# HELP {name} {text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+_registry = MetricsRegistry()
+# Stage totals for the request being handled, when it asked for a breakdown
+_request_stages: ContextVar[Optional[Dict[str, float]]] = ContextVar("sof_request_stages", default=None)
+
+
+def get_metrics() -> MetricsRegistry:
+    return _registry
+
+
+def metrics_enabled() -> bool:
+    return get_config()["METRICS_ENABLED"]
+
+
+def count(name: str, amount: float = 1.0, **labels: str) -> None:
+    if metrics_enabled():
+        _registry.inc(name, amount, **labels)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a pipeline stage into ``sof_stage_seconds`` and the current request breakdown."""
+    stages = _request_stages.get()
+    if stages is None and not metrics_enabled():
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        if stages is not None:
+            stages[name] = stages.get(name, 0.0) + elapsed
+        if metrics_enabled():
+            _registry.observe("sof_stage_seconds", elapsed, stage=name)
+
+
+@contextmanager
+def request_timings() -> Iterator[Dict[str, float]]:
+    """Collect per-stage seconds for work done on this thread inside the block.
+
+    Work handed to other threads or processes (background blob uploads, the
+    OCR process pool's workers) is timed where it is waited on, if at all.
+    """
+    stages: Dict[str, float] = {}
+    token = _request_stages.set(stages)
+    try:
+        yield stages
+    finally:
+        _request_stages.reset(token)
@@ -1,18 +1,255 @@
 from __future__ import annotations
 
+import importlib.util
 import io
+import json
+import multiprocessing
 import os
-from typing import List, Optional
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import TYPE_CHECKING, Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
 
-import pytesseract
-from pdf2image import convert_from_bytes
-from PIL import Image, ImageEnhance, ImageFilter
+from app.config import get_config
+from app.services.metrics import count, stage
+from app.services.page_cache import get_page_cache
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+# Heavy imports (pytesseract, pdf2image, PyMuPDF, Pillow, NumPy) are deferred
+# to first use so app startup does not pay for formats it may never see.
+# PyMuPDF reads embedded text layers; find_spec checks for it without importing.
+HAS_FITZ = importlib.util.find_spec("fitz") is not None
+
+
+OCR_PSM = 6  # Assume uniform block of text
+TESSERACT_CONFIG = f'--psm {OCR_PSM}'
+PDF_DPI = 300
+PREPROCESS_PARAMS = {"contrast": 2.0, "blur_radius": 0.5, "sharpness": 1.5}
+
+
+class OCRBackend:
+    """Engine that turns one in-memory page image into text."""
+
+    name = "base"
+
+    def image_to_string(self, image: Image.Image, psm: int = OCR_PSM) -> str:
+        raise NotImplementedError
+
+    def image_to_text_with_confidence(self, image: Image.Image, psm: int = OCR_PSM) -> Tuple[str, float]:
+        """Text plus mean word confidence (0-100) from a single recognition pass."""
+        raise NotImplementedError
+
+
+class PytesseractBackend(OCRBackend):
+    """Runs the tesseract CLI per call: portable, but each call spawns a process,
+    writes temp image files and reloads the language model."""
+
+    name = "pytesseract"
+
+    def image_to_string(self, image: Image.Image, psm: int = OCR_PSM) -> str:
+        import pytesseract
+
+        return pytesseract.image_to_string(image, config=f'--psm {psm}')
+
+    def image_to_text_with_confidence(self, image: Image.Image, psm: int = OCR_PSM) -> Tuple[str, float]:
+        import pytesseract
+
+        # One tesseract run: the TSV output carries both words and confidences
+        data = pytesseract.image_to_data(image, config=f'--psm {psm}', output_type=pytesseract.Output.DICT)
+        return _words_to_text(data)
+
+
+class TesserocrBackend(OCRBackend):
+    """Long-lived in-process engine through tesserocr's C-API binding.
+
+    Each thread keeps its own PyTessBaseAPI (the API is not thread-safe), so
+    the language model is loaded once per thread and pages are handed over
+    as in-memory images without temp files.
+    """
+
+    name = "tesserocr"
+
+    def __init__(self, lang: str = "eng", tessdata: Optional[str] = None) -> None:
+        import tesserocr  # optional dependency, needs libtesseract
+
+        self._tesserocr = tesserocr
+        self._lang = lang
+        self._tessdata = tessdata
+        self._local = threading.local()
+
+    def _api(self):
+        api = getattr(self._local, "api", None)
+        if api is None:
+            kwargs = {"lang": self._lang}
+            if self._tessdata:
+                kwargs["path"] = self._tessdata
+            api = self._tesserocr.PyTessBaseAPI(**kwargs)
+            self._local.api = api
+        return api
+
+    def image_to_string(self, image: Image.Image, psm: int = OCR_PSM) -> str:
+        api = self._api()
+        api.SetPageSegMode(self._tesserocr.PSM(psm))
+        api.SetImage(image)
+        try:
+            return api.GetUTF8Text()
+        finally:
+            api.Clear()
+
+    def image_to_text_with_confidence(self, image: Image.Image, psm: int = OCR_PSM) -> Tuple[str, float]:
+        api = self._api()
+        api.SetPageSegMode(self._tesserocr.PSM(psm))
+        api.SetImage(image)
+        try:
+            return api.GetUTF8Text(), float(api.MeanTextConf())
+        finally:
+            api.Clear()
+
+
+def _words_to_text(data: Dict[str, List[Any]]) -> Tuple[str, float]:
+    """Rebuild Tesseract's plain-text layout from ``image_to_data`` rows.
+
+    Words on a line are joined by spaces, lines by newlines and paragraphs
+    by a blank line, as in Tesseract's text output. Confidence is the mean
+    over recognised words.
+    """
+    lines: Dict[Tuple[int, int, int], List[str]] = {}
+    confidences: List[float] = []
+    for block, par, line, word, conf in zip(
+        data["block_num"], data["par_num"], data["line_num"], data["text"], data["conf"]
+    ):
+        conf = float(conf)
+        if conf < 0 or not str(word).strip():
+            continue
+        lines.setdefault((block, par, line), []).append(str(word))
+        confidences.append(conf)
+    text = ""
+    previous = None
+    for (block, par, _), words in lines.items():
+        if previous is not None:
+            text += "\n" if (block, par) == previous else "\n\n"
+        text += " ".join(words)
+        previous = (block, par)
+    return text + "\n" if text else "", (sum(confidences) / len(confidences) if confidences else 0.0)
+
+
+_backends: Dict[str, OCRBackend] = {}
+_backends_lock = threading.Lock()
+
+
+def get_ocr_backend(name: Optional[str] = None) -> OCRBackend:
+    """Return the process-wide OCR backend selected by ``OCR_BACKEND``.
+
+    ``auto`` prefers the persistent tesserocr engine and falls back to
+    pytesseract when tesserocr (or libtesseract) is not installed.
+    """
+    cfg = get_config()
+    name = name or cfg["OCR_BACKEND"]
+    with _backends_lock:
+        backend = _backends.get(name)
+        if backend is None:
+            if name in ("auto", "tesserocr"):
+                try:
+                    backend = TesserocrBackend(cfg["OCR_LANG"], cfg["OCR_TESSDATA"])
+                except (ImportError, RuntimeError) as e:
+                    if name == "tesserocr":
+                        print(f"tesserocr unavailable, falling back to pytesseract: {e}")
+                    backend = PytesseractBackend()
+            elif name == "pytesseract":
+                backend = PytesseractBackend()
+            else:
+                raise ValueError(f"Unknown OCR backend: {name}")
+            _backends[name] = backend
+        return backend
+
+
+# Process pool shared by all OCRService instances, created on first parallel run
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_key: Optional[Tuple[int, str]] = None
+_pool_lock = threading.Lock()
+
+
+def _init_ocr_worker(tesseract_cmd: str, backend_name: str) -> None:
+    """Process pool initializer: carry the Tesseract setup into spawned workers
+    and load the engine once per worker."""
+    import pytesseract
+
+    pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+    get_ocr_backend(backend_name)
+
+
+def _ocr_page_worker(
+    image: Image.Image, backend_name: str, psm: int = OCR_PSM, with_confidence: bool = False
+) -> str | Tuple[str, float]:
+    """Run Tesseract on one preprocessed page inside a pool worker."""
+    backend = get_ocr_backend(backend_name)
+    if with_confidence:
+        return backend.image_to_text_with_confidence(image, psm)
+    return backend.image_to_string(image, psm)
+
+
+def _get_pool(workers: int, backend_name: str) -> ProcessPoolExecutor:
+    import pytesseract
+
+    global _pool, _pool_key
+    with _pool_lock:
+        if _pool is None or _pool_key != (workers, backend_name):
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            # spawn keeps workers safe to start from threaded Flask handlers
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_ocr_worker,
+                initargs=(pytesseract.pytesseract.tesseract_cmd, backend_name),
+            )
+            _pool_key = (workers, backend_name)
+        return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a broken pool so the next parallel run starts fresh workers."""
+    global _pool, _pool_key
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+            _pool_key = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def convert_from_path(*args: Any, **kwargs: Any) -> List[Image.Image]:
+    from pdf2image import convert_from_path as convert
+
+    return convert(*args, **kwargs)
+
+
+def pdfinfo_from_path(*args: Any, **kwargs: Any) -> Dict[str, Any]:
+    from pdf2image import pdfinfo_from_path as pdfinfo
+
+    return pdfinfo(*args, **kwargs)
+
+
+def join_pages(pages: List[Dict[str, Any]]) -> str:
+    """Assemble per-page results into the `--- Page N ---` text layout."""
+    extracted_text = ""
+    for page in pages:
+        extracted_text += f"\n--- Page {page['page']} ---\n{page['text']}\n"
+    return extracted_text.strip()
 
 
 class OCRService:
     """Tesseract OCR service for extracting text from PDFs and images."""
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        page_window: Optional[int] = None,
+        use_text_layer: Optional[bool] = None,
+        use_page_cache: bool = True,
+    ) -> None:
         # Configure Tesseract path if needed (Windows)
         if os.name == 'nt':  # Windows
             # Common Tesseract installation paths on Windows
@@ -22,66 +259,408 @@ class OCRService:
             ]
             for path in possible_paths:
                 if os.path.exists(path):
+                    import pytesseract
+
                     pytesseract.pytesseract.tesseract_cmd = path
                     break
 
+        cfg = get_config()
+        if workers is None:
+            workers = cfg["OCR_WORKERS"]
+        if page_window is None:
+            page_window = cfg["OCR_PAGE_WINDOW"]
+        if use_text_layer is None:
+            use_text_layer = cfg["PDF_TEXT_LAYER"]
+        self.workers = max(1, workers)
+        # Peak memory is bounded by this many rendered pages, not by page count
+        self.page_window = page_window if page_window > 0 else self.workers
+        # Born-digital pages are read from the PDF text layer instead of OCR'd
+        self.use_text_layer = use_text_layer and HAS_FITZ
+        self.text_layer_min_chars = cfg["PDF_TEXT_MIN_CHARS"]
+        self.backend = get_ocr_backend()
+        self.preprocess = cfg["OCR_PREPROCESS"]
+        self.binarize = cfg["OCR_BINARIZE"]
+        self.deskew = cfg["OCR_DESKEW"]
+        # Render resolution is picked per document from a low-DPI probe page
+        self.adaptive_dpi = cfg["OCR_ADAPTIVE_DPI"]
+        self.min_dpi = cfg["OCR_MIN_DPI"]
+        self.max_dpi = cfg["OCR_MAX_DPI"]
+        # Quality ladder: fast low-DPI pass, then full DPI and another PSM only
+        # for pages whose confidence + parser-hit score is below the threshold
+        self.ladder = cfg["OCR_LADDER"]
+        self.fast_dpi = cfg["OCR_LADDER_FAST_DPI"]
+        self.min_score = cfg["OCR_LADDER_MIN_SCORE"]
+        self.hit_bonus = cfg["OCR_LADDER_HIT_BONUS"]
+        self.alt_psm = cfg["OCR_LADDER_ALT_PSM"]
+        # Pages matching one OCR'd before (recurring templates) reuse its text
+        self.page_cache = get_page_cache() if use_page_cache else None
+        self._page_settings = json.dumps(
+            {
+                "engine": self.backend.name,
+                "lang": cfg["OCR_LANG"],
+                "tesseract": TESSERACT_CONFIG,
+                "ladder": OCRService._ladder_settings(cfg),
+            },
+            sort_keys=True,
+        )
+        # Per-page failures from the last PDF run: [{"page": n, "error": "..."}].
+        # Shared instances should read errors from the returned pages instead.
+        self.page_errors: List[Dict[str, Any]] = []
+
+    @staticmethod
+    def cache_settings() -> Dict[str, Any]:
+        """Settings that change OCR output; part of the result cache key."""
+        cfg = get_config()
+        return {
+            "dpi": [cfg["OCR_MIN_DPI"], cfg["OCR_MAX_DPI"]] if cfg["OCR_ADAPTIVE_DPI"] else PDF_DPI,
+            "tesseract": TESSERACT_CONFIG,
+            "engine": get_ocr_backend().name,
+            "preprocess": {
+                **PREPROCESS_PARAMS,
+                "pipeline": cfg["OCR_PREPROCESS"],
+                "binarize": cfg["OCR_BINARIZE"],
+                "deskew": cfg["OCR_DESKEW"],
+            },
+            "text_layer": bool(cfg["PDF_TEXT_LAYER"] and HAS_FITZ),
+            "text_layer_min_chars": cfg["PDF_TEXT_MIN_CHARS"],
+            "ladder": OCRService._ladder_settings(cfg),
+        }
+
+    @staticmethod
+    def _ladder_settings(cfg: Dict[str, Any]) -> Any:
+        if not cfg["OCR_LADDER"]:
+            return False
+        return {
+            "fast_dpi": cfg["OCR_LADDER_FAST_DPI"],
+            "min_score": cfg["OCR_LADDER_MIN_SCORE"],
+            "hit_bonus": cfg["OCR_LADDER_HIT_BONUS"],
+            "alt_psm": cfg["OCR_LADDER_ALT_PSM"],
+        }
+
     def extract_text_from_pdf(self, pdf_bytes: bytes) -> str:
-        """Convert PDF to images and extract text using Tesseract OCR."""
+        """Extract PDF text, reading embedded text layers and OCR'ing the rest."""
         try:
-            # Convert PDF pages to images
-            images = convert_from_bytes(pdf_bytes, dpi=300)
-            
-            extracted_text = ""
-            for i, image in enumerate(images):
-                # Preprocess image for better OCR
-                processed_image = self._preprocess_image(image)
-                
-                # Extract text from the processed image
-                page_text = pytesseract.image_to_string(
-                    processed_image, 
-                    config='--psm 6'  # Assume uniform block of text
-                )
-                extracted_text += f"\n--- Page {i+1} ---\n{page_text}\n"
-            
-            return extracted_text.strip()
+            return join_pages(self.extract_pages_from_pdf(pdf_bytes))
         except Exception as e:
             print(f"OCR extraction failed: {e}")
             return ""
 
-    def extract_text_from_image(self, image_bytes: bytes) -> str:
-        """Extract text from image bytes using Tesseract OCR."""
+    def extract_pages_from_pdf(
+        self, pdf_bytes: bytes, progress: Optional[Callable[[int, int], None]] = None
+    ) -> List[Dict[str, Any]]:
+        """``extract_pages_from_pdf_path`` for a PDF held in memory."""
+        fd, pdf_path = tempfile.mkstemp(suffix=".pdf")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(pdf_bytes)
+            return self.extract_pages_from_pdf_path(pdf_path, progress)
+        finally:
+            os.remove(pdf_path)
+
+    def extract_pages_from_pdf_path(
+        self, pdf_path: str, progress: Optional[Callable[[int, int], None]] = None
+    ) -> List[Dict[str, Any]]:
+        """Extract every page of a PDF file and return per-page results in page order.
+
+        Each entry is ``{"page": n, "text": str, "method": str, "error": str | None}``
+        where ``method`` is ``"text_layer"`` for pages read from an embedded
+        text layer, ``"ocr"`` for image-only pages sent to Tesseract and
+        ``"ocr_cache"`` for pages matched in the page OCR cache. OCR'd pages
+        also carry ``tier`` (``"fast"``, ``"standard"``, ``"alt_psm"`` or
+        ``"cache"``) and the word ``confidence`` of the text kept. A page
+        that fails OCR keeps its slot with empty text so the rest of the
+        document survives; failures are also collected in ``page_errors``.
+        ``progress(pages_done, pages_total)`` is called as pages complete.
+
+        The text layer and pdftoppm both read ``pdf_path`` directly, so a
+        spooled upload is never loaded into memory as a whole.
+        """
+        self.page_errors = []
+        pages = None
+        if self.use_text_layer:
+            with stage("text_layer"):
+                pages = self._read_text_layer(pdf_path)
+        if pages is not None:
+            ocr_numbers = [page["page"] for page in pages if page["method"] == "ocr"]
+            if progress is not None:
+                progress(len(pages) - len(ocr_numbers), len(pages))
+            if not ocr_numbers:
+                return pages
+
+        if pages is None:
+            page_count = int(pdfinfo_from_path(pdf_path)["Pages"])
+            pages = [
+                {"page": n, "text": "", "method": "ocr", "error": None}
+                for n in range(1, page_count + 1)
+            ]
+            ocr_numbers = [page["page"] for page in pages]
+            if progress is not None:
+                progress(0, page_count)
+
+        by_number = {page["page"]: page for page in pages}
+        done = len(pages) - len(ocr_numbers)
+        dpi = self._render_dpi(pdf_path, ocr_numbers[0])
+        first_dpi = min(self.fast_dpi, dpi) if self.ladder else dpi
+        # Each window is a single pdftoppm call over a page range
+        for numbers, window in self._iter_page_windows(pdf_path, ocr_numbers, first_dpi):
+            # Preprocess the rendered window, then let the raw renders go
+            with stage("preprocess"):
+                processed = [self._preprocess_image(image) for image in window]
+            window.clear()
+
+            rerender = None
+            if first_dpi < dpi:
+                def rerender(indexes: List[int], numbers: List[int] = numbers) -> List[Image.Image]:
+                    rendered: List[Image.Image] = []
+                    for _, images in self._iter_page_windows(pdf_path, [numbers[i] for i in indexes], dpi):
+                        with stage("preprocess"):
+                            rendered.extend(self._preprocess_image(image) for image in images)
+                    return rendered
+
+            results = self._ocr_images(processed, rerender)
+            del processed
+
+            for page_no, result in zip(numbers, results):
+                page = by_number[page_no]
+                page.update(result)
+                if page["error"]:
+                    self.page_errors.append({"page": page_no, "error": page["error"]})
+                    print(f"OCR failed on page {page_no}: {page['error']}")
+            done += len(numbers)
+            if progress is not None:
+                progress(done, len(pages))
+        return pages
+
+    def _read_text_layer(self, pdf_path: str) -> Optional[List[Dict[str, Any]]]:
+        """Read embedded text per page; pages without usable text are marked for OCR.
+
+        Returns None when PyMuPDF cannot open the document so the caller
+        falls back to OCR for every page.
+        """
+        try:
+            import fitz
+
+            doc = fitz.open(pdf_path, filetype="pdf")
+        except Exception as e:
+            print(f"Text layer read failed, using OCR: {e}")
+            return None
+
+        pages = []
+        with doc:
+            for index, pdf_page in enumerate(doc):
+                text = pdf_page.get_text("text")
+                if self._has_usable_text(text):
+                    pages.append({"page": index + 1, "text": text.strip(), "method": "text_layer", "error": None})
+                else:
+                    pages.append({"page": index + 1, "text": "", "method": "ocr", "error": None})
+        return pages
+
+    def _has_usable_text(self, text: str) -> bool:
+        """Heuristic: enough alphanumerics, and mostly real characters rather than glyph noise."""
+        stripped = "".join(text.split())
+        if not stripped:
+            return False
+        alnum = sum(1 for ch in stripped if ch.isalnum())
+        return alnum >= self.text_layer_min_chars and alnum / len(stripped) >= 0.5
+
+    def _render_dpi(self, pdf_path: str, page_no: int) -> int:
+        """Render DPI for a document, sized from the text height on a probe page."""
+        if not self.adaptive_dpi:
+            return PDF_DPI
+        from app.services.image_preprocess import PROBE_DPI, choose_dpi
+
+        try:
+            with stage("dpi_probe"):
+                probe = convert_from_path(
+                    pdf_path, dpi=PROBE_DPI, first_page=page_no, last_page=page_no, grayscale=True
+                )
+        except Exception as e:
+            print(f"DPI probe failed, using {PDF_DPI} DPI: {e}")
+            return PDF_DPI
+        if not probe:
+            return PDF_DPI
+        return choose_dpi(probe[0], PROBE_DPI, self.min_dpi, self.max_dpi, PDF_DPI)
+
+    def _iter_page_windows(
+        self, pdf_path: str, page_numbers: List[int], dpi: int = PDF_DPI
+    ) -> Iterator[Tuple[List[int], List[Image.Image]]]:
+        """Render the requested pages at most ``page_window`` at a time.
+
+        Yields ``(page_numbers, images)`` for runs of consecutive pages, so
+        only one window of rendered pages is alive at any point.
+        """
+        window: List[int] = []
+        for page_no in page_numbers:
+            if window and (page_no != window[-1] + 1 or len(window) >= self.page_window):
+                yield window, self._rasterize(pdf_path, dpi, window)
+                window = []
+            window.append(page_no)
+        if window:
+            yield window, self._rasterize(pdf_path, dpi, window)
+
+    @staticmethod
+    def _rasterize(pdf_path: str, dpi: int, page_numbers: List[int]) -> List[Image.Image]:
+        with stage("rasterize"):
+            return convert_from_path(pdf_path, dpi=dpi, first_page=page_numbers[0], last_page=page_numbers[-1])
+
+    def extract_text_from_image(self, image_bytes: bytes | BinaryIO) -> str:
+        """Extract text from image bytes (or an open image file) using Tesseract OCR."""
+        return self.extract_page_from_image(image_bytes)["text"]
+
+    def extract_page_from_image(self, image_bytes: bytes | BinaryIO) -> Dict[str, Any]:
+        """OCR an image as one page: ``{"text", "method", "tier", "confidence", "error"}``.
+
+        Images are OCR'd at their own resolution, so the ladder can only
+        escalate them to the alternative PSM.
+        """
+        from PIL import Image
+
         try:
             # Convert bytes to PIL Image
-            image = Image.open(io.BytesIO(image_bytes))
+            with stage("decode"):
+                if isinstance(image_bytes, (bytes, bytearray)):
+                    image_bytes = io.BytesIO(image_bytes)
+                image = Image.open(image_bytes)
+                image.load()
             
             # Preprocess image
-            processed_image = self._preprocess_image(image)
+            with stage("preprocess"):
+                processed_image = self._preprocess_image(image)
             
             # Extract text
-            text = pytesseract.image_to_string(
-                processed_image, 
-                config='--psm 6'
-            )
-            return text.strip()
+            page = self._ocr_images([processed_image])[0]
         except Exception as e:
-            print(f"Image OCR extraction failed: {e}")
-            return ""
+            page = self._page_result(e, "standard")
+        if page["error"]:
+            print(f"Image OCR extraction failed: {page['error']}")
+        page["text"] = page["text"].strip()
+        return page
+
+    def _ocr_images(
+        self,
+        images: List[Image.Image],
+        rerender: Optional[Callable[[List[int]], List[Image.Image]]] = None,
+    ) -> List[Dict[str, Any]]:
+        """OCR preprocessed pages through the page cache and the quality ladder.
+
+        Returns ``{"text", "method", "tier", "confidence", "error"}`` per page.
+        ``rerender(indexes)`` gives full-DPI preprocessed images for those
+        pages when ``images`` came from the fast low-DPI pass.
+        """
+        results: List[Any] = [None] * len(images)
+        keys: List[Any] = [None] * len(images)
+        if self.page_cache is not None:
+            with stage("page_cache"):
+                for i, image in enumerate(images):
+                    keys[i] = self.page_cache.key(image, self._page_settings)
+                    text = self.page_cache.get(keys[i])
+                    if text is not None:
+                        results[i] = {"text": text, "method": "ocr_cache", "tier": "cache", "confidence": None, "error": None}
+        misses = [i for i, result in enumerate(results) if result is None]
+        if misses:
+            tier = "fast" if rerender is not None else "standard"
+            outcomes = self._recognize([images[i] for i in misses], OCR_PSM)
+            for i, outcome in zip(misses, outcomes):
+                results[i] = self._page_result(outcome, tier)
+            if self.ladder:
+                self._escalate(images, results, misses, rerender)
+            for i in misses:
+                count("sof_ocr_tier_total", tier=results[i]["tier"])
+                if self.page_cache is not None and not results[i]["error"]:
+                    self.page_cache.put(keys[i], results[i]["text"])
+        return results
+
+    def _escalate(
+        self,
+        images: List[Image.Image],
+        results: List[Dict[str, Any]],
+        indexes: List[int],
+        rerender: Optional[Callable[[List[int]], List[Image.Image]]],
+    ) -> None:
+        """Retry weak pages at full DPI, then with the alternative PSM; keep the best-scoring text."""
+        weak = [i for i in indexes if self._score(results[i]) < self.min_score]
+        if not weak:
+            return
+        if rerender is None:
+            full = {i: images[i] for i in weak}
+        else:
+            full = dict(zip(weak, rerender(weak)))
+            self._retry(full, results, weak, OCR_PSM, "standard")
+            weak = [i for i in weak if self._score(results[i]) < self.min_score]
+        if weak and self.alt_psm != OCR_PSM:
+            self._retry(full, results, weak, self.alt_psm, "alt_psm")
+
+    def _retry(
+        self, images: Dict[int, Image.Image], results: List[Dict[str, Any]], indexes: List[int], psm: int, tier: str
+    ) -> None:
+        outcomes = self._recognize([images[i] for i in indexes], psm)
+        for i, outcome in zip(indexes, outcomes):
+            candidate = self._page_result(outcome, tier)
+            if self._score(candidate) >= self._score(results[i]):
+                results[i] = candidate
+
+    def _score(self, result: Dict[str, Any]) -> float:
+        """Word confidence, plus ``hit_bonus`` when the parser finds events on the page."""
+        if result["error"]:
+            return -1.0
+        from app.parsers.event_matcher import match_events
+
+        score = result["confidence"] or 0.0
+        if match_events(result["text"]):
+            score += self.hit_bonus
+        return score
+
+    @staticmethod
+    def _page_result(outcome: Any, tier: str) -> Dict[str, Any]:
+        if isinstance(outcome, BaseException):
+            return {"text": "", "method": "ocr", "tier": tier, "confidence": None, "error": str(outcome) or type(outcome).__name__}
+        text, confidence = outcome if isinstance(outcome, tuple) else (outcome, None)
+        if confidence is not None:
+            confidence = round(confidence, 1)
+        return {"text": text, "method": "ocr", "tier": tier, "confidence": confidence, "error": None}
+
+    def _recognize(self, images: List[Image.Image], psm: int) -> List[Any]:
+        """Text (with confidence when the ladder needs it) or the exception, per image."""
+        with stage("ocr"):
+            if self.workers > 1 and len(images) > 1:
+                return self._ocr_parallel(images, psm)
+            return [self._ocr_page(image, psm) for image in images]
+
+    def _ocr_page(self, image: Image.Image, psm: int = OCR_PSM) -> str | Tuple[str, float] | Exception:
+        try:
+            if self.ladder:
+                return self.backend.image_to_text_with_confidence(image, psm)
+            return self.backend.image_to_string(image, psm)
+        except Exception as e:
+            return e
+
+    def _ocr_parallel(self, images: List[Image.Image], psm: int = OCR_PSM) -> List[Any]:
+        """Spread pages across the process pool, keeping results in page order."""
+        backend_name = self.backend.name
+        pool = _get_pool(self.workers, backend_name)
+        try:
+            futures = [pool.submit(_ocr_page_worker, image, backend_name, psm, self.ladder) for image in images]
+        except BrokenProcessPool:
+            _discard_pool(pool)
+            pool = _get_pool(self.workers, backend_name)
+            futures = [pool.submit(_ocr_page_worker, image, backend_name, psm, self.ladder) for image in images]
+
+        results: List[Any] = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except BrokenProcessPool as e:
+                # A worker died (e.g. OOM); remaining pages fail, next run gets a new pool
+                _discard_pool(pool)
+                results.append(e)
+            except Exception as e:
+                results.append(e)
+        return results
 
     def _preprocess_image(self, image: Image.Image) -> Image.Image:
         """Preprocess image for better OCR accuracy."""
-        # Convert to grayscale
-        if image.mode != 'L':
-            image = image.convert('L')
-        
-        # Enhance contrast
-        enhancer = ImageEnhance.Contrast(image)
-        image = enhancer.enhance(2.0)
-        
-        # Apply slight blur to reduce noise
-        image = image.filter(ImageFilter.GaussianBlur(radius=0.5))
-        
-        # Enhance sharpness
-        enhancer = ImageEnhance.Sharpness(image)
-        image = enhancer.enhance(1.5)
-        
-        return image
+        from app.services.image_preprocess import preprocess_numpy, preprocess_pil
+
+        if self.preprocess == "pil":
+            return preprocess_pil(image, **PREPROCESS_PARAMS)
+        return preprocess_numpy(image, **PREPROCESS_PARAMS, binarize=self.binarize, deskew=self.deskew)
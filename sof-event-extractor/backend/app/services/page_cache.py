@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, NamedTuple, Optional, Tuple
+
+from app.config import get_config
+from app.services.metrics import count
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+
+# Gray level below which a pixel counts as ink when binarizing a page for its digest
+INK_THRESHOLD = 128
+
+_SCHEMA = [
+    # Entries of the earlier near-duplicate cache could return another page's text
+    "DROP TABLE IF EXISTS ocr_pages",
+    """CREATE TABLE IF NOT EXISTS ocr_page_text (
+        id INTEGER PRIMARY KEY,
+        settings TEXT NOT NULL,
+        digest TEXT NOT NULL,
+        text TEXT NOT NULL,
+        last_used REAL NOT NULL,
+        UNIQUE (settings, digest)
+    )""",
+]
+
+
+class PageKey(NamedTuple):
+    settings: str
+    digest: str
+
+
+def page_digest(image: "Image.Image") -> str:
+    """SHA-256 of the page binarized at full resolution, with its size."""
+    import numpy as np
+
+    gray = image if image.mode == "L" else image.convert("L")
+    ink = np.asarray(gray, dtype=np.uint8) < INK_THRESHOLD
+    digest = hashlib.sha256(f"{gray.width}x{gray.height}:".encode())
+    digest.update(np.packbits(ink).tobytes())
+    return digest.hexdigest()
+
+
+class PageOCRCache:
+    """Reuses OCR text for pages identical to pages OCR'd before.
+
+    Recurring SOF templates (cover pages, terms pages, letterheads) come
+    back as the same page image. A page hits only when its binarized
+    full-resolution pixels match a stored page exactly: near-duplicate
+    matching cannot tell ``09:45`` from ``09:46`` at body-text sizes, and
+    returning another page's times is worse than running Tesseract again.
+    Binarizing first still absorbs gray-level noise that never crosses the
+    ink threshold.
+
+    Entries live in SQLite, shared by worker processes, and are always read
+    and deleted by their (settings, digest) key, never by row id: another
+    process may clear the file and SQLite then reuses row ids. Each process
+    tracks the keys it has seen for least-recently-used eviction beyond
+    ``max_entries``. Keys include the OCR ``settings``, so changing the
+    engine or its parameters never reuses old text.
+    """
+
+    def __init__(self, path: str, max_entries: int = 5000) -> None:
+        self.max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        for statement in _SCHEMA:
+            self._db.execute(statement)
+        self._db.commit()
+        # (settings, digest) keys in least- to most-recently-used order
+        self._entries: "OrderedDict[Tuple[str, str], None]" = OrderedDict()
+        self._counters = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        for settings, digest in self._db.execute("SELECT settings, digest FROM ocr_page_text ORDER BY last_used"):
+            self._entries[(settings, digest)] = None
+        self._evict()
+
+    @staticmethod
+    def key(image: "Image.Image", settings: str) -> PageKey:
+        return PageKey(settings, page_digest(image))
+
+    def get(self, key: PageKey) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT text FROM ocr_page_text WHERE settings = ? AND digest = ?", key
+            ).fetchone()
+            if row is not None:
+                self._entries[key] = None
+                self._entries.move_to_end(key)
+                self._db.execute(
+                    "UPDATE ocr_page_text SET last_used = ? WHERE settings = ? AND digest = ?", (time.time(), *key)
+                )
+                self._evict()
+                self._db.commit()
+                self._counters["hits"] += 1
+                count("sof_page_cache_lookups_total", result="hit")
+                return row[0]
+            # Deleted by another process, e.g. a clear()
+            self._entries.pop(key, None)
+            self._counters["misses"] += 1
+        count("sof_page_cache_lookups_total", result="miss")
+        return None
+
+    def put(self, key: PageKey, text: str) -> None:
+        with self._lock:
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO ocr_page_text (settings, digest, text, last_used) VALUES (?, ?, ?, ?)",
+                    (key.settings, key.digest, text, time.time()),
+                )
+                self._entries.pop(key, None)
+                self._entries[key] = None
+                self._counters["stores"] += 1
+                self._evict()
+                self._db.commit()
+            except sqlite3.Error as exc:
+                print(f"Page cache write failed: {exc}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["misses"]
+            return {
+                **self._counters,
+                "hit_ratio": round(self._counters["hits"] / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM ocr_page_text")
+            self._db.commit()
+            self._entries.clear()
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def _evict(self) -> None:
+        """Drop least recently used entries beyond max_entries (lock held)."""
+        evicted = []
+        while len(self._entries) > self.max_entries:
+            key, _ = self._entries.popitem(last=False)
+            evicted.append(key)
+        if evicted:
+            self._db.executemany("DELETE FROM ocr_page_text WHERE settings = ? AND digest = ?", evicted)
+            self._counters["evictions"] += len(evicted)
+
+
+_cache: Optional[PageOCRCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_page_cache() -> Optional[PageOCRCache]:
+    """Return the process-wide page OCR cache, or None when disabled."""
+    global _cache
+    cfg = get_config()
+    if not cfg["OCR_PAGE_CACHE_ENABLED"]:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            try:
+                _cache = PageOCRCache(cfg["OCR_PAGE_CACHE_PATH"], max_entries=cfg["OCR_PAGE_CACHE_MAX_ENTRIES"])
+            except sqlite3.Error as exc:
+                # OCR still works without the cache
+                print(f"Page cache unavailable: {exc}")
+                return None
+        return _cache
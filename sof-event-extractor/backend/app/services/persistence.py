@@ -0,0 +1,439 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, ContextManager, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.config import get_config
+from app.db import ConnectionPool, get_sql_pool
+
+
+# Rows handed to executemany per call; bounds memory on very large batches
+BATCH_ROWS = 1000
+
+LAYTIME_COLUMNS = [
+    "allowed_hours",
+    "time_used_hours",
+    "time_on_demurrage_hours",
+    "demurrage_due",
+    "despatch_due",
+    "net_due",
+]
+
+# Column order of the rows iter_event_rows / iter_laytime_rows return
+EVENT_EXPORT_COLUMNS = ["document_id", "filename", "vessel", "seq", "name", "start", "end", "start_ts", "end_ts"]
+LAYTIME_EXPORT_COLUMNS = ["document_id", "filename", "vessel", *LAYTIME_COLUMNS, "computed_at"]
+
+_SCHEMA = {
+    "sqlite": [
+        """CREATE TABLE IF NOT EXISTS sof_documents (
+            document_id TEXT PRIMARY KEY,
+            filename TEXT,
+            vessel TEXT,
+            blob_name TEXT,
+            extraction_method TEXT,
+            event_count INTEGER,
+            created_at REAL
+        )""",
+        """CREATE TABLE IF NOT EXISTS sof_events (
+            document_id TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            name TEXT,
+            start_text TEXT,
+            end_text TEXT,
+            start_ts INTEGER,
+            end_ts INTEGER,
+            PRIMARY KEY (document_id, seq)
+        )""",
+        "CREATE INDEX IF NOT EXISTS ix_sof_events_start_ts ON sof_events (start_ts)",
+        """CREATE TABLE IF NOT EXISTS sof_laytime (
+            document_id TEXT PRIMARY KEY,
+            allowed_hours REAL,
+            time_used_hours REAL,
+            time_on_demurrage_hours REAL,
+            demurrage_due REAL,
+            despatch_due REAL,
+            net_due REAL,
+            statement TEXT,
+            computed_at REAL
+        )""",
+    ],
+    "sqlserver": [
+        """IF OBJECT_ID('sof_documents', 'U') IS NULL CREATE TABLE sof_documents (
+            document_id CHAR(64) PRIMARY KEY,
+            filename NVARCHAR(400),
+            vessel NVARCHAR(200),
+            blob_name NVARCHAR(600),
+            extraction_method NVARCHAR(50),
+            event_count INT,
+            created_at FLOAT
+        )""",
+        """IF OBJECT_ID('sof_events', 'U') IS NULL CREATE TABLE sof_events (
+            document_id CHAR(64) NOT NULL,
+            seq INT NOT NULL,
+            name NVARCHAR(MAX),
+            start_text NVARCHAR(MAX),
+            end_text NVARCHAR(MAX),
+            start_ts BIGINT,
+            end_ts BIGINT,
+            PRIMARY KEY (document_id, seq)
+        )""",
+        # Event text is whole OCR lines; widen tables created with the old fixed widths
+        "IF COL_LENGTH('sof_events', 'name') <> -1 ALTER TABLE sof_events ALTER COLUMN name NVARCHAR(MAX)",
+        "IF COL_LENGTH('sof_events', 'start_text') <> -1 ALTER TABLE sof_events ALTER COLUMN start_text NVARCHAR(MAX)",
+        "IF COL_LENGTH('sof_events', 'end_text') <> -1 ALTER TABLE sof_events ALTER COLUMN end_text NVARCHAR(MAX)",
+        """IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'ix_sof_events_start_ts')
+            CREATE INDEX ix_sof_events_start_ts ON sof_events (start_ts)""",
+        """IF OBJECT_ID('sof_laytime', 'U') IS NULL CREATE TABLE sof_laytime (
+            document_id CHAR(64) PRIMARY KEY,
+            allowed_hours FLOAT,
+            time_used_hours FLOAT,
+            time_on_demurrage_hours FLOAT,
+            demurrage_due FLOAT,
+            despatch_due FLOAT,
+            net_due FLOAT,
+            statement NVARCHAR(MAX),
+            computed_at FLOAT
+        )""",
+    ],
+}
+
+
+class EventStore:
+    """Persists extracted documents, their events and laytime results."""
+
+    def save_documents(self, documents: List[Dict[str, Any]]) -> int:
+        """Insert or replace documents with their events; returns the number saved.
+
+        Each document has ``document_id`` and ``events`` and optionally
+        ``filename``, ``vessel``, ``blob`` and ``extraction_method``.
+        """
+        raise NotImplementedError
+
+    def save_laytime(self, results: List[Dict[str, Any]]) -> int:
+        """Insert or replace laytime statements, each carrying its ``document_id``."""
+        raise NotImplementedError
+
+    def get_document(self, document_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def iter_events(self, document_ids: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+        """Stored events joined with their document, in document and event order."""
+        raise NotImplementedError
+
+    def iter_event_rows(
+        self,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+        vessels: Optional[List[str]] = None,
+        event_types: Optional[List[str]] = None,
+    ) -> Iterator[List[tuple]]:
+        """Batches of EVENT_EXPORT_COLUMNS rows, in document and event order.
+
+        ``since``/``until`` bound ``start_ts`` (epoch seconds, end exclusive)
+        and drop events without one; ``event_types`` are case-insensitive
+        substrings of the event name, as in the laytime keywords.
+        """
+        raise NotImplementedError
+
+    def iter_laytime_rows(
+        self,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+        vessels: Optional[List[str]] = None,
+        event_types: Optional[List[str]] = None,
+    ) -> Iterator[List[tuple]]:
+        """Batches of LAYTIME_EXPORT_COLUMNS rows for documents with an event matching the filters."""
+        raise NotImplementedError
+
+
+class SqlEventStore(EventStore):
+    """EventStore over any DB-API connection source, written in bulk.
+
+    ``connection`` returns a context manager that yields a connection and
+    commits on exit, e.g. ``ConnectionPool.connection``. Each save is one
+    transaction: replaced rows are deleted and new rows go in through
+    ``executemany`` in BATCH_ROWS chunks. On SQL Server the cursor uses
+    pyodbc ``fast_executemany`` so each chunk is one round trip with
+    array-bound parameters instead of one per row.
+    """
+
+    def __init__(self, connection: Callable[[], ContextManager[Any]], dialect: str = "sqlserver") -> None:
+        if dialect not in _SCHEMA:
+            raise ValueError(f"Unknown SQL dialect {dialect!r}")
+        self._connection = connection
+        self.dialect = dialect
+        self._schema_ready = False
+        self._lock = threading.Lock()
+
+    def ensure_schema(self) -> None:
+        if self._schema_ready:
+            return
+        with self._lock:
+            if self._schema_ready:
+                return
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                for statement in _SCHEMA[self.dialect]:
+                    cursor.execute(statement)
+            self._schema_ready = True
+
+    def _cursor(self, conn: Any) -> Any:
+        cursor = conn.cursor()
+        if self.dialect == "sqlserver":
+            cursor.fast_executemany = True
+        return cursor
+
+    @staticmethod
+    def _executemany(cursor: Any, sql: str, rows: Iterable[tuple]) -> None:
+        batch: List[tuple] = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= BATCH_ROWS:
+                cursor.executemany(sql, batch)
+                batch = []
+        if batch:
+            cursor.executemany(sql, batch)
+
+    @staticmethod
+    def _delete(cursor: Any, table: str, ids: List[str]) -> None:
+        for start in range(0, len(ids), BATCH_ROWS):
+            chunk = ids[start:start + BATCH_ROWS]
+            marks = ",".join("?" * len(chunk))
+            cursor.execute(f"DELETE FROM {table} WHERE document_id IN ({marks})", chunk)
+
+    def save_documents(self, documents: List[Dict[str, Any]]) -> int:
+        # Last copy wins when a batch holds the same document twice
+        by_id = {doc["document_id"]: doc for doc in documents}
+        if not by_id:
+            return 0
+        self.ensure_schema()
+        ids = list(by_id)
+        now = time.time()
+        with self._connection() as conn:
+            cursor = self._cursor(conn)
+            self._delete(cursor, "sof_events", ids)
+            self._delete(cursor, "sof_documents", ids)
+            self._executemany(
+                cursor,
+                "INSERT INTO sof_documents (document_id, filename, vessel, blob_name, extraction_method, event_count, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (
+                        doc_id,
+                        doc.get("filename"),
+                        doc.get("vessel"),
+                        doc.get("blob"),
+                        doc.get("extraction_method"),
+                        len(doc.get("events") or []),
+                        now,
+                    )
+                    for doc_id, doc in by_id.items()
+                ),
+            )
+            self._executemany(
+                cursor,
+                "INSERT INTO sof_events (document_id, seq, name, start_text, end_text, start_ts, end_ts)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (
+                        doc_id,
+                        seq,
+                        event.get("name"),
+                        event.get("start"),
+                        event.get("end"),
+                        event.get("start_ts"),
+                        event.get("end_ts"),
+                    )
+                    for doc_id, doc in by_id.items()
+                    for seq, event in enumerate(doc.get("events") or [])
+                ),
+            )
+        return len(by_id)
+
+    def save_laytime(self, results: List[Dict[str, Any]]) -> int:
+        by_id = {result["document_id"]: result for result in results}
+        if not by_id:
+            return 0
+        self.ensure_schema()
+        ids = list(by_id)
+        now = time.time()
+        columns = ", ".join(LAYTIME_COLUMNS)
+        marks = ", ".join("?" * (len(LAYTIME_COLUMNS) + 3))
+        with self._connection() as conn:
+            cursor = self._cursor(conn)
+            self._delete(cursor, "sof_laytime", ids)
+            self._executemany(
+                cursor,
+                f"INSERT INTO sof_laytime (document_id, {columns}, statement, computed_at) VALUES ({marks})",
+                (
+                    (doc_id, *(result.get(c) for c in LAYTIME_COLUMNS), json.dumps(result), now)
+                    for doc_id, result in by_id.items()
+                ),
+            )
+        return len(by_id)
+
+    def get_document(self, document_id: str) -> Optional[Dict[str, Any]]:
+        self.ensure_schema()
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT filename, vessel, blob_name, extraction_method FROM sof_documents WHERE document_id = ?",
+                (document_id,),
+            )
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            cursor.execute(
+                "SELECT name, start_text, end_text, start_ts, end_ts FROM sof_events"
+                " WHERE document_id = ? ORDER BY seq",
+                (document_id,),
+            )
+            events = [
+                {"name": r[0], "start": r[1], "end": r[2], "start_ts": r[3], "end_ts": r[4]}
+                for r in cursor.fetchall()
+            ]
+            cursor.execute("SELECT statement FROM sof_laytime WHERE document_id = ?", (document_id,))
+            laytime = cursor.fetchone()
+        return {
+            "document_id": document_id,
+            "filename": row[0],
+            "vessel": row[1],
+            "blob": row[2],
+            "extraction_method": row[3],
+            "events": events,
+            "laytime": json.loads(laytime[0]) if laytime else None,
+        }
+
+    def iter_events(self, document_ids: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+        self.ensure_schema()
+        sql = (
+            "SELECT e.document_id, d.filename, d.vessel, e.seq, e.name, e.start_text, e.end_text, e.start_ts, e.end_ts"
+            " FROM sof_events e JOIN sof_documents d ON d.document_id = e.document_id"
+        )
+        params: List[str] = []
+        if document_ids is not None:
+            if not document_ids:
+                return
+            sql += f" WHERE e.document_id IN ({','.join('?' * len(document_ids))})"
+            params = list(document_ids)
+        sql += " ORDER BY e.document_id, e.seq"
+        for rows in self._fetch_batches(sql, params):
+            for row in rows:
+                yield dict(zip(EVENT_EXPORT_COLUMNS, row))
+
+    def iter_event_rows(
+        self,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+        vessels: Optional[List[str]] = None,
+        event_types: Optional[List[str]] = None,
+    ) -> Iterator[List[tuple]]:
+        self.ensure_schema()
+        conditions, params = self._event_conditions(since, until, event_types)
+        vessel_conditions, vessel_params = self._vessel_conditions(vessels)
+        sql = (
+            "SELECT e.document_id, d.filename, d.vessel, e.seq, e.name, e.start_text, e.end_text, e.start_ts, e.end_ts"
+            " FROM sof_events e JOIN sof_documents d ON d.document_id = e.document_id"
+        )
+        where = conditions + vessel_conditions
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY e.document_id, e.seq"
+        return self._fetch_batches(sql, params + vessel_params)
+
+    def iter_laytime_rows(
+        self,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+        vessels: Optional[List[str]] = None,
+        event_types: Optional[List[str]] = None,
+    ) -> Iterator[List[tuple]]:
+        self.ensure_schema()
+        conditions, params = self._event_conditions(since, until, event_types)
+        where, where_params = self._vessel_conditions(vessels)
+        if conditions:
+            where.append(
+                "EXISTS (SELECT 1 FROM sof_events e WHERE e.document_id = l.document_id AND "
+                + " AND ".join(conditions) + ")"
+            )
+            where_params += params
+        sql = (
+            f"SELECT l.document_id, d.filename, d.vessel, {', '.join('l.' + c for c in LAYTIME_COLUMNS)}, l.computed_at"
+            " FROM sof_laytime l JOIN sof_documents d ON d.document_id = l.document_id"
+        )
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY l.document_id"
+        return self._fetch_batches(sql, where_params)
+
+    @staticmethod
+    def _event_conditions(
+        since: Optional[int], until: Optional[int], event_types: Optional[List[str]]
+    ) -> Tuple[List[str], List[Any]]:
+        conditions: List[str] = []
+        params: List[Any] = []
+        if since is not None:
+            conditions.append("e.start_ts >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append("e.start_ts < ?")
+            params.append(until)
+        if event_types:
+            conditions.append("(" + " OR ".join("LOWER(e.name) LIKE ? ESCAPE '\\'" for _ in event_types) + ")")
+            params.extend(f"%{_escape_like(t.lower())}%" for t in event_types)
+        return conditions, params
+
+    @staticmethod
+    def _vessel_conditions(vessels: Optional[List[str]]) -> Tuple[List[str], List[Any]]:
+        if not vessels:
+            return [], []
+        return [f"d.vessel IN ({','.join('?' * len(vessels))})"], list(vessels)
+
+    def _fetch_batches(self, sql: str, params: List[Any]) -> Iterator[List[tuple]]:
+        """Run a query and yield its rows BATCH_ROWS at a time, so memory stays flat."""
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(BATCH_ROWS)
+                if not rows:
+                    break
+                yield rows
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def sqlite_store(path: str, pool_size: int = 4) -> SqlEventStore:
+    """SqlEventStore on a local SQLite file, for development and tests."""
+
+    def connect() -> sqlite3.Connection:
+        return sqlite3.connect(path, timeout=30, check_same_thread=False)
+
+    return SqlEventStore(ConnectionPool(connect, max_size=pool_size).connection, dialect="sqlite")
+
+
+_store: Optional[EventStore] = None
+_store_lock = threading.Lock()
+
+
+def get_event_store() -> Optional[EventStore]:
+    """Process-wide store per PERSISTENCE_BACKEND, or None when persistence is off."""
+    global _store
+    cfg = get_config()
+    backend = cfg["PERSISTENCE_BACKEND"]
+    if not backend:
+        return None
+    with _store_lock:
+        if _store is None:
+            if backend == "sqlite":
+                _store = sqlite_store(cfg["PERSISTENCE_SQLITE_PATH"])
+            elif backend == "sqlserver":
+                _store = SqlEventStore(get_sql_pool().connection, dialect="sqlserver")
+            else:
+                raise ValueError(f"Unknown PERSISTENCE_BACKEND {backend!r}")
+        return _store
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import hmac
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from app.config import get_config
+
+
+PROFILE_HEADER = "X-Profile-Token"
+_PROFILE_ID = re.compile(r'^[0-9a-f]{8,40}$')
+
+
+class SamplingProfiler:
+    """Samples one thread's Python stack every ``interval`` seconds from a helper thread.
+
+    Unlike cProfile this keeps whole stacks, so the counts go straight into
+    collapsed-stack format, and the profiled thread runs at full speed
+    between samples. Time spent in other threads or processes (the OCR
+    process pool) shows up as the frame that waits on them.
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.005) -> None:
+        self._thread_id = thread_id
+        self._interval = interval
+        self._counts: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sof-profiler", daemon=True)
+
+    def start(self) -> "SamplingProfiler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self._counts
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval):
+            frame = sys._current_frames().get(self._thread_id)
+            stack: List[str] = []
+            while frame is not None:
+                code = frame.f_code
+                name = getattr(code, "co_qualname", code.co_name)
+                stack.append(f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self._counts[";".join(reversed(stack))] += 1
+
+
+class ProfileStore:
+    """Keeps the most recent ``keep`` profiles on disk as ``<id>.collapsed`` plus ``<id>.json``."""
+
+    def __init__(self, directory: str, keep: int = 50) -> None:
+        self.directory = directory
+        self.keep = keep
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def new_id() -> str:
+        # Time-ordered so listing by name is listing by age
+        return f"{int(time.time() * 1000):013x}{uuid.uuid4().hex[:8]}"
+
+    def save(self, profile_id: str, counts: Counter, meta: Dict[str, Any]) -> None:
+        collapsed = "".join(f"{stack} {n}\n" for stack, n in counts.most_common())
+        meta = {**meta, "id": profile_id, "samples": sum(counts.values())}
+        with self._lock:
+            with open(os.path.join(self.directory, f"{profile_id}.collapsed"), "w", encoding="utf-8") as f:
+                f.write(collapsed)
+            with open(os.path.join(self.directory, f"{profile_id}.json"), "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            ids = self._ids()
+            for old in ids[:max(0, len(ids) - self.keep)]:
+                for ext in (".collapsed", ".json"):
+                    try:
+                        os.remove(os.path.join(self.directory, old + ext))
+                    except OSError:
+                        pass
+
+    def _ids(self) -> List[str]:
+        return sorted(name[:-5] for name in os.listdir(self.directory) if name.endswith(".json"))
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Profile metadata, newest first."""
+        profiles = []
+        for profile_id in reversed(self._ids()):
+            try:
+                with open(os.path.join(self.directory, f"{profile_id}.json"), encoding="utf-8") as f:
+                    profiles.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return profiles
+
+    def collapsed_path(self, profile_id: str) -> Optional[str]:
+        if not _PROFILE_ID.match(profile_id):
+            return None
+        path = os.path.join(self.directory, f"{profile_id}.collapsed")
+        return path if os.path.exists(path) else None
+
+
+_store: Optional[ProfileStore] = None
+_store_lock = threading.Lock()
+
+
+def profiling_enabled() -> bool:
+    cfg = get_config()
+    return cfg["PROFILE_SAMPLE_RATE"] > 0 or bool(cfg["PROFILE_TOKEN"])
+
+
+def get_profile_store() -> Optional[ProfileStore]:
+    """Process-wide store, or None when profiling is not configured."""
+    global _store
+    if not profiling_enabled():
+        return None
+    with _store_lock:
+        if _store is None:
+            cfg = get_config()
+            _store = ProfileStore(cfg["PROFILE_DIR"], cfg["PROFILE_KEEP"])
+        return _store
+
+
+def authorized(headers: Any) -> bool:
+    """Whether the request carries the admin profiling token.
+
+    Saved profiles include request paths and code locations, so reading them
+    always needs a token; without PROFILE_TOKEN nobody is authorized.
+    """
+    token = get_config()["PROFILE_TOKEN"]
+    if not token:
+        return False
+    return hmac.compare_digest(headers.get(PROFILE_HEADER, ""), token)
+
+
+def install_profiling(app: Any) -> None:
+    """Profile matching requests on demand (admin header) or at PROFILE_SAMPLE_RATE.
+
+    Nothing is registered when profiling is off, so disabled profiling adds
+    no per-request work at all. A profiled response carries ``X-Profile-Id``;
+    streamed response bodies finish after the profile is saved and are not
+    included in it.
+    """
+    if not profiling_enabled():
+        return
+
+    from flask import g, request
+
+    cfg = get_config()
+    rate = cfg["PROFILE_SAMPLE_RATE"]
+    token = cfg["PROFILE_TOKEN"]
+    paths = tuple(cfg["PROFILE_PATHS"])
+    interval = cfg["PROFILE_INTERVAL_MS"] / 1000.0
+    store = get_profile_store()
+
+    @app.before_request
+    def _start_profile() -> None:
+        if not request.path.startswith(paths):
+            return
+        requested = bool(token) and hmac.compare_digest(request.headers.get(PROFILE_HEADER, ""), token)
+        if not requested and random.random() >= rate:
+            return
+        g.sof_profile = (ProfileStore.new_id(), time.time(), SamplingProfiler(threading.get_ident(), interval).start())
+
+    @app.after_request
+    def _tag_profile(response: Any) -> Any:
+        profile = g.get("sof_profile")
+        if profile is not None:
+            response.headers["X-Profile-Id"] = profile[0]
+        return response
+
+    @app.teardown_request
+    def _save_profile(exc: Optional[BaseException]) -> None:
+        profile = g.pop("sof_profile", None)
+        if profile is None:
+            return
+        profile_id, started, profiler = profile
+        counts = profiler.stop()
+        try:
+            store.save(profile_id, counts, {
+                "method": request.method,
+                "path": request.path,
+                "started_at": started,
+                "duration_ms": round((time.time() - started) * 1000, 1),
+                "interval_ms": interval * 1000,
+                "error": repr(exc) if exc is not None else None,
+            })
+        except OSError as e:
+            print(f"Saving profile {profile_id} failed: {e}")
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.config import get_config
+from app.parsers.event_table import dumps
+from app.services.metrics import count
+
+
+def make_cache_key(data: Any, settings: Dict[str, Any]) -> str:
+    """SHA-256 over the document bytes plus the settings that shape the result.
+
+    ``data`` may also be a sha256 object already fed the document bytes
+    (see SpooledDocument.digest), which gives the same key without the bytes.
+    """
+    digest = hashlib.sha256(data) if isinstance(data, (bytes, bytearray, memoryview)) else data.copy()
+    digest.update(b"\0")
+    digest.update(json.dumps(settings, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Two-tier (memory LRU + on-disk) cache for extraction results.
+
+    Values must be JSON-serializable (EventTables included; they come back
+    from the disk tier as lists of event dicts) and are shared between callers on a
+    memory hit, so treat them as read-only. Both tiers evict least recently used
+    entries once their byte budget is exceeded; the disk tier uses file
+    mtimes as its recency clock so it survives restarts.
+    """
+
+    def __init__(self, directory: str, memory_max_bytes: int, disk_max_bytes: int) -> None:
+        self._dir = directory
+        self._memory_max = memory_max_bytes
+        self._disk_max = disk_max_bytes
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[Tuple[str, str], Tuple[Any, int]]" = OrderedDict()
+        self._memory_bytes = 0
+        # path -> (mtime, size) for every file in the disk tier
+        self._disk_index: Dict[str, Tuple[float, int]] = {}
+        self._disk_bytes = 0
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        os.makedirs(self._dir, exist_ok=True)
+        self._scan_disk()
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._memory.get((namespace, key))
+            if entry is not None:
+                self._memory.move_to_end((namespace, key))
+                self._counters["memory_hits"] += 1
+                count("sof_cache_lookups_total", namespace=namespace, result="hit")
+                return entry[0]
+
+        path = self._path(namespace, key)
+        try:
+            with open(path, "rb") as handle:
+                raw = handle.read()
+            value = json.loads(raw)
+        except (OSError, ValueError):
+            with self._lock:
+                self._counters["misses"] += 1
+            count("sof_cache_lookups_total", namespace=namespace, result="miss")
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self._counters["disk_hits"] += 1
+            if path in self._disk_index:
+                self._disk_index[path] = (time.time(), len(raw))
+            self._remember(namespace, key, value, len(raw))
+        count("sof_cache_lookups_total", namespace=namespace, result="hit")
+        return value
+
+    def put(self, namespace: str, key: str, value: Any) -> None:
+        raw = dumps(value).encode("utf-8")
+        path = self._path(namespace, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write-then-rename so concurrent readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(raw)
+            os.replace(tmp_path, path)
+        except OSError as exc:
+            print(f"Result cache write failed: {exc}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raw = b""
+
+        with self._lock:
+            self._counters["stores"] += 1
+            self._remember(namespace, key, value, len(raw) or 1)
+            if raw:
+                previous = self._disk_index.get(path)
+                if previous is not None:
+                    self._disk_bytes -= previous[1]
+                self._disk_index[path] = (time.time(), len(raw))
+                self._disk_bytes += len(raw)
+                self._evict_disk()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._counters["memory_hits"] + self._counters["disk_hits"] + self._counters["misses"]
+            hits = lookups - self._counters["misses"]
+            return {
+                **self._counters,
+                "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_entries": len(self._disk_index),
+                "disk_bytes": self._disk_bytes,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            for path in list(self._disk_index):
+                self._remove_file(path)
+            self._memory.clear()
+            self._memory_bytes = 0
+
+    def _path(self, namespace: str, key: str) -> str:
+        return os.path.join(self._dir, namespace, key[:2], f"{key}.json")
+
+    def _remember(self, namespace: str, key: str, value: Any, size: int) -> None:
+        """Insert into the memory tier (lock held)."""
+        previous = self._memory.pop((namespace, key), None)
+        if previous is not None:
+            self._memory_bytes -= previous[1]
+        if size > self._memory_max:
+            return
+        self._memory[(namespace, key)] = (value, size)
+        self._memory_bytes += size
+        while self._memory_bytes > self._memory_max and self._memory:
+            _, (_, evicted_size) = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted_size
+            self._counters["evictions"] += 1
+
+    def _evict_disk(self) -> None:
+        """Drop least recently used files until the disk tier fits (lock held)."""
+        if self._disk_bytes <= self._disk_max:
+            return
+        for path, _ in sorted(self._disk_index.items(), key=lambda item: item[1][0]):
+            if self._disk_bytes <= self._disk_max:
+                break
+            self._remove_file(path)
+            self._counters["evictions"] += 1
+
+    def _remove_file(self, path: str) -> None:
+        _, size = self._disk_index.pop(path, (0.0, 0))
+        self._disk_bytes -= size
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _scan_disk(self) -> None:
+        for root, _, files in os.walk(self._dir):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                self._disk_index[path] = (st.st_mtime, st.st_size)
+                self._disk_bytes += st.st_size
+        self._evict_disk()
+
+
+_cache: Optional[ResultCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    """Return the process-wide result cache, or None when disabled."""
+    global _cache
+    cfg = get_config()
+    if not cfg["RESULT_CACHE_ENABLED"]:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResultCache(
+                cfg["RESULT_CACHE_DIR"],
+                cfg["RESULT_CACHE_MEMORY_MB"] * 1024 * 1024,
+                cfg["RESULT_CACHE_DISK_MB"] * 1024 * 1024,
+            )
+        return _cache
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from app.config import get_config
+
+
+class StoredResult:
+    """One extraction result kept server-side; never modified after it is stored."""
+
+    def __init__(self, result: Dict[str, Any], ttl_seconds: int) -> None:
+        self.id = uuid.uuid4().hex
+        self.result = result
+        self.created_at = time.time()
+        self.expires_at = self.created_at + ttl_seconds
+
+
+class ResultStore:
+    """Extraction results by result id, so exports fetch them instead of re-uploading.
+
+    Entries expire ``ttl_seconds`` after they are stored; past
+    ``max_results`` the oldest go first. Every entry has the same TTL, so
+    insertion order is expiry order and expiring only looks at the front.
+    """
+
+    def __init__(self, max_results: int, ttl_seconds: int) -> None:
+        self._max = max(1, max_results)
+        self._ttl = ttl_seconds
+        self._results: "OrderedDict[str, StoredResult]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, result: Dict[str, Any]) -> StoredResult:
+        stored = StoredResult(result, self._ttl)
+        with self._lock:
+            self._expire()
+            self._results[stored.id] = stored
+            while len(self._results) > self._max:
+                self._results.popitem(last=False)
+        return stored
+
+    def get(self, result_id: str) -> Optional[StoredResult]:
+        with self._lock:
+            self._expire()
+            return self._results.get(result_id)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            self._expire()
+            return {"results": len(self._results), "max_results": self._max, "ttl_seconds": self._ttl}
+
+    def _expire(self) -> None:
+        """Drop results past their TTL (lock held)."""
+        now = time.time()
+        while self._results:
+            oldest = next(iter(self._results.values()))
+            if oldest.expires_at > now:
+                break
+            self._results.popitem(last=False)
+
+
+_store: Optional[ResultStore] = None
+_store_lock = threading.Lock()
+
+
+def get_result_store() -> ResultStore:
+    """Return the process-wide result store, created from config on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            cfg = get_config()
+            _store = ResultStore(cfg["RESULT_STORE_MAX_RESULTS"], cfg["RESULT_STORE_TTL_SECONDS"])
+        return _store
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import time
+from concurrent.futures import wait
+from typing import Callable, Dict
+
+from app.config import get_config
+
+
+def _import_heavy_modules() -> None:
+    import docx  # noqa: F401
+    import pdf2image  # noqa: F401
+    import PIL.Image  # noqa: F401
+
+    import app.services.image_preprocess  # noqa: F401  (NumPy)
+    import app.services.laytime  # noqa: F401
+    from app.services.ocr_service import HAS_FITZ
+
+    if HAS_FITZ:
+        import fitz  # noqa: F401
+
+
+def _sample_page():
+    from PIL import Image, ImageDraw
+
+    page = Image.new("L", (600, 120), 255)
+    ImageDraw.Draw(page).text((10, 40), "Cargo loading 08:00 12:30", fill=0)
+    return page
+
+
+def _warm_ocr_engine() -> None:
+    """One preprocess + OCR pass: loads the engine and its language data, warms NumPy kernels."""
+    from app.services.ocr_service import OCRService
+
+    service = OCRService()
+    service.backend.image_to_string(service._preprocess_image(_sample_page()))
+
+
+def _warm_ocr_pool() -> None:
+    """Start every OCR pool worker so each has its engine loaded before the first PDF."""
+    from app.services.ocr_service import _get_pool, _ocr_page_worker, get_ocr_backend
+
+    workers = get_config()["OCR_WORKERS"]
+    backend_name = get_ocr_backend().name
+    pool = _get_pool(workers, backend_name)
+    page = _sample_page()
+    wait([pool.submit(_ocr_page_worker, page, backend_name) for _ in range(workers)])
+
+
+def _warm_blob_client() -> None:
+    from app.services.blob_service import get_blob_uploader
+
+    get_blob_uploader()
+
+
+def warm_up() -> Dict[str, float]:
+    """Preload heavy dependencies and the OCR engine before a worker takes traffic.
+
+    Returns milliseconds per step. A failing step (e.g. no Tesseract on this
+    host) is printed and skipped so the worker still starts.
+    """
+    steps: Dict[str, Callable[[], None]] = {
+        "imports": _import_heavy_modules,
+        "ocr_engine": _warm_ocr_engine,
+    }
+    if get_config()["OCR_WORKERS"] > 1:
+        steps["ocr_pool"] = _warm_ocr_pool
+    steps["blob_client"] = _warm_blob_client
+
+    timings: Dict[str, float] = {}
+    for name, step in steps.items():
+        start = time.perf_counter()
+        try:
+            step()
+        except Exception as exc:
+            print(f"Warm-up step {name} failed: {exc}")
+        timings[name] = round((time.perf_counter() - start) * 1000, 1)
+    return timings
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+from typing import Any, Iterable, Iterator, List, Sequence
+
+from app.services.persistence import LAYTIME_COLUMNS
+from app.utils.export_stream import CHUNK_SIZE
+
+
+# format -> (mimetype, file extension)
+FORMATS = {
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+
+# Columns that are not strings; everything else is exported as a string
+_INT_COLUMNS = {"seq"}
+_EPOCH_COLUMNS = {"start_ts", "end_ts", "computed_at"}
+_FLOAT_COLUMNS = set(LAYTIME_COLUMNS)
+
+
+class _ChunkSink:
+    """Write-only file object the Arrow writers flush into; drained between row groups."""
+
+    def __init__(self) -> None:
+        self._buffer = bytearray()
+        self._position = 0
+        self.closed = False
+
+    def write(self, data: Any) -> int:
+        self._buffer += data
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self, minimum: int = 0) -> Iterator[bytes]:
+        if self._buffer and len(self._buffer) >= minimum:
+            data, self._buffer = bytes(self._buffer), bytearray()
+            yield data
+
+
+def _arrow_type(pa: Any, column: str) -> Any:
+    if column in _INT_COLUMNS:
+        return pa.int32()
+    if column in _EPOCH_COLUMNS:
+        return pa.timestamp("s", tz="UTC")
+    if column in _FLOAT_COLUMNS:
+        return pa.float64()
+    return pa.string()
+
+
+def _epoch_seconds(values: Sequence[Any]) -> List[Any]:
+    return [None if v is None else int(v) for v in values]
+
+
+def iter_columnar(
+    columns: Sequence[str],
+    batches: Iterable[Sequence[Sequence[Any]]],
+    fmt: str = "parquet",
+    row_group_rows: int = 50000,
+    compression: str = "zstd",
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """Stream row batches as a Parquet file or an Arrow IPC stream.
+
+    Rows are buffered up to ``row_group_rows`` and written as one row
+    group (Parquet) or record batch (Arrow), whose bytes go out before the
+    next group is read, so memory is bounded by the group size whatever
+    the export size. Raises ImportError up front when pyarrow is missing.
+    """
+    import pyarrow as pa
+
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown columnar format {fmt!r}")
+    schema = pa.schema([(column, _arrow_type(pa, column)) for column in columns])
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        def open_writer(sink: _ChunkSink) -> Any:
+            return pq.ParquetWriter(sink, schema, compression=compression)
+    else:
+
+        def open_writer(sink: _ChunkSink) -> Any:
+            return pa.ipc.new_stream(sink, schema)
+
+    def record_batch(rows: List[Sequence[Any]]) -> Any:
+        arrays = []
+        for field, values in zip(schema, zip(*rows)):
+            if field.name in _EPOCH_COLUMNS:
+                values = _epoch_seconds(values)
+            arrays.append(pa.array(values, type=field.type))
+        return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+    def generate() -> Iterator[bytes]:
+        sink = _ChunkSink()
+        writer = open_writer(sink)
+        pending: List[Sequence[Any]] = []
+        for rows in batches:
+            pending.extend(rows)
+            while len(pending) >= row_group_rows:
+                writer.write_batch(record_batch(pending[:row_group_rows]))
+                del pending[:row_group_rows]
+                yield from sink.drain(chunk_size)
+        if pending:
+            writer.write_batch(record_batch(pending))
+        writer.close()
+        yield from sink.drain()
+
+    return generate()
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+
+# Flush to the client roughly every 64 KB: big enough to keep syscalls and
+# chunk headers cheap, small enough that memory stays flat per response.
+CHUNK_SIZE = 64 * 1024
+
+
+def _buffered(pieces: Iterable[str], chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Coalesce many small string pieces into UTF-8 chunks of ~chunk_size."""
+    buffer: List[str] = []
+    size = 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            yield "".join(buffer).encode("utf-8")
+            buffer = []
+            size = 0
+    if buffer:
+        yield "".join(buffer).encode("utf-8")
+
+
+def iter_csv_rows(rows: Iterable[Sequence[Any]], chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Stream rows through csv.writer without building the whole file."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= chunk_size:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def iter_csv(
+    records: Iterable[Dict[str, Any]], fieldnames: Sequence[str], chunk_size: int = CHUNK_SIZE
+) -> Iterator[bytes]:
+    """Stream dict records as CSV with a header row; missing fields become ''."""
+    def rows():
+        yield list(fieldnames)
+        for record in records:
+            yield [record.get(field, "") for field in fieldnames]
+
+    return iter_csv_rows(rows(), chunk_size)
+
+
+def iter_json(payload: Any, indent: Optional[int] = None, sort_keys: bool = True) -> Iterator[bytes]:
+    """Encode ``payload`` incrementally with JSONEncoder.iterencode."""
+    separators = None if indent is not None else (",", ":")
+    encoder = json.JSONEncoder(indent=indent, sort_keys=sort_keys, separators=separators)
+    return _buffered(encoder.iterencode(payload))
+
+
+def iter_ndjson(records: Iterable[Any]) -> Iterator[bytes]:
+    """One compact JSON document per line."""
+    return _buffered(json.dumps(record, separators=(",", ":")) + "\n" for record in records)
+
+
+def iter_gzip(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Gzip a chunk stream on the fly for ``Content-Encoding: gzip`` responses."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31: gzip header and trailer
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class IntervalIndex:
+    """Static overlap index over half-open integer intervals ``[start, end)``.
+
+    An implicit augmented interval tree laid out over arrays sorted by
+    start, after cgranges: node ``i`` at level ``k`` (``k`` trailing one bits)
+    has children ``i -/+ 2**(k-1)`` and ``max_end[i]`` bounds its subtree.
+    Built in O(n log n) with one NumPy pass per level; an overlap query
+    costs O(log n + k) and never scans intervals that cannot overlap.
+
+    ``labels`` tags each interval with an integer (e.g. a voyage number) so
+    one index can answer queries across many voyages. Query results are
+    positions into the arrays passed to the constructor.
+    """
+
+    def __init__(
+        self,
+        starts: Sequence[int],
+        ends: Sequence[int],
+        labels: Optional[Sequence[int]] = None,
+    ) -> None:
+        starts = np.asarray(starts, dtype=np.int64)
+        ends = np.asarray(ends, dtype=np.int64)
+        if starts.shape != ends.shape:
+            raise ValueError("starts and ends must have the same length")
+        self._order = np.argsort(starts, kind="stable")
+        self.starts = starts[self._order]
+        self.ends = ends[self._order]
+        self.labels = None if labels is None else np.asarray(labels, dtype=np.int64)[self._order]
+        self._max_end, self._max_level = self._build(self.starts, self.ends)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @staticmethod
+    def _build(starts: np.ndarray, ends: np.ndarray) -> Tuple[np.ndarray, int]:
+        n = len(starts)
+        max_end = ends.copy()
+        if n == 0:
+            return max_end, -1
+        last_i = (n - 1) & ~1  # last leaf
+        last = int(max_end[last_i])
+        k = 1
+        while (1 << k) <= n:
+            x = 1 << (k - 1)
+            nodes = np.arange((x << 1) - 1, n, x << 2)
+            if len(nodes):
+                left = max_end[nodes - x]
+                right_idx = nodes + x
+                right = np.where(right_idx < n, max_end[np.minimum(right_idx, n - 1)], last)
+                max_end[nodes] = np.maximum(ends[nodes], np.maximum(left, right))
+            # Walk last_i up to its parent so nodes past the end see the true maximum
+            last_i = last_i - x if (last_i >> k) & 1 else last_i + x
+            if last_i < n and max_end[last_i] > last:
+                last = int(max_end[last_i])
+            k += 1
+        return max_end, k - 1
+
+    def _sorted_hits(self, start: int, end: int) -> Iterator[int]:
+        """Sorted-array positions of intervals overlapping [start, end)."""
+        n = len(self.starts)
+        if n == 0:
+            return
+        starts, ends, max_end = self.starts, self.ends, self._max_end
+        stack: List[Tuple[int, int, bool]] = [(self._max_level, (1 << self._max_level) - 1, False)]
+        while stack:
+            k, x, left_done = stack.pop()
+            if k <= 3:
+                # Small subtree: scan it directly
+                i0 = x >> k << k
+                i1 = min(i0 + (1 << (k + 1)) - 1, n)
+                i = i0
+                while i < i1 and starts[i] < end:
+                    if start < ends[i]:
+                        yield i
+                    i += 1
+            elif not left_done:
+                y = x - (1 << (k - 1))
+                stack.append((k, x, True))
+                if y >= n or max_end[y] > start:
+                    stack.append((k - 1, y, False))
+            elif x < n and starts[x] < end:
+                if start < ends[x]:
+                    yield x
+                stack.append((k - 1, x + (1 << (k - 1)), False))
+
+    def overlapping(self, start: int, end: int, label: Optional[int] = None) -> np.ndarray:
+        """Positions of intervals overlapping [start, end), optionally for one label only."""
+        hits = np.fromiter(self._sorted_hits(int(start), int(end)), dtype=np.int64)
+        if label is not None and self.labels is not None:
+            hits = hits[self.labels[hits] == label]
+        return np.sort(self._order[hits])
+
+    def overlap_pairs(self, other: "IntervalIndex", same_label: bool = True) -> np.ndarray:
+        """``(i, j)`` position pairs where interval i of ``other`` overlaps interval j of this index.
+
+        With ``same_label`` only pairs that share a label (voyage) are kept.
+        Probes are the intervals of ``other``, so pass the smaller set there.
+        """
+        pairs: List[Tuple[int, int]] = []
+        for pos in range(len(other)):
+            hits = np.fromiter(
+                self._sorted_hits(int(other.starts[pos]), int(other.ends[pos])), dtype=np.int64
+            )
+            if same_label and self.labels is not None and other.labels is not None:
+                hits = hits[self.labels[hits] == other.labels[pos]]
+            probe = int(other._order[pos])
+            pairs.extend((probe, int(j)) for j in self._order[hits])
+        pairs.sort()
+        return np.array(pairs, dtype=np.int64).reshape(-1, 2)
@@ -1,10 +1,23 @@
 from __future__ import annotations
 
-import io
-from typing import Optional
+import os
+from typing import Any, Callable, Dict, List, Optional, Union
 
-from docx import Document
-from app.services.ocr_service import OCRService
+from app.services.metrics import count, stage
+from app.services.ocr_service import OCRService, join_pages
+from app.services.result_cache import get_result_cache, make_cache_key
+from app.utils.upload_spool import SpooledDocument, as_document
+
+Source = Union[bytes, SpooledDocument]
+
+
+def document_cache_key(source: Source, filename: str) -> str:
+    """Content-addressed key: file hash plus the extension and OCR settings."""
+    settings = {"ext": os.path.splitext(filename.lower())[1], "ocr": OCRService.cache_settings()}
+    if isinstance(source, SpooledDocument):
+        # Reuse the hash taken while spooling instead of rereading the file
+        return make_cache_key(source.digest(), settings)
+    return make_cache_key(source, settings)
 
 
 def bytes_to_text(file_bytes: bytes, filename: str) -> str:
@@ -12,44 +25,147 @@ def bytes_to_text(file_bytes: bytes, filename: str) -> str:
     
     Supports:
     - .txt: Direct text extraction
-    - .pdf: OCR using Tesseract
+    - .pdf: Embedded text layer where present, OCR using Tesseract otherwise
     - .docx: python-docx extraction
     - .jpg, .png, .tiff: OCR using Tesseract
+
+    Results are cached by content hash, so resending the same document
+    skips OCR.
     """
+    return extract_document_text(file_bytes, filename)["text"]
+
+
+def extract_document_text(
+    source: Source,
+    filename: str,
+    cache_key: Optional[str] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+    ocr_service: Optional[OCRService] = None,
+) -> Dict[str, Any]:
+    """Cached text extraction with per-page details.
+
+    Returns ``{"text": str, "complete": bool, "pages": [{"page": n, "method": str}]}``
+    where ``method`` says how each page was read (``text_layer``, ``ocr``,
+    ``ocr_cache``, ``text`` or ``docx``); OCR'd pages add the quality-ladder
+    ``tier`` and word ``confidence``. ``cache_key`` lets callers that already hashed
+    the file reuse that key. Incomplete results (empty text or failed
+    pages) may be transient and are never cached. ``progress(done, total)``
+    reports pages as they finish. Pass ``ocr_service`` to reuse one service
+    across many documents. ``source`` is the file's bytes or a
+    SpooledDocument; spooled files are read from disk by each format's
+    reader.
+    """
+    cache = get_result_cache()
+    if cache is None:
+        return _counted_extract(source, filename, progress, ocr_service)
+
+    if cache_key is None:
+        cache_key = document_cache_key(source, filename)
+    cached = cache.get("document", cache_key)
+    if cached is not None:
+        if progress is not None:
+            progress(len(cached["pages"]), len(cached["pages"]))
+        return cached
+
+    document = _counted_extract(source, filename, progress, ocr_service)
+    if document["text"] and document["complete"]:
+        cache.put("document", cache_key, document)
+    return document
+
+
+def _counted_extract(
+    source: Source,
+    filename: str,
+    progress: Optional[Callable[[int, int], None]] = None,
+    ocr_service: Optional[OCRService] = None,
+) -> Dict[str, Any]:
+    """_extract_text plus document, byte and per-method page counters."""
+    document = _extract_text(source, filename, progress, ocr_service)
+    fmt = os.path.splitext(filename.lower())[1].lstrip(".") or "unknown"
+    count("sof_documents_total", format=fmt)
+    count("sof_bytes_processed_total", len(source) if isinstance(source, bytes) else source.size, format=fmt)
+    for page in document["pages"]:
+        count("sof_pages_total", method=page["method"])
+    return document
+
+
+def _document(text: str, complete: bool, pages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {"text": text, "complete": complete, "pages": pages}
+
+
+def _page_info(page: Dict[str, Any]) -> Dict[str, Any]:
+    """Per-page summary: method, plus the OCR ladder tier and confidence or the error when present."""
+    info = {"page": page["page"], "method": page["method"]}
+    for field in ("tier", "confidence", "error"):
+        if page.get(field) not in (None, ""):
+            info[field] = page[field]
+    return info
+
+
+def _extract_text(
+    source: Source,
+    filename: str,
+    progress: Optional[Callable[[int, int], None]] = None,
+    ocr_service: Optional[OCRService] = None,
+) -> Dict[str, Any]:
+    """Extract text by format, reporting completeness and per-page methods."""
     name = filename.lower()
+    document = as_document(source, filename)
+
+    # Only PDFs report page-level progress; everything else is a single page
+    if progress is not None and not name.endswith(".pdf"):
+        progress(0, 1)
+        extracted = _extract_text(document, filename, ocr_service=ocr_service)
+        progress(1, 1)
+        return extracted
     
     # Text files
     if name.endswith(".txt"):
         try:
-            return file_bytes.decode("utf-8", errors="replace")
+            with stage("decode"):
+                text = document.getvalue().decode("utf-8", errors="replace")
+            return _document(text, True, [{"page": 1, "method": "text"}])
         except Exception:
-            return ""
+            return _document("", False, [])
     
-    # PDF files - use OCR
+    # PDF files - text layer per page, OCR for image-only pages
     elif name.endswith(".pdf"):
-        ocr_service = OCRService()
-        return ocr_service.extract_text_from_pdf(file_bytes)
+        ocr_service = ocr_service or OCRService()
+        try:
+            with document.local_path(".pdf") as pdf_path:
+                pages = ocr_service.extract_pages_from_pdf_path(pdf_path, progress)
+        except Exception as e:
+            print(f"OCR extraction failed: {e}")
+            return _document("", False, [])
+        page_info = [_page_info(page) for page in pages]
+        complete = not any(page["error"] for page in pages)
+        return _document(join_pages(pages), complete, page_info)
     
     # Word documents - use python-docx
     elif name.endswith((".docx", ".doc")):
         try:
-            doc = Document(io.BytesIO(file_bytes))
-            text = ""
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
-            return text.strip()
+            from docx import Document
+
+            with stage("decode"), document.open() as stream:
+                doc = Document(stream)
+                text = ""
+                for paragraph in doc.paragraphs:
+                    text += paragraph.text + "\n"
+            return _document(text.strip(), True, [{"page": 1, "method": "docx"}])
         except Exception as e:
             print(f"DOCX extraction failed: {e}")
-            return ""
+            return _document("", False, [])
     
     # Image files - use OCR
     elif name.endswith((".jpg", ".jpeg", ".png", ".tiff", ".bmp")):
-        ocr_service = OCRService()
-        return ocr_service.extract_text_from_image(file_bytes)
+        ocr_service = ocr_service or OCRService()
+        with document.open() as stream:
+            page = ocr_service.extract_page_from_image(stream)
+        return _document(page["text"], True, [_page_info({**page, "page": 1})])
     
     # Unknown format
     else:
         print(f"Unsupported file format: {filename}")
-        return ""
+        return _document("", False, [])
 
 
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Any, BinaryIO, Iterator, Optional, Union
+
+CHUNK_BYTES = 1024 * 1024
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload (or a file inside a batch archive) exceeds its size limit."""
+
+
+class SpooledDocument:
+    """An uploaded document kept in memory when small and in a temp file when large.
+
+    Stages read it as a real file through ``local_path()`` (pdftoppm,
+    PyMuPDF), as a stream through ``open()`` (python-docx, Pillow, blob
+    uploads) or, for small text formats, with ``getvalue()``. The SHA-256
+    is computed while spooling, so nothing rereads the file to hash it.
+
+    Reference counted so background work can outlive the request:
+    ``retain()`` before handing it off, ``close()`` when done. The temp file
+    is removed on the last ``close()``.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        data: Optional[bytes] = None,
+        path: Optional[str] = None,
+        size: int = 0,
+        digest: Any = None,
+    ) -> None:
+        self.filename = filename
+        self._data = data
+        self._path = path
+        self.size = len(data) if data is not None else size
+        self._digest = digest
+        self._refs = 1
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_bytes(cls, data: bytes, filename: str) -> "SpooledDocument":
+        return cls(filename, data=bytes(data))
+
+    @classmethod
+    def from_stream(
+        cls,
+        stream: BinaryIO,
+        filename: str,
+        spool_bytes: int,
+        max_bytes: Optional[int] = None,
+        directory: Optional[str] = None,
+    ) -> "SpooledDocument":
+        """Copy ``stream`` in chunks, moving to a temp file once it passes ``spool_bytes``."""
+        digest = hashlib.sha256()
+        buffer = io.BytesIO()
+        handle = None
+        path = None
+        size = 0
+        try:
+            while True:
+                chunk = stream.read(CHUNK_BYTES)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if max_bytes is not None and size > max_bytes:
+                    raise UploadTooLarge(f"{filename} exceeds the {max_bytes // (1024 * 1024)} MB limit")
+                digest.update(chunk)
+                if handle is None and size > spool_bytes:
+                    fd, path = tempfile.mkstemp(suffix=os.path.splitext(filename)[1], dir=directory)
+                    handle = os.fdopen(fd, "wb")
+                    handle.write(buffer.getbuffer())
+                    buffer = None
+                if handle is not None:
+                    handle.write(chunk)
+                else:
+                    buffer.write(chunk)
+        except BaseException:
+            if handle is not None:
+                handle.close()
+                os.remove(path)
+            raise
+        if handle is not None:
+            handle.close()
+            return cls(filename, path=path, size=size, digest=digest)
+        return cls(filename, data=buffer.getvalue(), digest=digest)
+
+    @property
+    def in_memory(self) -> bool:
+        return self._path is None
+
+    def digest(self) -> Any:
+        """A copy of the running SHA-256 over the content, for keys that extend it."""
+        if self._digest is None:
+            self._digest = hashlib.sha256(self._data)
+        return self._digest.copy()
+
+    @property
+    def sha256(self) -> str:
+        return self.digest().hexdigest()
+
+    def getvalue(self) -> bytes:
+        if self._data is not None:
+            return self._data
+        with open(self._path, "rb") as f:
+            return f.read()
+
+    def open(self) -> BinaryIO:
+        if self._data is not None:
+            return io.BytesIO(self._data)
+        return open(self._path, "rb")
+
+    @contextmanager
+    def local_path(self, suffix: str = "") -> Iterator[str]:
+        """A filesystem path to the content; small in-memory documents get a short-lived temp file."""
+        if self._path is not None:
+            yield self._path
+            return
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(self._data)
+            yield path
+        finally:
+            os.remove(path)
+
+    def retain(self) -> "SpooledDocument":
+        with self._lock:
+            self._refs += 1
+        return self
+
+    def close(self) -> None:
+        with self._lock:
+            self._refs -= 1
+            if self._refs > 0:
+                return
+            path, self._path = self._path, None
+            self._data = b"" if path is not None else self._data
+        if path is not None:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def __enter__(self) -> "SpooledDocument":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def as_document(source: Union[bytes, SpooledDocument], filename: str) -> SpooledDocument:
+    """Wrap raw bytes so callers may pass either form; documents pass through unchanged."""
+    if isinstance(source, SpooledDocument):
+        return source
+    return SpooledDocument.from_bytes(source, filename)
@@ -0,0 +1,199 @@
+"""Synthetic Statement of Facts documents with known events, generated offline.
+
+Lines are built from the parser's own event vocabulary (EVENT_GROUPS), so
+every generated document has a ground truth of the high-confidence events
+the extractor should find. Documents render to TXT, DOCX, PNG and PDF
+(scanned image-only, or born-digital with a text layer) at any page count
+and scan-noise level. Output depends only on the seed.
+
+Write a corpus with a ground-truth manifest:
+
+    python -m benchmarks.corpus --out /tmp/sof-corpus [--pages 1 5 20] [--noise 0 12 30]
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import os
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+# One spelling per alternative in event_matcher.EVENT_GROUPS
+EVENT_PHRASES = [
+    "Cargo loading", "Loading cargo", "Berthing", "Anchoring", "Pilot onboard",
+    "Pilot embarked", "Shifting", "Mooring", "Discharge", "Unloading",
+    "Arrival", "Departure", "Bunkering", "Crew change",
+]
+
+# Lines without event keywords, as found between events on a real SOF
+FILLER_LINES = [
+    "Weather: fine, wind NE 3, sea slight",
+    "Draft on arrival fwd 9.80 m aft 10.40 m",
+    "Holds inspected and passed by surveyor",
+    "Rain stopped work",
+    "Notice of readiness tendered by master",
+    "Free pratique granted",
+    "Hatches opened",
+    "Awaiting shore gang",
+]
+
+HEADER_LINES = [
+    "STATEMENT OF FACTS",
+    "Vessel: MV SYNTHETIC STAR    Voyage: 24{page:02d}",
+    "Port: Port Hedland    Berth: No. 3",
+    "",
+]
+
+PAGE_SIZE = (1240, 1754)  # A4 at 150 DPI
+LINES_PER_PAGE = 40
+
+
+def generate_sof(pages: int = 1, seed: int = 0, lines_per_page: int = LINES_PER_PAGE) -> Dict[str, Any]:
+    """Text of a synthetic SOF with the events the extractor should report.
+
+    Returns ``{"pages": [str], "text": str, "events": [{"name", "start", "end"}]}``;
+    ``events`` lists the high-confidence events in document order.
+    """
+    rng = random.Random(seed)
+    clock = datetime(2025, 7, 1, 6, 0)
+    page_texts: List[str] = []
+    events: List[Dict[str, str]] = []
+    for page in range(pages):
+        lines = [line.format(page=page + 1) for line in HEADER_LINES]
+        for _ in range(lines_per_page - len(lines)):
+            if rng.random() < 0.3:
+                lines.append(rng.choice(FILLER_LINES))
+                continue
+            phrase = rng.choice(EVENT_PHRASES)
+            start = clock + timedelta(minutes=rng.randrange(5, 90, 5))
+            end = start + timedelta(minutes=rng.randrange(10, 240, 5))
+            clock = end
+            times = (start.strftime("%H:%M"), end.strftime("%H:%M"))
+            if rng.random() < 0.5:
+                line = f"{start:%d/%m/%Y}  {phrase} commenced {times[0]} completed {times[1]}"
+            else:
+                line = f"{phrase}  from {times[0]}  to {times[1]}"
+            lines.append(line)
+            events.append({"name": phrase.title(), "start": times[0], "end": times[1]})
+        page_texts.append("\n".join(lines))
+    return {"pages": page_texts, "text": "\n\n".join(page_texts), "events": events}
+
+
+def to_txt(document: Dict[str, Any]) -> bytes:
+    return document["text"].encode("utf-8")
+
+
+def to_docx(document: Dict[str, Any]) -> bytes:
+    from docx import Document
+
+    doc = Document()
+    for number, page in enumerate(document["pages"]):
+        if number:
+            doc.add_page_break()
+        for line in page.split("\n"):
+            doc.add_paragraph(line)
+    out = io.BytesIO()
+    doc.save(out)
+    return out.getvalue()
+
+
+def render_page(
+    text: str,
+    noise: float = 0.0,
+    seed: int = 0,
+    size: Sequence[int] = PAGE_SIZE,
+    skew: float = 0.0,
+) -> Image.Image:
+    """Render page text as a grayscale scan with Gaussian noise of std ``noise`` and ``skew`` degrees."""
+    width, height = size
+    page = Image.new("L", (width, height), 255)
+    draw = ImageDraw.Draw(page)
+    font = ImageFont.load_default(size=max(12, height // 70))
+    line_gap = max(16, (height - height // 10) // LINES_PER_PAGE)
+    y = height // 20
+    for line in text.split("\n"):
+        draw.text((width // 16, y), line, fill=0, font=font)
+        y += line_gap
+    if skew:
+        page = page.rotate(skew, resample=Image.Resampling.BILINEAR, fillcolor=255)
+    if noise:
+        pixels = np.asarray(page, dtype=np.float32)
+        pixels += np.random.default_rng(seed).normal(0, noise, pixels.shape)
+        page = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+    return page
+
+
+def to_png(document: Dict[str, Any], noise: float = 0.0, seed: int = 0, page: int = 0) -> bytes:
+    out = io.BytesIO()
+    render_page(document["pages"][page], noise, seed).save(out, format="PNG")
+    return out.getvalue()
+
+
+def to_pdf(document: Dict[str, Any], noise: float = 0.0, seed: int = 0, text_layer: bool = False) -> bytes:
+    """Scanned (image-only) PDF, or a born-digital one with a text layer."""
+    if text_layer:
+        import fitz
+
+        pdf = fitz.open()
+        for page_text in document["pages"]:
+            page = pdf.new_page(width=595, height=842)
+            page.insert_text((40, 50), page_text, fontsize=9)
+        data = pdf.tobytes()
+        pdf.close()
+        return data
+    images = [render_page(text, noise, seed + i) for i, text in enumerate(document["pages"])]
+    out = io.BytesIO()
+    images[0].save(out, format="PDF", save_all=True, append_images=images[1:], resolution=150)
+    return out.getvalue()
+
+
+def write_corpus(
+    out_dir: str,
+    page_counts: Sequence[int] = (1, 5, 20),
+    noise_levels: Sequence[float] = (0, 12, 30),
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """Write every format at every size and noise level plus ``manifest.json``."""
+    os.makedirs(out_dir, exist_ok=True)
+    files: List[Dict[str, Any]] = []
+
+    def write(name: str, data: bytes, document: Dict[str, Any], noise: Optional[float], pages: int) -> None:
+        with open(os.path.join(out_dir, name), "wb") as f:
+            f.write(data)
+        files.append({"file": name, "pages": pages, "noise": noise, "events": document["events"]})
+
+    for pages in page_counts:
+        document = generate_sof(pages, seed=seed + pages)
+        write(f"sof-{pages}p.txt", to_txt(document), document, None, pages)
+        write(f"sof-{pages}p.docx", to_docx(document), document, None, pages)
+        write(f"sof-{pages}p-text.pdf", to_pdf(document, text_layer=True), document, None, pages)
+        for noise in noise_levels:
+            tag = f"n{int(noise)}"
+            write(f"sof-{pages}p-{tag}.pdf", to_pdf(document, noise, seed), document, noise, pages)
+            if pages == 1:
+                write(f"sof-1p-{tag}.png", to_png(document, noise, seed), document, noise, 1)
+
+    manifest = {"seed": seed, "files": files}
+    with open(os.path.join(out_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 5, 20])
+    parser.add_argument("--noise", type=float, nargs="+", default=[0, 12, 30])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    manifest = write_corpus(args.out, args.pages, args.noise, args.seed)
+    print(f"Wrote {len(manifest['files'])} documents to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Per-page time and allocations of the PIL vs fused NumPy preprocessing pipelines.
+
+Run from the backend directory:
+
+    python -m benchmarks.preprocess_bench [--pages 5] [--width 2480] [--height 3508]
+
+Pillow allocates image memory outside tracemalloc, so allocations are
+reported as the number of full-page images Pillow creates per page
+(``pil_images``) plus the tracemalloc peak of NumPy working buffers
+(``numpy_peak_mb``). ``page_buffers_mb`` combines both, counting each
+Pillow image at one byte per pixel.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import time
+import tracemalloc
+from typing import Any, Callable, Dict
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from app.services.image_preprocess import preprocess_numpy, preprocess_pil
+from app.services.ocr_service import PREPROCESS_PARAMS
+
+
+def make_page(width: int, height: int, seed: int = 0) -> Image.Image:
+    """A noisy RGB scan of SOF-like text lines."""
+    page = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(page)
+    font = ImageFont.load_default(size=max(12, height // 100))
+    line_gap = max(16, height // 64)
+    for i, y in enumerate(range(height // 20, height - height // 20, line_gap)):
+        draw.text((width // 16, y), f"Cargo loading commenced 01/07/2025 {i % 24:02d}:30 completed {i % 24:02d}:55",
+                  fill="black", font=font)
+    noise = np.random.default_rng(seed).normal(0, 12, (height, width, 1))
+    pixels = np.clip(np.asarray(page, dtype=np.float32) + noise, 0, 255).astype(np.uint8)
+    return Image.fromarray(pixels)
+
+
+def measure(func: Callable[..., Image.Image], page: Image.Image, pages: int) -> Dict[str, Any]:
+    func(page, **PREPROCESS_PARAMS)  # warm up
+
+    created = Image.core.get_stats()["new_count"]
+    tracemalloc.start()
+    func(page, **PREPROCESS_PARAMS)
+    _, numpy_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    pil_images = Image.core.get_stats()["new_count"] - created
+
+    timings = []
+    for _ in range(pages):
+        start = time.perf_counter()
+        func(page, **PREPROCESS_PARAMS)
+        timings.append(time.perf_counter() - start)
+
+    mb = 1024 * 1024
+    return {
+        "ms_per_page": round(statistics.median(timings) * 1000, 2),
+        "pil_images": pil_images,
+        "numpy_peak_mb": round(numpy_peak / mb, 2),
+        "page_buffers_mb": round((pil_images * page.width * page.height + numpy_peak) / mb, 2),
+    }
+
+
+def run(pages: int, width: int, height: int) -> Dict[str, Any]:
+    page = make_page(width, height)
+    results: Dict[str, Any] = {
+        "page": {"width": width, "height": height, "pages": pages},
+        "pil": measure(preprocess_pil, page, pages),
+        "numpy": measure(preprocess_numpy, page, pages),
+    }
+    reference = np.asarray(preprocess_pil(page, **PREPROCESS_PARAMS), dtype=np.int16)
+    fused = np.asarray(preprocess_numpy(page, **PREPROCESS_PARAMS), dtype=np.int16)
+    results["mean_abs_diff"] = round(float(np.abs(reference - fused).mean()), 3)
+    results["speedup"] = round(results["pil"]["ms_per_page"] / results["numpy"]["ms_per_page"], 2)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--width", type=int, default=2480, help="A4 at 300 DPI by default")
+    parser.add_argument("--height", type=int, default=3508)
+    args = parser.parse_args()
+    print(json.dumps(run(args.pages, args.width, args.height), indent=2))
+
+
+if __name__ == "__main__":
+    main()
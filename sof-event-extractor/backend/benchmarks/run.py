@@ -0,0 +1,403 @@
+"""Throughput benchmarks for parsing, text extraction, OCR, page cache, preprocessing, export and startup.
+
+Runs offline on the synthetic corpus from benchmarks.corpus. Run from the
+backend directory:
+
+    python -m benchmarks.run [--quick] [--output results.json]
+    python -m benchmarks.run --baseline results.json [--tolerance 0.2]
+
+Every throughput metric ends in ``_per_s`` (higher is better) and every
+latency metric in ``_ms`` (lower is better). With ``--baseline`` each one
+is compared to the same metric in an earlier result file, and the run
+exits with status 1 if any got worse by more than ``--tolerance`` (a
+fraction).
+Timings are the median of ``--repeat`` samples after a warm-up call; calls
+faster than MIN_SAMPLE_SECONDS are looped within a sample. OCR
+is reported as skipped when no Tesseract engine is available.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Sequence
+
+from PIL import Image
+
+from benchmarks.corpus import PAGE_SIZE, generate_sof, render_page, to_docx, to_pdf, to_png, to_txt
+
+
+# Fast calls are looped until one sample takes this long, so timer noise stays small
+MIN_SAMPLE_SECONDS = 0.02
+
+
+def timed(func: Callable[[], Any], repeat: int) -> float:
+    """Median seconds per call over ``repeat`` samples, after a warm-up call."""
+    start = time.perf_counter()
+    func()
+    loops = max(1, int(MIN_SAMPLE_SECONDS / max(time.perf_counter() - start, 1e-9)))
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        timings.append((time.perf_counter() - start) / loops)
+    return statistics.median(timings)
+
+
+def allocated(build: Callable[[], Any]) -> int:
+    """Bytes still allocated once ``build()`` returns, i.e. what its result holds on to."""
+    tracemalloc.start()
+    try:
+        value = build()
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del value
+    return size
+
+
+def recall(found: List[Dict[str, Any]], expected: List[Dict[str, str]]) -> float:
+    """Share of expected (start, end) pairs among the high-confidence events found."""
+    if not expected:
+        return 1.0
+    pairs = {(e["start"], e["end"]) for e in found if e.get("confidence") == "high"}
+    return round(sum((e["start"], e["end"]) in pairs for e in expected) / len(expected), 3)
+
+
+def bench_parsing(page_counts: Sequence[int], repeat: int) -> Dict[str, Any]:
+    from app.parsers.sof_parser import _parse_text
+    from app.parsers.timestamps import normalize_events
+
+    results = {}
+    for pages in page_counts:
+        document = generate_sof(pages, seed=pages)
+        text = document["text"]
+
+        def parse():
+            return normalize_events(_parse_text(text, "bench.txt")["events"])
+
+        seconds = timed(parse, repeat)
+        results[f"{pages}p"] = {
+            "pages_per_s": round(pages / seconds, 1),
+            "mb_per_s": round(len(text.encode()) / seconds / 1e6, 2),
+            "recall": recall(_parse_text(text, "bench.txt")["events"], document["events"]),
+        }
+    return results
+
+
+def bench_extraction(page_counts: Sequence[int], repeat: int) -> Dict[str, Any]:
+    """Document bytes to text for formats that need no OCR (cache bypassed)."""
+    from app.utils.text_extract import _extract_text
+
+    results: Dict[str, Any] = {}
+    for pages in page_counts:
+        document = generate_sof(pages, seed=pages)
+        files = {
+            "txt": (to_txt(document), "bench.txt"),
+            "docx": (to_docx(document), "bench.docx"),
+            "pdf_text_layer": (to_pdf(document, text_layer=True), "bench.pdf"),
+        }
+        for fmt, (data, name) in files.items():
+            seconds = timed(lambda: _extract_text(data, name), repeat)
+            results.setdefault(fmt, {})[f"{pages}p"] = {"pages_per_s": round(pages / seconds, 1)}
+    return results
+
+
+def _ocr_unavailable() -> str | None:
+    from app.services.ocr_service import get_ocr_backend
+
+    try:
+        get_ocr_backend().image_to_string(Image.new("L", (64, 32), 255))
+    except Exception as exc:
+        return f"{type(exc).__name__}: {exc}"
+    return None
+
+
+def bench_ocr(noise_levels: Sequence[float], repeat: int) -> Dict[str, Any]:
+    """Single-page image OCR per noise level, with event recall against the ground truth."""
+    reason = _ocr_unavailable()
+    if reason is not None:
+        return {"skipped": reason}
+
+    from app.parsers.event_matcher import match_events
+    from app.services.ocr_service import OCRService
+
+    service = OCRService()
+    document = generate_sof(1, seed=1)
+    results: Dict[str, Any] = {"backend": service.backend.name}
+    for noise in noise_levels:
+        png = to_png(document, noise, seed=1)
+        seconds = timed(lambda: service.extract_text_from_image(png), repeat)
+        text = service.extract_text_from_image(png)
+        results[f"noise{int(noise)}"] = {
+            "pages_per_s": round(1 / seconds, 3),
+            "recall": recall(match_events(text), document["events"]),
+        }
+    results.update(bench_ocr_ladder(noise_levels[-1], repeat))
+    return results
+
+
+def bench_ocr_ladder(noise: float, repeat: int) -> Dict[str, Any]:
+    """Scanned-PDF throughput and recall with the OCR quality ladder on and off, plus tiers used."""
+    from collections import Counter
+
+    from app.parsers.event_matcher import match_events
+    from app.services.ocr_service import OCRService, join_pages
+
+    document = generate_sof(4, seed=2)
+    pdf = to_pdf(document, noise, seed=2)
+    previous = os.environ.get("OCR_LADDER")
+    results: Dict[str, Any] = {}
+    try:
+        for label, ladder in (("pdf_ladder", "1"), ("pdf_standard", "0")):
+            os.environ["OCR_LADDER"] = ladder
+            service = OCRService()
+            try:
+                seconds = timed(lambda: service.extract_pages_from_pdf(pdf), repeat)
+            except Exception as exc:
+                return {"pdf_ladder": {"skipped": f"{type(exc).__name__}: {exc}"}}
+            pages = service.extract_pages_from_pdf(pdf)
+            results[label] = {
+                "pages_per_s": round(len(pages) / seconds, 3),
+                "recall": recall(match_events(join_pages(pages)), document["events"]),
+                "tiers": dict(Counter(page.get("tier") for page in pages)),
+            }
+    finally:
+        if previous is None:
+            os.environ.pop("OCR_LADDER", None)
+        else:
+            os.environ["OCR_LADDER"] = previous
+    return results
+
+
+def bench_page_cache(entries: int, repeat: int) -> Dict[str, Any]:
+    """Page OCR cache lookup cost with ``entries`` stored pages, and which look-alike pages match.
+
+    A hit replaces a Tesseract call, so what matters is the lookup overhead
+    and that only an identical page hits: every copy of the first page with
+    one digit of a time or the year changed, rendered at body-text font
+    sizes, must miss, and so must a noisy rescan.
+    """
+    import re
+    import tempfile
+
+    from app.services.ocr_service import OCRService
+    from app.services.page_cache import PageOCRCache
+
+    service = OCRService(use_page_cache=False)
+    pages = generate_sof(entries, seed=11)["pages"]
+    first = pages[0]
+    # One-digit edits: the last digit of each time and of each year on the page
+    digits = [m.end() - 1 for m in re.finditer(r"\d\d:\d\d|\b20\d\d\b", first)]
+    edits = [first[:i] + ("1" if first[i] != "1" else "2") + first[i + 1:] for i in digits]
+    # Font size follows page height (height // 70): about 12, 14 and 16 px, then the default
+    sizes = [(600, 840), (700, 980), (800, 1120), PAGE_SIZE]
+    with tempfile.TemporaryDirectory() as directory:
+        cache = PageOCRCache(os.path.join(directory, "pages.db"), max_entries=entries + len(sizes))
+        for text in pages:
+            cache.put(cache.key(service._preprocess_image(render_page(text)), "bench"), text)
+        for size in sizes[:-1]:
+            cache.put(cache.key(service._preprocess_image(render_page(first, size=size)), "bench"), first)
+        page = service._preprocess_image(render_page(first))
+        page_key = cache.key(page, "bench")
+        rescan = cache.key(service._preprocess_image(render_page(first, noise=12, seed=5)), "bench")
+        edited = [
+            cache.key(service._preprocess_image(render_page(text, size=size)), "bench")
+            for text in edits
+            for size in sizes
+        ]
+        results = {
+            "entries": entries,
+            "key_ms": round(timed(lambda: cache.key(page, "bench"), repeat) * 1000, 3),
+            "hit_ms": round(timed(lambda: cache.get(page_key), repeat) * 1000, 3),
+            "miss_ms": round(timed(lambda: cache.get(rescan), repeat) * 1000, 3),
+            "identical_hits": cache.get(page_key) == first,
+            "rescan_hits": cache.get(rescan) is not None,
+            "changed_digit_pages": len(edited),
+            "changed_digit_hits": sum(cache.get(key) is not None for key in edited),
+        }
+        cache.close()
+    return results
+
+
+def bench_preprocess(noise_levels: Sequence[float], repeat: int) -> Dict[str, Any]:
+    from benchmarks.preprocess_bench import measure
+    from app.services.image_preprocess import preprocess_numpy, preprocess_pil
+
+    document = generate_sof(1, seed=1)
+    results: Dict[str, Any] = {}
+    for noise in noise_levels:
+        page = render_page(document["pages"][0], noise, seed=1).convert("RGB")
+        for name, func in (("pil", preprocess_pil), ("numpy", preprocess_numpy)):
+            stats = measure(func, page, repeat)
+            results.setdefault(name, {})[f"noise{int(noise)}"] = {
+                "pages_per_s": round(1000 / stats["ms_per_page"], 2),
+                "page_buffers_mb": stats["page_buffers_mb"],
+            }
+    return results
+
+
+def bench_export(event_count: int, repeat: int) -> Dict[str, Any]:
+    """Export throughput from event dicts and from an EventTable, and what each representation holds."""
+    from app.parsers.event_table import EventTable
+    from app.parsers.timestamps import normalize_events
+    from app.utils.export_stream import iter_csv, iter_json, iter_ndjson
+
+    pages = max(1, event_count // 25)
+    events = normalize_events(generate_sof(pages, seed=7)["events"])
+    table = EventTable.from_dicts(events)
+    fields = ["name", "start", "end", "start_ts", "end_ts"]
+    exporters = {
+        "csv": lambda: sum(map(len, iter_csv(events, fields))),
+        "json": lambda: sum(map(len, iter_json({"events": events}))),
+        "ndjson": lambda: sum(map(len, iter_ndjson(events))),
+        "table_csv": lambda: sum(map(len, table.iter_csv(fields))),
+        "table_json": lambda: sum(map(len, table.iter_json())),
+    }
+    results: Dict[str, Any] = {
+        "events": len(events),
+        "bytes_per_event": {
+            "dicts": round(allocated(lambda: [dict(event) for event in events]) / len(events), 1),
+            "table": round(allocated(lambda: EventTable.from_dicts(events)) / len(events), 1),
+        },
+    }
+    for fmt, export in exporters.items():
+        seconds = timed(export, repeat)
+        results[fmt] = {
+            "events_per_s": round(len(events) / seconds),
+            "mb_per_s": round(export() / seconds / 1e6, 2),
+        }
+    return results
+
+
+# Run in a fresh interpreter: import cost only shows on a cold start
+_STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from app import create_app
+app = create_app()
+elapsed = time.perf_counter() - start
+heavy = ("numpy", "PIL", "fitz", "pytesseract", "pdf2image", "docx", "azure.storage.blob", "pyodbc", "pyarrow")
+print(json.dumps({"ms": elapsed * 1000, "loaded": [m for m in heavy if m in sys.modules]}))
+"""
+
+
+def bench_startup(repeat: int) -> Dict[str, Any]:
+    """Cold ``create_app()`` time, with and without WARMUP_ON_START, in fresh interpreters."""
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    def cold_start(warm: bool) -> Dict[str, Any]:
+        env = {**os.environ, "WARMUP_ON_START": "1" if warm else "0", "PYTHONDONTWRITEBYTECODE": "1"}
+        out = subprocess.run(
+            [sys.executable, "-c", _STARTUP_SCRIPT], cwd=backend_dir, env=env,
+            capture_output=True, text=True, check=True,
+        ).stdout
+        return json.loads(out.strip().splitlines()[-1])
+
+    results: Dict[str, Any] = {}
+    for label, warm in (("create_app", False), ("create_app_warm", True)):
+        runs = [cold_start(warm) for _ in range(max(3, repeat))]
+        results[label] = {
+            "import_ms": round(statistics.median(run["ms"] for run in runs), 1),
+            "heavy_modules_loaded": runs[-1]["loaded"],
+        }
+    return results
+
+
+BENCHMARKS = ["parsing", "extraction", "ocr", "page_cache", "preprocess", "export", "startup"]
+
+
+def run(only: Sequence[str] = BENCHMARKS, quick: bool = False, repeat: int = 5) -> Dict[str, Any]:
+    page_counts = (1, 5) if quick else (1, 5, 20)
+    noise_levels = (0, 20) if quick else (0, 12, 30)
+    suites: Dict[str, Callable[[], Dict[str, Any]]] = {
+        "parsing": lambda: bench_parsing(page_counts, repeat),
+        "extraction": lambda: bench_extraction(page_counts, repeat),
+        "ocr": lambda: bench_ocr(noise_levels, max(1, repeat // 2)),
+        "page_cache": lambda: bench_page_cache(50 if quick else 200, repeat),
+        "preprocess": lambda: bench_preprocess(noise_levels, repeat),
+        "export": lambda: bench_export(2_000 if quick else 20_000, repeat),
+        "startup": lambda: bench_startup(repeat),
+    }
+    results: Dict[str, Any] = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "quick": quick,
+            "repeat": repeat,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "benchmarks": {},
+    }
+    for name in only:
+        results["benchmarks"][name] = suites[name]()
+    return results
+
+
+def throughput_metrics(results: Dict[str, Any]) -> Dict[str, float]:
+    """Flatten to ``{"parsing.5p.pages_per_s": value}`` for every ``*_per_s`` and ``*_ms`` metric."""
+    flat: Dict[str, float] = {}
+
+    def walk(node: Any, path: str) -> None:
+        if isinstance(node, dict):
+            for key, value in node.items():
+                walk(value, f"{path}.{key}" if path else key)
+        elif path.endswith(("_per_s", "_ms")) and isinstance(node, (int, float)):
+            flat[path] = float(node)
+
+    walk(results.get("benchmarks", {}), "")
+    return flat
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Regressions: metrics present in both runs that got more than ``tolerance`` worse."""
+    current = throughput_metrics(results)
+    regressions = []
+    for metric, before in throughput_metrics(baseline).items():
+        after = current.get(metric)
+        if after is None or before <= 0 or after <= 0:
+            continue
+        # Relative loss in throughput; for latencies the relative slowdown
+        change = after / before - 1 if metric.endswith("_per_s") else before / after - 1
+        if change < -tolerance:
+            regressions.append(f"{metric}: {before:g} -> {after:g} ({change:+.0%})")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=BENCHMARKS)
+    parser.add_argument("--quick", action="store_true", help="smaller corpus for CI smoke runs")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="earlier results JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed throughput drop, e.g. 0.2 = 20%%")
+    args = parser.parse_args()
+
+    # Measure the work itself, not result- or page-cache hits
+    os.environ["RESULT_CACHE_ENABLED"] = "0"
+    os.environ["OCR_PAGE_CACHE_ENABLED"] = "0"
+    results = run(args.only, args.quick, args.repeat)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        results["regressions"] = regressions
+    report = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report + "\n")
+    print(report)
+    if args.baseline and results["regressions"]:
+        print(f"{len(results['regressions'])} benchmark(s) regressed beyond {args.tolerance:.0%}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Batch uploads (POST /api/batch) through the Flask app."""
+import io
+import json
+import zipfile
+
+import pytest
+
+from app import create_app, routes
+
+SOF = b"Commenced loading 01/07/2025 08:00 - 12:30\nShifting 13:00 14:00\n"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("RESULT_CACHE_ENABLED", "0")
+    monkeypatch.setattr(routes, "get_blob_uploader", lambda: None)
+    return create_app().test_client()
+
+
+def _zip(members, corrupt=()):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    data = bytearray(buffer.getvalue())
+    with zipfile.ZipFile(io.BytesIO(bytes(data))) as archive:
+        for name in corrupt:
+            info = archive.getinfo(name)
+            # Flip a byte of the member's compressed data so its CRC check fails
+            offset = info.header_offset + 30 + len(info.filename.encode()) + len(info.extra) + 2
+            data[offset] ^= 0xFF
+    return bytes(data)
+
+
+def test_zip_batch_reports_each_file_and_a_summary(client, monkeypatch):
+    monkeypatch.setenv("UPLOAD_MAX_MB", "1")
+    archive = _zip(
+        {
+            "a.txt": SOF,
+            "b.txt": SOF.replace(b"Shifting", b"Berthing"),
+            "big.txt": b"x" * (1024 * 1024 + 1),
+            "broken.txt": SOF * 50,
+            "__MACOSX/._a.txt": b"metadata",
+        },
+        corrupt=["broken.txt"],
+    )
+    response = client.post("/api/batch", data={"files": (io.BytesIO(archive), "sofs.zip")})
+    assert response.status_code == 200 and response.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+    *files, summary = lines
+    assert summary == {"summary": {"files": 4, "extracted": 2, "failed": 2}}
+    by_name = {line["filename"]: line for line in files}
+    assert sorted(by_name) == ["a.txt", "b.txt", "big.txt", "broken.txt"]
+    assert sorted(line["index"] for line in files) == [0, 1, 2, 3]
+    assert "size limit" in by_name["big.txt"]["error"]
+    assert "CRC" in by_name["broken.txt"]["error"]
+    assert by_name["b.txt"]["result"]["events"][1]["name"] == "Berthing"
+    assert by_name["a.txt"]["document_id"] != by_name["b.txt"]["document_id"]
+
+
+def test_batch_rejects_a_corrupt_archive(client):
+    response = client.post("/api/batch", data={"files": (io.BytesIO(b"PK\x03\x04 not a zip"), "sofs.zip")})
+    assert response.status_code == 400
@@ -0,0 +1,119 @@
+"""Blob upload path against an in-memory stand-in for the storage account
+(same client surface as BlobServiceClient, as with Azurite)."""
+import io
+import os
+import threading
+
+from app.services.blob_service import BlobUploader, BlobUploadQueue
+from app.utils.upload_spool import SpooledDocument
+
+
+class FakeContainer:
+    def __init__(self, account, name):
+        self.account = account
+        self.name = name
+
+    def exists(self):
+        self.account.exists_calls += 1
+        return self.name in self.account.containers
+
+    def create_container(self):
+        self.account.containers[self.name] = {}
+
+
+class FakeBlob:
+    def __init__(self, account, container, blob):
+        self.account = account
+        self.container = container
+        self.blob = blob
+
+    def upload_blob(self, data, overwrite=False, max_concurrency=1, length=None):
+        with self.account.lock:
+            if self.account.failures > 0:
+                self.account.failures -= 1
+                raise ConnectionError("transient")
+            if hasattr(data, "read"):
+                data = data.read(length)
+            self.account.containers[self.container][self.blob] = bytes(data)
+            self.account.concurrency.append(max_concurrency)
+
+
+class FakeAccount:
+    def __init__(self, failures=0):
+        self.containers = {}
+        self.exists_calls = 0
+        self.failures = failures
+        self.concurrency = []
+        self.lock = threading.Lock()
+
+    def get_container_client(self, name):
+        return FakeContainer(self, name)
+
+    def get_blob_client(self, container, blob):
+        return FakeBlob(self, container, blob)
+
+
+def test_container_checked_once_across_uploads():
+    account = FakeAccount()
+    uploader = BlobUploader(None, "files", client=account)
+    names = [uploader.upload_bytes(b"sof", f"doc{i}.pdf") for i in range(5)]
+    assert account.exists_calls == 1
+    assert sorted(account.containers["files"]) == sorted(names)
+
+
+def test_large_files_use_concurrent_block_upload():
+    account = FakeAccount()
+    uploader = BlobUploader(None, "files", client=account, max_concurrency=6, single_put_bytes=1024)
+    uploader.upload_bytes(b"x" * 100, "small.txt")
+    uploader.upload_bytes(b"x" * 4096, "large.pdf")
+    assert account.concurrency == [1, 6]
+
+
+def test_queue_retries_transient_failures():
+    account = FakeAccount(failures=2)
+    queue = BlobUploadQueue(BlobUploader(None, "files", client=account), retries=3, backoff_seconds=0.001)
+    name = queue.upload_bytes(b"sof", "doc.pdf")
+    assert queue.wait(5)
+    assert queue.status(name) == {"status": "uploaded", "attempts": 3}
+    assert account.containers["files"][name] == b"sof"
+
+
+def test_queue_records_failure_after_retries():
+    account = FakeAccount(failures=10)
+    queue = BlobUploadQueue(BlobUploader(None, "files", client=account), retries=1, backoff_seconds=0.001)
+    name = queue.upload_bytes(b"sof", "doc.pdf")
+    assert queue.wait(5)
+    status = queue.status(name)
+    assert status["status"] == "failed" and status["attempts"] == 2
+    assert name not in account.containers.get("files", {})
+
+
+def test_queue_uploads_inline_when_full():
+    account = FakeAccount()
+    queue = BlobUploadQueue(BlobUploader(None, "files", client=account), max_pending=0)
+    name = queue.upload_bytes(b"sof", "doc.pdf")
+    # No worker involved: the upload finished before upload_bytes returned
+    assert queue.status(name)["status"] == "uploaded"
+    assert queue.stats()["pending"] == 0
+
+
+def test_spooled_document_streams_from_disk():
+    account = FakeAccount()
+    uploader = BlobUploader(None, "files", client=account, max_concurrency=6, single_put_bytes=1024)
+    document = SpooledDocument.from_stream(io.BytesIO(b"x" * 4096), "large.pdf", spool_bytes=1024)
+    name = uploader.upload_document(document)
+    document.close()
+    assert account.containers["files"][name] == b"x" * 4096
+    assert account.concurrency == [6]
+
+
+def test_queue_keeps_spooled_file_until_uploaded():
+    account = FakeAccount(failures=1)
+    queue = BlobUploadQueue(BlobUploader(None, "files", client=account), retries=2, backoff_seconds=0.01)
+    document = SpooledDocument.from_stream(io.BytesIO(b"sof" * 1000), "doc.pdf", spool_bytes=100)
+    path = document._path
+    name = queue.upload_document(document)
+    document.close()  # the request is done; the queued upload still holds the file
+    assert queue.wait(5)
+    assert account.containers["files"][name] == b"sof" * 1000
+    assert not os.path.exists(path)
@@ -0,0 +1,189 @@
+"""Parity tests: the compiled matcher must emit exactly what the original
+per-line regex extractors did. The legacy implementations are frozen
+below as the reference."""
+import random
+import re
+
+import pytest
+
+from app.parsers import sof_parser
+from app.parsers.event_matcher import enhanced_events, fallback_events, match_events
+
+
+# --- Frozen reference implementations -------------------------------------
+
+def legacy_enhanced(text):
+    events = []
+    event_patterns = [
+        r'(cargo\s+loading|loading\s+cargo).*?(\d{1,2}:\d{2}).*?(\d{1,2}:\d{2})',
+        r'(berthing|anchoring).*?(\d{1,2}:\d{2}).*?(\d{1,2}:\d{2})',
+        r'(pilot\s+onboard|pilot\s+embarked).*?(\d{1,2}:\d{2}).*?(\d{1,2}:\d{2})',
+        r'(shifting|mooring).*?(\d{1,2}:\d{2}).*?(\d{1,2}:\d{2})',
+        r'(discharge|unloading).*?(\d{1,2}:\d{2}).*?(\d{1,2}:\d{2})',
+        r'(arrival|departure).*?(\d{1,2}:\d{2}).*?(\d{1,2}:\d{2})',
+        r'(bunkering|crew\s+change).*?(\d{1,2}:\d{2}).*?(\d{1,2}:\d{2})',
+    ]
+    date_patterns = [
+        r'\d{1,2}/\d{1,2}/\d{2,4}',
+        r'\d{4}-\d{2}-\d{2}',
+        r'\d{1,2}-\d{1,2}-\d{2,4}',
+    ]
+    maritime_keywords = [
+        "loading", "unloading", "berthing", "anchorage", "shifting",
+        "cargo", "discharge", "arrival", "departure", "pilot", "tug",
+        "mooring", "unmooring", "bunkering", "crew"
+    ]
+    for line in text.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        for pattern in event_patterns:
+            for match in re.findall(pattern, line, re.IGNORECASE):
+                events.append({"name": match[0].title(), "start": match[1], "end": match[2], "confidence": "high"})
+        dates = []
+        for date_pattern in date_patterns:
+            dates.extend(re.findall(date_pattern, line))
+        if dates:
+            times = re.findall(r'\d{1,2}:\d{2}', line)
+            if len(times) >= 2 and any(k in line.lower() for k in maritime_keywords):
+                events.append({"name": line[:100], "start": times[0], "end": times[1], "confidence": "medium"})
+    return events
+
+
+LEGACY_KEYWORDS = [
+    "loading", "berthing", "anchorage", "shifting", "unloading",
+    "cargo", "discharge", "arrival", "departure", "pilot", "tug",
+    "mooring", "unmooring", "bunkering", "crew change"
+]
+
+LEGACY_TIME_PATTERN = re.compile(
+    r"((\d{1,2}:\d{2})|((\d{1,2}[/-]\d{1,2}[/-]\d{2,4})\s+\d{1,2}:\d{2})|(\d{4}-\d{2}-\d{2}\s+\d{1,2}:\d{2}))",
+    re.IGNORECASE,
+)
+
+
+def legacy_fallback(text):
+    results = []
+    for ln in [ln.strip() for ln in text.splitlines() if ln.strip()]:
+        low = ln.lower()
+        if any(k in low for k in LEGACY_KEYWORDS):
+            times = []
+            for m in LEGACY_TIME_PATTERN.findall(ln):
+                candidate = m[0] if isinstance(m, tuple) else m
+                if candidate:
+                    times.append(candidate)
+                if len(times) >= 2:
+                    break
+            results.append({
+                "name": ln,
+                "start": times[0] if len(times) >= 1 else "",
+                "end": times[1] if len(times) >= 2 else "",
+            })
+    return results
+
+
+def legacy_match(text):
+    return legacy_enhanced(text) or legacy_fallback(text)
+
+
+# --- Fixtures ---------------------------------------------------------------
+
+SAMPLE_SOF = """STATEMENT OF FACTS
+Vessel: MV OCEAN STAR   Port: Rotterdam
+--- Page 1 ---
+Arrival at pilot station 01/07/2025 06:00 06:30
+Pilot onboard 06:45 07:10
+Pilot Embarked at 0645 hrs, berthing 07:30 - 09:15
+Anchoring 2025-07-01 10:00 to 2025-07-01 12:30
+Cargo loading commenced 12:45 completed 18:30
+loading cargo 19:00-23:59 and loading cargo 00:10 01:20
+Rain stoppage 14:00 15:30
+UNLOADING 1:05 2:10 discharge 3:15 4:20
+Crew  change 09:00 09:30, bunkering 10:00 10:45
+Shifting / mooring lines 11:00 11:30 12:00 12:30
+Departure 02-07-2025 16:00 16:30
+Tug made fast 01/07/2025 08:00 08:20
+Remarks: nothing further
+"""
+
+EDGE_CASES = [
+    "",
+    "\n\n   \n",
+    "Loading 10:00 - 12:00\nBerthing 01/07/2025 08:30-09:10",
+    "cargo loading 123:456 7:89",
+    "cargo loading 12:345:67",
+    "berthing 1:2 3:45",
+    "berthing 08:30",
+    "pilot onboard pilot embarked 01:00 02:00 03:00 04:00",
+    "unloading cargo 01:00 02:00",
+    "ARRIVAL ARRIVAL 01:00 02:00 03:00",
+    "tug 01/07/25 10:00 11:00",
+    "tug 10:00 11:00",
+    "crew\tchange 05:00 06:00",
+    "Cargo\r\nloading 01:00 02:00\r\n",
+    "Cargo loading 01:00\r02:00 berthing 03:00 04:00",
+    "pilot 01:00\x0b02:00 mooring",
+    "line one cargo 10:00 11:00",
+    "ſhifting 10:00 11:00 01/01/2025",
+    "Keep tug 10:00 11:00 01/01/2025",
+    "Berthing ١٢:٣٠ ١٣:٤٥",
+    "x" * 5000 + " cargo loading " + "1:" * 2000,
+    "Loading " + "12:34 " * 300,
+]
+
+VOCAB = [
+    "cargo", "loading", "Loading", "CARGO", "unloading", "discharge", "berthing",
+    "anchoring", "anchorage", "pilot", "onboard", "embarked", "shifting", "mooring",
+    "unmooring", "arrival", "departure", "bunkering", "crew", "change", "tug",
+    "10:00", "9:15", "23:59", "123:45", "1:2", "01/07/2025", "2025-07-01", "1-7-25",
+    "hrs", "-", "to", "/", ",", "rain", "stoppage", "\t", "  ", "\r", "\r\n", "\n",
+    "commenced", "completed", "08:30", "12:", ":30",
+]
+
+
+def random_text(rng, words=60):
+    parts = []
+    for _ in range(words):
+        parts.append(rng.choice(VOCAB))
+        parts.append(rng.choice([" ", " ", " ", "", "\n"]))
+    return "".join(parts)
+
+
+# --- Tests ------------------------------------------------------------------
+
+@pytest.mark.parametrize("text", [SAMPLE_SOF] + EDGE_CASES)
+def test_parity_on_known_inputs(text):
+    assert enhanced_events(text) == legacy_enhanced(text)
+    assert fallback_events(text) == legacy_fallback(text)
+    assert match_events(text) == legacy_match(text)
+
+
+def test_parity_on_random_inputs():
+    rng = random.Random(20250701)
+    for _ in range(2000):
+        text = random_text(rng, words=rng.randint(1, 80))
+        assert enhanced_events(text) == legacy_enhanced(text), text
+        assert fallback_events(text) == legacy_fallback(text), text
+        assert match_events(text) == legacy_match(text), text
+
+
+def test_sof_parser_wrappers_match_legacy():
+    assert sof_parser._enhanced_regex_extract(SAMPLE_SOF) == legacy_enhanced(SAMPLE_SOF)
+    assert sof_parser._regex_extract(SAMPLE_SOF) == legacy_fallback(SAMPLE_SOF)
+    parsed = sof_parser._parse_text(SAMPLE_SOF, "sof.txt")
+    assert parsed["events"] == legacy_match(SAMPLE_SOF)
+    assert parsed["extraction_method"] == "enhanced_regex"
+
+
+def test_fallback_used_when_no_enhanced_events():
+    text = "Cargo operations resumed\nTug standby 01/07/2025 08:30\nNothing here"
+    assert legacy_enhanced(text) == []
+    assert match_events(text) == legacy_fallback(text)
+    assert match_events(text)[1]["start"] == "01/07/2025 08:30"
+
+
+def test_long_hostile_line_stays_fast():
+    # Keyword followed by a long run of near-miss time tokens used to make
+    # the `.*?` patterns backtrack over the whole line for every hit.
+    line = "cargo loading berthing " * 200 + "1:" * 20000
+    assert enhanced_events(line) == []
@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from app.parsers.event_matcher import match_events
+from app.parsers.event_table import NO_TS, EventTable, dumps
+from app.parsers.timestamps import normalize_events
+from app.services.laytime import compute_laytime
+
+TEXT = "\n".join(
+    [
+        "01/07/2025 Commenced loading 08:00 - 12:30",
+        "Shifting 13:00 14:00",
+        "Unloading 23:00 01:15",
+    ]
+)
+
+
+def test_table_reads_and_serializes_like_event_dicts():
+    table = match_events(TEXT)
+    dicts = table.to_dicts()
+    assert table == dicts and len(table.types) < 2 * len(table)
+    assert table[1] == {"name": "Shifting", "start": "13:00", "end": "14:00", "confidence": "high"}
+    assert table.to_json() == json.dumps(dicts, sort_keys=True, separators=(",", ":"))
+
+    table.normalize()
+    normalized = normalize_events(dicts)
+    assert table == normalized
+    assert table.to_json() == json.dumps(normalized, sort_keys=True, separators=(",", ":"))
+    assert json.loads(dumps({"events": table})) == {"events": normalized}
+    assert b"".join(table.iter_json(chunk_size=16)) == table.to_json().encode()
+    # A disk-cache round trip keeps the resolved timestamps
+    assert EventTable.from_dicts(json.loads(table.to_json())).normalized
+
+
+def test_csv_matches_the_dict_exporter():
+    from app.utils.export_stream import iter_csv
+
+    table = EventTable.from_dicts([{"name": "Rain", "start": "08:00"}, {"name": "Rain", "end": "9:00", "confidence": "low"}])
+    fields = ["name", "start", "end", "confidence", "voyage"]
+    assert b"".join(table.iter_csv(fields)) == b"".join(iter_csv(table.to_dicts(), fields))
+
+
+def test_numpy_columns_are_zero_copy_views():
+    table = match_events(TEXT).normalize()
+    starts, ends = table.timestamps()
+    assert starts.tolist() == [NO_TS if e["start_ts"] is None else e["start_ts"] for e in table]
+    assert [table.types[code] for code in table.type_codes()] == [e["name"] for e in table]
+    with pytest.raises(ValueError):
+        starts[0] = 0
+    # The arrays share the table's buffers, so it cannot grow under them
+    with pytest.raises(BufferError):
+        table.add("Rain", "10:00", "11:00")
+
+
+def test_laytime_accepts_tables_and_dicts_alike():
+    terms = {"allowed_hours": 2, "demurrage_rate": 1000, "start_date": "2025-07-01"}
+    table = match_events(TEXT).normalize()
+    assert compute_laytime(table, terms) == compute_laytime(table.to_dicts(), terms)
@@ -0,0 +1,117 @@
+"""IntervalIndex queries against a linear scan."""
+import random
+
+import numpy as np
+import pytest
+
+from app.services.event_index import EventIndex
+from app.utils.interval_index import IntervalIndex
+
+
+def _scan(starts, ends, start, end, labels=None, label=None):
+    return [
+        i for i, (s, e) in enumerate(zip(starts, ends))
+        if s < end and start < e and (label is None or labels[i] == label)
+    ]
+
+
+def test_empty_index():
+    index = IntervalIndex([], [])
+    assert len(index) == 0
+    assert index.overlapping(0, 10).tolist() == []
+    assert index.overlap_pairs(IntervalIndex([1], [2])).shape == (0, 2)
+
+
+def test_touching_intervals_do_not_overlap():
+    index = IntervalIndex([0, 10, 20], [10, 20, 30])
+    assert index.overlapping(10, 20).tolist() == [1]
+    assert index.overlapping(0, 0).tolist() == []
+    assert index.overlapping(30, 40).tolist() == []
+    assert index.overlapping(9, 11).tolist() == [0, 1]
+
+
+@pytest.mark.parametrize("size", [1, 2, 7, 8, 9, 33, 200, 1000])
+def test_overlapping_matches_linear_scan(size):
+    rng = random.Random(size)
+    starts = [rng.randint(0, 500) for _ in range(size)]
+    # Mix of zero-length, short and long intervals
+    ends = [s + rng.choice([0, 0, 1, rng.randint(1, 20), rng.randint(1, 300)]) for s in starts]
+    labels = [rng.randint(0, 3) for _ in range(size)]
+    index = IntervalIndex(starts, ends, labels)
+    for _ in range(100):
+        a = rng.randint(-10, 520)
+        b = a + rng.choice([0, 1, rng.randint(1, 50), rng.randint(1, 600)])
+        assert index.overlapping(a, b).tolist() == _scan(starts, ends, a, b)
+        label = rng.randint(0, 3)
+        assert index.overlapping(a, b, label).tolist() == _scan(starts, ends, a, b, labels, label)
+    # Query with each interval's own bounds, so touching edges are exercised
+    for s, e in zip(starts, ends):
+        assert index.overlapping(s, e).tolist() == _scan(starts, ends, s, e)
+
+
+def test_random_sweep_over_small_sizes_matches_linear_scan():
+    # Every size up to 130, so each shape of partial tree past the last leaf is built
+    rng = random.Random(130)
+    for size in range(1, 131):
+        for _ in range(40):
+            starts = [rng.randint(0, 250) for _ in range(size)]
+            ends = [s + rng.randint(0, 60) for s in starts]
+            index = IntervalIndex(starts, ends)
+            for _ in range(10):
+                a = rng.randint(-10, 320)
+                b = a + rng.randint(0, 40)
+                assert index.overlapping(a, b).tolist() == _scan(starts, ends, a, b), (size, a, b)
+
+
+def test_overlap_pairs_match_linear_scan():
+    rng = random.Random(5)
+    starts = [rng.randint(0, 300) for _ in range(120)]
+    ends = [s + rng.randint(0, 40) for s in starts]
+    labels = [rng.randint(0, 2) for _ in starts]
+    targets = IntervalIndex(starts, ends, labels)
+    probe_starts = [rng.randint(0, 300) for _ in range(30)]
+    probe_ends = [s + rng.randint(0, 60) for s in probe_starts]
+    probe_labels = [rng.randint(0, 2) for _ in probe_starts]
+    probes = IntervalIndex(probe_starts, probe_ends, probe_labels)
+
+    expected = sorted(
+        (i, j)
+        for i in range(len(probe_starts))
+        for j in _scan(starts, ends, probe_starts[i], probe_ends[i], labels, probe_labels[i])
+    )
+    assert targets.overlap_pairs(probes).tolist() == [list(pair) for pair in expected]
+    unlabelled = sorted(
+        (i, j) for i in range(len(probe_starts)) for j in _scan(starts, ends, probe_starts[i], probe_ends[i])
+    )
+    assert targets.overlap_pairs(probes, same_label=False).tolist() == [list(pair) for pair in unlabelled]
+
+
+def test_mismatched_lengths_are_rejected():
+    with pytest.raises(ValueError):
+        IntervalIndex(np.arange(3), np.arange(2))
+
+
+def test_event_index_window_and_overlaps():
+    voyages = [
+        {"events": [
+            {"name": "Loading", "start": "2025-07-01 08:00", "end": "2025-07-01 20:00"},
+            {"name": "Rain", "start": "2025-07-01 10:00", "end": "2025-07-01 11:30"},
+            {"name": "NOR tendered", "start": "2025-07-01 06:00", "end": ""},
+            {"name": "Remarks", "start": "", "end": ""},
+        ]},
+        {"events": [
+            {"name": "Discharging", "start": "08:00", "end": "12:00"},
+            {"name": "Rain", "start": "12:00", "end": "13:00"},  # touches, does not overlap
+        ], "start_date": "2025-07-01"},
+    ]
+    index = EventIndex(voyages)
+    assert len(index.events) == 5  # the untimed remark is left out
+    day = 1751328000  # 2025-07-01T00:00Z
+    assert [e["name"] for e in index.window(day + 6 * 3600, day + 6 * 3600 + 1)] == ["NOR tendered"]
+    assert [e["name"] for e in index.window(day + 11 * 3600, day + 12 * 3600, voyage=1)] == ["Discharging"]
+    assert len(index.window(day, day + 86400)) == 5
+
+    overlaps = index.overlaps(["rain"], ["loading", "discharg"])
+    assert [(o["voyage"], o["event"]["name"], o["overlaps"]["name"], o["overlap_hours"]) for o in overlaps] == [
+        (0, "Rain", "Loading", 1.5),
+    ]
@@ -0,0 +1,62 @@
+"""Background extraction jobs (POST /api/jobs) through the Flask app."""
+import io
+import threading
+import time
+
+import pytest
+
+from app import create_app, routes
+from app.services import job_queue
+from app.services.job_queue import JobManager
+
+SOF = b"Commenced loading 01/07/2025 08:00 - 12:30\nShifting 13:00 14:00\n"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("RESULT_CACHE_ENABLED", "0")
+    monkeypatch.setattr(routes, "get_blob_uploader", lambda: None)
+    return create_app().test_client()
+
+
+def _wait_for(client, job_id, status):
+    for _ in range(200):
+        job = client.get(f"/api/jobs/{job_id}").get_json()
+        if job["status"] == status:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} never reached {status}: {job}")
+
+
+def test_jobs_queue_then_finish_then_expire(client, monkeypatch):
+    manager = JobManager(workers=1, max_queue=1, ttl_seconds=60)
+    monkeypatch.setattr(routes, "get_job_manager", lambda: manager)
+    release = threading.Event()
+    process = routes._process_upload
+
+    def gated(*args, **kwargs):
+        release.wait(5)
+        return process(*args, **kwargs)
+
+    monkeypatch.setattr(routes, "_process_upload", gated)
+    post = lambda: client.post("/api/jobs", data={"file": (io.BytesIO(SOF), "sof.txt")})
+
+    running = post()
+    queued = post()
+    assert running.status_code == queued.status_code == 202
+    assert queued.headers["Location"].endswith(f"/api/jobs/{queued.get_json()['id']}")
+    _wait_for(client, running.get_json()["id"], "running")
+    assert client.get(f"/api/jobs/{queued.get_json()['id']}").get_json()["status"] == "queued"
+
+    # One running and one waiting: the next upload is shed
+    full = post()
+    assert full.status_code == 503 and full.headers["Retry-After"] == "30"
+
+    release.set()
+    job = _wait_for(client, queued.get_json()["id"], "done")
+    assert [e["name"] for e in job["result"]["result"]["events"]][1] == "Shifting"
+    assert job["progress"]["pages_done"] == job["progress"]["pages_total"] == 1
+
+    later = time.time() + 61
+    monkeypatch.setattr(job_queue.time, "time", lambda: later)
+    assert client.get(f"/api/jobs/{queued.get_json()['id']}").status_code == 404
@@ -0,0 +1,136 @@
+"""Laytime statements: worked examples with hand-computed figures."""
+import pytest
+
+from app import create_app
+from app.services.laytime import compute_laytime, compute_laytime_batch
+
+
+def ev(name, start, end):
+    return {"name": name, "start": start, "end": end}
+
+
+# Tue 1 Jul 08:00 to Wed 2 Jul 20:00 (36 h) with 6 h of rain on the first afternoon
+WORKED = [
+    ev("Loading", "2025-07-01 08:00", "2025-07-02 20:00"),
+    ev("Rain stoppage", "2025-07-01 12:00", "2025-07-01 18:00"),
+]
+
+
+def test_worked_statement():
+    # 4 h counted to 12:00, rain excluded to 18:00, 20 h more exhaust 24 h at 14:00 on day two
+    result = compute_laytime(WORKED, {"allowed_hours": 24, "demurrage_rate": 24000})
+    assert result["commenced"] == "2025-07-01T08:00" and result["completed"] == "2025-07-02T20:00"
+    assert result["elapsed_hours"] == 36
+    assert result["excluded_hours"] == 6
+    assert result["laytime_expired"] == "2025-07-02T14:00"
+    assert result["time_on_demurrage_hours"] == 6
+    assert result["time_used_hours"] == 30
+    assert result["demurrage_due"] == 6000.0 and result["despatch_due"] == 0.0 and result["net_due"] == 6000.0
+    assert result["on_demurrage"] is True
+    assert result["events_used"] == 2 and result["events_skipped"] == 0
+
+
+# Fri 4 Jul 08:00 to Mon 7 Jul 08:00, 72 h across a weekend
+WEEKEND = [ev("Discharging", "2025-07-04 08:00", "2025-07-07 08:00")]
+
+
+def test_shinc_counts_the_weekend_and_shex_excepts_it():
+    shinc = compute_laytime(WEEKEND, {"allowed_hours": 100, "calendar": "SHINC"})
+    assert shinc["time_used_hours"] == 72 and shinc["excluded_hours"] == 0
+
+    shex = compute_laytime(WEEKEND, {"allowed_hours": 100, "calendar": "SHEX"})
+    # Sunday 6 Jul is excepted whole
+    assert shex["excluded_hours"] == 24 and shex["time_used_hours"] == 48
+    assert shex["calendar"] == "SHEX"
+
+    holiday = compute_laytime(WEEKEND, {"allowed_hours": 100, "calendar": "SHEX", "holidays": ["2025-07-05"]})
+    assert holiday["excluded_hours"] == 48 and holiday["time_used_hours"] == 24
+    # Holidays only apply under SHEX
+    assert compute_laytime(WEEKEND, {"allowed_hours": 100, "holidays": ["2025-07-05"]})["excluded_hours"] == 0
+
+
+def test_overlapping_exclusions_are_counted_once():
+    events = [
+        ev("Loading", "2025-07-01 00:00", "2025-07-02 00:00"),
+        ev("Rain", "2025-07-01 06:00", "2025-07-01 10:00"),
+        ev("Breakdown of crane", "2025-07-01 08:00", "2025-07-01 12:00"),
+        ev("Stoppage", "2025-07-01 12:00", "2025-07-01 13:00"),  # touches the previous one
+        ev("Weather delay", "2025-07-01 07:00", "2025-07-01 07:30"),  # inside the rain
+    ]
+    result = compute_laytime(events, {"allowed_hours": 48})
+    assert result["excluded_hours"] == 7  # 06:00-13:00
+    assert result["time_used_hours"] == 17
+
+
+def test_once_on_demurrage_ignores_exclusions_after_expiry():
+    events = [
+        ev("Loading", "2025-07-01 00:00", "2025-07-02 00:00"),
+        ev("Rain", "2025-07-01 12:00", "2025-07-01 16:00"),
+    ]
+    terms = {"allowed_hours": 10, "demurrage_rate": 2400}
+    once = compute_laytime(events, terms)
+    assert once["laytime_expired"] == "2025-07-01T10:00"
+    assert once["excluded_hours"] == 0 and once["time_on_demurrage_hours"] == 14
+    assert once["demurrage_due"] == 1400.0
+
+    always = compute_laytime(events, {**terms, "once_on_demurrage": False})
+    assert always["excluded_hours"] == 4 and always["time_on_demurrage_hours"] == 10
+    assert always["demurrage_due"] == 1000.0
+
+
+def test_despatch_when_finished_early():
+    events = [ev("Cargo loading", "2025-07-01 00:00", "2025-07-02 00:00")]
+    result = compute_laytime(events, {"allowed_hours": 48, "demurrage_rate": 10000})
+    assert result["on_demurrage"] is False and result["laytime_expired"] is None
+    assert result["time_saved_hours"] == 24
+    # Despatch defaults to half the demurrage rate
+    assert result["despatch_due"] == 5000.0 and result["net_due"] == -5000.0
+    explicit = compute_laytime(events, {"allowed_hours": 48, "demurrage_rate": 10000, "despatch_rate": 3000})
+    assert explicit["despatch_due"] == 3000.0
+
+
+def test_explicit_commenced_and_time_only_events():
+    events = [ev("Loading", "08:00", "18:00"), ev("Rain", "10:00", "11:00")]
+    result = compute_laytime(events, {"allowed_hours": 24, "start_date": "2025-07-01", "commenced": "2025-07-01 09:00"})
+    assert result["commenced"] == "2025-07-01T09:00" and result["completed"] == "2025-07-01T18:00"
+    assert result["time_used_hours"] == 8
+
+
+def test_batch_matches_each_voyage_alone():
+    voyages = [
+        {"events": WORKED, "terms": {"allowed_hours": 24, "demurrage_rate": 24000}},
+        {"events": WEEKEND, "terms": {"allowed_hours": 30, "calendar": "SHEX", "demurrage_rate": 5000}},
+        {"events": WEEKEND, "terms": {"allowed_hours": 100, "calendar": "SHEX", "holidays": ["2025-07-05"]}},
+        {"events": WORKED, "terms": {"allowed_hours": 12, "once_on_demurrage": False, "demurrage_rate": 1}},
+        {"events": [], "terms": {"allowed_hours": 24}},
+        {"events": WORKED, "terms": {}},
+    ]
+    batch = compute_laytime_batch(voyages)
+    for voyage, result in zip(voyages, batch):
+        try:
+            alone = compute_laytime(voyage["events"], voyage["terms"])
+        except ValueError as exc:
+            assert result == {"error": str(exc)}
+        else:
+            assert result == alone
+    assert "error" in batch[4] and "allowed_hours" in batch[5]["error"]
+
+
+def test_laytime_endpoint():
+    client = create_app().test_client()
+    response = client.post("/api/laytime", json={"events": WORKED, "terms": {"allowed_hours": 24, "demurrage_rate": 24000}})
+    assert response.status_code == 200 and response.get_json()["demurrage_due"] == 6000.0
+
+    response = client.post("/api/laytime", json={"voyages": [{"events": WORKED, "terms": {"allowed_hours": 24}}, {"events": []}]})
+    results = response.get_json()["results"]
+    assert results[0]["time_used_hours"] == 30 and "error" in results[1]
+
+    assert client.post("/api/laytime", json={"events": WORKED, "terms": {"calendar": "SHINC"}}).status_code == 400
+    assert client.post("/api/laytime", json={"voyages": "nope"}).status_code == 400
+    assert client.post("/api/laytime", data="not json").status_code == 400
+
+
+@pytest.mark.parametrize("terms", [{"allowed_hours": -1}, {"allowed_hours": 1, "calendar": "WWD"}])
+def test_invalid_terms_are_rejected(terms):
+    with pytest.raises(ValueError):
+        compute_laytime(WORKED, terms)
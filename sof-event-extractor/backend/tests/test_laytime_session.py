@@ -0,0 +1,165 @@
+"""Incremental laytime sessions against a from-scratch calculation."""
+import random
+
+import pytest
+
+from app import create_app
+from app.services import laytime_session
+from app.services.laytime import compute_laytime_batch
+from app.services.laytime_session import EVENT_FIELDS, LaytimeSession, _Coverage
+
+NAMES = ["Loading", "Discharging", "Rain", "Breakdown of crane", "Stoppage", "NOR tendered", "Pilot on board", ""]
+
+
+def _stamp(rng):
+    clock = f"{rng.randint(0, 23):02d}:{rng.choice([0, 15, 30, 45]):02d}"
+    # Mostly time-only, as extracted; the rest carry a date in one of the extracted forms
+    form = rng.random()
+    if form < 0.6:
+        return clock
+    if form < 0.8:
+        return f"2025-07-0{rng.randint(1, 6)} {clock}"
+    return f"0{rng.randint(1, 6)}/07/2025 {clock}"
+
+
+def _event(rng):
+    name = rng.choice(NAMES)
+    if rng.random() < 0.1:
+        name += f" on 0{rng.randint(1, 6)}/07/2025"
+    start = _stamp(rng) if rng.random() > 0.1 else ""
+    end = _stamp(rng) if rng.random() > 0.3 else ""
+    return {"name": name, "start": start, "end": end}
+
+
+def _recompute(session):
+    events = [{key: event[key] for key in EVENT_FIELDS} for event in session.snapshot()["events"]]
+    return compute_laytime_batch([{"events": events, "terms": session.terms}])[0]
+
+
+def _comparable(statement):
+    # Both sides report a missing window, in their own words
+    return {"error": True} if "error" in statement else statement
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_random_edits_match_full_recompute(seed):
+    rng = random.Random(seed)
+    terms = {
+        "allowed_hours": rng.choice([6, 24, 40, 72]),
+        "calendar": rng.choice(["SHINC", "SHEX"]),
+        "once_on_demurrage": rng.random() < 0.5,
+        "demurrage_rate": 12000,
+        "holidays": ["2025-07-04"],
+    }
+    if rng.random() < 0.7:
+        terms["start_date"] = "2025-07-01"
+    session = LaytimeSession("doc", [_event(rng) for _ in range(rng.randint(0, 6))], terms)
+    expected = _recompute(session)
+    assert _comparable(session.snapshot()["result"]) == _comparable(expected)
+
+    for _ in range(40):
+        ids = [event["id"] for event in session.snapshot()["events"]]
+        action = rng.choice(["insert", "update", "delete"] if ids else ["insert"])
+        if action == "insert":
+            position = rng.choice([None, rng.randint(0, len(ids))])
+            delta = session.insert(_event(rng), position)
+        elif action == "update":
+            fields = {key: value for key, value in _event(rng).items() if rng.random() < 0.6}
+            delta = session.update(rng.choice(ids), fields)
+        else:
+            delta = session.delete(rng.choice(ids))
+
+        before, expected = expected, _recompute(session)
+        assert delta["action"] == action
+        assert _comparable(session.snapshot()["result"]) == _comparable(expected)
+        if "error" not in before and "error" not in expected:
+            assert delta["changes"] == {
+                key: {"from": before[key], "to": value}
+                for key, value in expected.items() if before[key] != value
+            }
+
+
+def test_time_only_edits_re_resolve_the_events_after_them():
+    terms = {"allowed_hours": 10, "start_date": "2025-07-01"}
+    events = [
+        {"name": "Loading", "start": "08:00", "end": "12:00"},
+        {"name": "Loading", "start": "14:00", "end": "20:00"},
+    ]
+    session = LaytimeSession("doc", events, terms)
+    # The second event now starts before the first, so it rolls over to the next day
+    session.update("1", {"start": "16:00", "end": "18:00"})
+    result = session.snapshot()["result"]
+    assert (result["commenced"], result["completed"]) == ("2025-07-01T16:00", "2025-07-02T20:00")
+    assert result["time_used_hours"] == 28 and result == _recompute(session)
+
+    # A dated stamp in front moves every time-only event after it to that day
+    session.insert({"name": "Loading", "start": "2025-07-03 06:00", "end": ""}, 0)
+    result = session.snapshot()["result"]
+    assert (result["commenced"], result["completed"]) == ("2025-07-03T06:00", "2025-07-04T20:00")
+    assert result == _recompute(session)
+
+    session.delete("3")
+    assert session.snapshot()["result"] == _recompute(session)
+    assert session.snapshot()["result"]["commenced"] == "2025-07-01T16:00"
+
+
+def test_coverage_counts_overlaps_once_and_removes_cleanly():
+    coverage = _Coverage()
+    assert coverage.add(10, 20, +1, 0, 100) == 10
+    assert coverage.add(15, 30, +1, 0, 100) == 10
+    assert coverage.add(20, 25, +1, 0, 100) == 0
+    assert coverage.add(5, 5, +1, 0, 100) == 0
+    assert coverage.covered(0, 100) == 20 and coverage.covered(12, 17) == 5
+    assert coverage.reach(0, 100, 15) == 35  # 10 free before 10, then 5 after 30
+    assert coverage.reach(0, 40, 100) is None
+    assert coverage.add(15, 30, -1, 0, 100) == -5
+    assert coverage.add(20, 25, -1, 0, 100) == -5
+    assert coverage.add(10, 20, -1, 0, 100) == -10
+    assert coverage.points == [] and coverage.counts == []
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(laytime_session, "_store", None)
+    yield create_app().test_client()
+    monkeypatch.setattr(laytime_session, "_store", None)
+
+
+def test_session_routes(client):
+    url = "/api/laytime/sessions/doc-1"
+    assert client.get(url).status_code == 404
+    assert client.delete(url).status_code == 404
+    assert client.post(url + "/events", json={"event": {"name": "Rain"}}).status_code == 404
+    assert client.patch("/api/laytime/sessions/nope/events/1", json={}).status_code == 404
+
+    events = [
+        {"name": "Loading", "start": "2025-07-01 08:00", "end": "2025-07-02 20:00"},
+        {"name": "Rain", "start": "2025-07-01 12:00", "end": "2025-07-01 18:00"},
+    ]
+    opened = client.put(url, json={"events": events, "terms": {"allowed_hours": 24, "demurrage_rate": 24000}})
+    assert opened.status_code == 200
+    body = opened.get_json()
+    assert [event["id"] for event in body["events"]] == ["1", "2"]
+    assert body["result"]["time_on_demurrage_hours"] == 6 and body["result"]["demurrage_due"] == 6000.0
+    assert client.get(url).get_json()["result"] == body["result"]
+
+    inserted = client.post(url + "/events", json={"event": {"name": "Breakdown", "start": "2025-07-02 08:00", "end": "2025-07-02 10:00"}})
+    assert inserted.status_code == 201
+    delta = inserted.get_json()
+    assert delta["action"] == "insert" and delta["event"]["id"] == "3"
+    assert delta["changes"]["excluded_hours"] == {"from": 6, "to": 8}
+    assert delta["changes"]["demurrage_due"] == {"from": 6000.0, "to": 4000.0}
+
+    updated = client.patch(url + "/events/2", json={"end": "14:00"}).get_json()
+    assert updated["changes"]["excluded_hours"] == {"from": 8, "to": 4}
+    deleted = client.delete(url + "/events/3").get_json()
+    assert deleted["changes"]["excluded_hours"] == {"from": 4, "to": 2}
+    assert set(deleted["changes"]) <= set(body["result"])
+
+    assert client.delete(url + "/events/3").status_code == 404
+    assert client.post(url + "/events", json={"position": 0}).status_code == 400
+    assert client.put(url, json={"events": "nope", "terms": {"allowed_hours": 1}}).status_code == 400
+    assert client.put(url, json={"events": events, "terms": {}}).status_code == 400
+
+    assert client.delete(url).status_code == 204
+    assert client.get(url).status_code == 404
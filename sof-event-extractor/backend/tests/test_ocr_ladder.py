@@ -0,0 +1,54 @@
+from PIL import Image
+
+from app.services import ocr_service
+from app.services.ocr_service import OCRService
+
+EVENT_LINE = "Commenced loading 08:00 - 12:30"
+
+
+class LadderBackend:
+    """Confidence by page and pass: the page number and render DPI are encoded in the image width."""
+
+    name = "ladder-fake"
+
+    def __init__(self):
+        self.calls = []
+
+    def image_to_text_with_confidence(self, image, psm=6):
+        dpi, page = divmod(image.width, 10)
+        dpi //= 8
+        self.calls.append((page, dpi, psm))
+        if page == 1:
+            return "Terms and conditions", 92.0
+        if page == 2:
+            return ("Terms and conditions", 90.0) if dpi == 300 else ("Tcrms ond", 40.0)
+        if page == 3:
+            return ("Remarks", 71.0) if psm == 4 else ("Rcmarks", 50.0 if dpi == 300 else 30.0)
+        # Below the threshold on confidence alone, but the parser finds an event
+        return EVENT_LINE, 70.0
+
+
+def test_weak_pages_escalate_and_report_their_tier(monkeypatch):
+    monkeypatch.setenv("OCR_ADAPTIVE_DPI", "0")
+    monkeypatch.setenv("OCR_LADDER", "1")
+    monkeypatch.setenv("OCR_WORKERS", "1")
+    monkeypatch.setenv("PDF_TEXT_LAYER", "0")
+    renders = []
+
+    def convert_from_path(path, dpi=300, first_page=1, last_page=1, **kwargs):
+        renders.append((dpi, list(range(first_page, last_page + 1))))
+        return [Image.new("L", (dpi * 80 + n, 100), 255) for n in range(first_page, last_page + 1)]
+
+    monkeypatch.setattr(ocr_service, "convert_from_path", convert_from_path)
+    monkeypatch.setattr(ocr_service, "pdfinfo_from_path", lambda path: {"Pages": 4})
+    service = OCRService(page_window=4, use_page_cache=False)
+    service.backend = LadderBackend()
+
+    pages = service.extract_pages_from_pdf_path("unused.pdf")
+
+    assert [page["tier"] for page in pages] == ["fast", "standard", "alt_psm", "fast"]
+    assert [page["confidence"] for page in pages] == [92.0, 90.0, 71.0, 70.0]
+    assert pages[1]["text"] == "Terms and conditions"
+    # Only the weak pages were rendered again at full DPI
+    assert renders == [(150, [1, 2, 3, 4]), (300, [2, 3])]
+    assert (3, 300, 4) in service.backend.calls and (2, 300, 4) not in service.backend.calls
@@ -0,0 +1,134 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw, ImageFont
+
+from app.services.ocr_service import OCRService
+from app.services.page_cache import PageOCRCache
+
+TERMS = "\n".join(
+    [
+        "STATEMENT OF FACTS 01/07/2025",
+        "Vessel arrived at anchorage 06:00",
+        "Notice of readiness tendered 07:20",
+        "All fast 09:45",
+        "Commenced loading 11:00",
+        "Completed loading 18:30",
+    ]
+)
+
+
+def render(text, noise=0.0, seed=0, size=28):
+    page = Image.new("L", (1240, 1754), 255)
+    draw = ImageDraw.Draw(page)
+    font = ImageFont.load_default(size=size)
+    for i, line in enumerate(text.split("\n")):
+        draw.text((80, 100 + i * 2 * size), line, fill=0, font=font)
+    if noise:
+        pixels = np.asarray(page, dtype=np.float32)
+        pixels += np.random.default_rng(seed).normal(0, noise, pixels.shape)
+        page = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+    return page
+
+
+def test_identical_page_hits_and_settings_are_part_of_the_key(tmp_path):
+    cache = PageOCRCache(str(tmp_path / "pages.db"))
+    cache.put(cache.key(render(TERMS), "eng"), "terms text")
+    assert cache.get(cache.key(render(TERMS), "eng")) == "terms text"
+    # The same pixels in another mode are the same page
+    assert cache.get(cache.key(render(TERMS).convert("RGB"), "eng")) == "terms text"
+    # A rescan is not identical, so it is OCR'd again rather than risk another page's text
+    assert cache.get(cache.key(render(TERMS, noise=12, seed=3), "eng")) is None
+    # Different OCR settings never share text
+    assert cache.get(cache.key(render(TERMS), "deu")) is None
+
+
+@pytest.mark.parametrize("size", [12, 14, 16, 20, 28])
+@pytest.mark.parametrize("old, new", [
+    ("07:20", "07:28"),
+    ("09:45", "09:46"),
+    ("06:00", "08:00"),
+    ("11:00", "11:01"),
+    ("01/07/2025", "01/07/2026"),
+])
+def test_one_changed_digit_never_hits(tmp_path, size, old, new):
+    cache = PageOCRCache(str(tmp_path / "pages.db"))
+    cache.put(cache.key(render(TERMS, size=size), "eng"), "terms text")
+    assert cache.get(cache.key(render(TERMS.replace(old, new), size=size), "eng")) is None
+    assert cache.get(cache.key(render(TERMS, size=size), "eng")) == "terms text"
+
+
+def test_lru_eviction_and_persisted_index(tmp_path):
+    path = str(tmp_path / "pages.db")
+    cache = PageOCRCache(path, max_entries=2)
+    pages = [render(f"{TERMS}\nRemarks: page {n} " + "x" * 10 * n) for n in range(3)]
+    cache.put(cache.key(pages[0], "eng"), "p0")
+    cache.put(cache.key(pages[1], "eng"), "p1")
+    assert cache.get(cache.key(pages[0], "eng")) == "p0"  # p1 is now least recently used
+    cache.put(cache.key(pages[2], "eng"), "p2")
+    assert cache.stats()["evictions"] == 1
+    cache.close()
+
+    reopened = PageOCRCache(path, max_entries=2)
+    assert reopened.stats()["entries"] == 2
+    assert reopened.get(cache.key(pages[1], "eng")) is None
+    assert reopened.get(cache.key(pages[0], "eng")) == "p0"
+    assert reopened.get(cache.key(pages[2], "eng")) == "p2"
+
+
+def test_instances_sharing_a_file_never_return_another_pages_text(tmp_path):
+    path = str(tmp_path / "pages.db")
+    first, second = PageOCRCache(path), PageOCRCache(path)
+    page_a = first.key(render(TERMS), "eng")
+    page_b = first.key(render(TERMS.replace("11:00", "14:10")), "eng")
+    first.put(page_a, "Loading commenced 11:00")
+    # Another worker clears the file and stores a different page, reusing the row id
+    second.clear()
+    second.put(page_b, "Loading commenced 14:10")
+    assert first.get(page_a) is None
+    assert first.stats()["entries"] == 0  # the stale key is dropped
+    assert first.get(page_b) == "Loading commenced 14:10"
+
+
+def test_eviction_never_deletes_another_instances_page(tmp_path):
+    path = str(tmp_path / "pages.db")
+    first, second = PageOCRCache(path, max_entries=2), PageOCRCache(path, max_entries=2)
+    page_a = first.key(render(TERMS), "eng")
+    page_b = first.key(render(TERMS.replace("11:00", "14:10")), "eng")
+    first.put(page_a, "Loading commenced 11:00")
+    # Another worker clears the file and stores a different page, reusing the row id
+    second.clear()
+    second.put(page_b, "Loading commenced 14:10")
+
+    # Evicting its stale key for page A must not delete page B's row
+    first.put(first.key(render(TERMS + "\nRemarks: one"), "eng"), "one")
+    first.put(first.key(render(TERMS + "\nRemarks: two"), "eng"), "two")
+    assert first.stats()["evictions"] == 1
+    assert second.get(page_b) == "Loading commenced 14:10"
+
+
+class CountingBackend:
+    name = "counting"
+
+    def __init__(self):
+        self.calls = 0
+
+    def image_to_string(self, image, psm=6):
+        self.calls += 1
+        return "Notice of readiness tendered 07:20"
+
+    def image_to_text_with_confidence(self, image, psm=6):
+        return self.image_to_string(image, psm), 95.0
+
+
+def test_ocr_service_skips_tesseract_for_cached_pages(tmp_path):
+    service = OCRService(use_page_cache=False)
+    service.backend = CountingBackend()
+    service.page_cache = PageOCRCache(str(tmp_path / "pages.db"))
+    png = io.BytesIO()
+    render(TERMS).save(png, format="PNG")
+    first = service.extract_text_from_image(png.getvalue())
+    second = service.extract_text_from_image(png.getvalue())
+    assert first == second == "Notice of readiness tendered 07:20"
+    assert service.backend.calls == 1
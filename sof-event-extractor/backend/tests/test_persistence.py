@@ -0,0 +1,221 @@
+"""Bulk persistence and connection pooling, run against a local SQLite file."""
+import contextlib
+import re
+import sqlite3
+import threading
+
+import pytest
+
+from app.db import ConnectionPool, PoolTimeoutError
+from app.services import persistence
+from app.services.persistence import sqlite_store
+
+
+def _document(doc_id, n_events, vessel="MV Test"):
+    return {
+        "document_id": doc_id,
+        "filename": f"{doc_id}.pdf",
+        "vessel": vessel,
+        "blob": f"uploads/{doc_id}.pdf",
+        "extraction_method": "enhanced_regex",
+        "events": [
+            {"name": f"Event {i}", "start": "08:00", "end": "09:00", "start_ts": 1000 + i, "end_ts": 2000 + i}
+            for i in range(n_events)
+        ],
+    }
+
+
+def test_save_and_read_back_documents(tmp_path):
+    store = sqlite_store(str(tmp_path / "sof.db"))
+    assert store.save_documents([_document("a", 3), _document("b", 2, vessel=None)]) == 2
+    doc = store.get_document("a")
+    assert doc["vessel"] == "MV Test" and doc["blob"] == "uploads/a.pdf"
+    assert [e["name"] for e in doc["events"]] == ["Event 0", "Event 1", "Event 2"]
+    assert doc["events"][1]["start_ts"] == 1001
+    assert store.get_document("missing") is None
+    rows = list(store.iter_events(["b"]))
+    assert [(r["document_id"], r["seq"], r["vessel"]) for r in rows] == [("b", 0, None), ("b", 1, None)]
+
+
+def test_saving_again_replaces_events(tmp_path):
+    store = sqlite_store(str(tmp_path / "sof.db"))
+    store.save_documents([_document("a", 5)])
+    store.save_documents([_document("a", 2)])
+    assert len(store.get_document("a")["events"]) == 2
+    assert len(list(store.iter_events())) == 2
+
+
+def test_bulk_insert_spans_several_batches(tmp_path, monkeypatch):
+    monkeypatch.setattr(persistence, "BATCH_ROWS", 7)
+    store = sqlite_store(str(tmp_path / "sof.db"))
+    docs = [_document(f"d{i:02d}", 10) for i in range(20)]
+    assert store.save_documents(docs) == 20
+    assert len(list(store.iter_events())) == 200
+    assert len(list(store.iter_events([d["document_id"] for d in docs[:9]]))) == 90
+
+
+def test_laytime_results_round_trip(tmp_path):
+    store = sqlite_store(str(tmp_path / "sof.db"))
+    store.save_documents([_document("a", 1)])
+    store.save_laytime([{"document_id": "a", "allowed_hours": 72.0, "net_due": -1500.0, "on_demurrage": False}])
+    laytime = store.get_document("a")["laytime"]
+    assert laytime["allowed_hours"] == 72.0 and laytime["on_demurrage"] is False
+
+
+class _WidthCheckingConnection:
+    """Stand-in SQL Server connection that rejects text longer than the declared NVARCHAR width."""
+
+    def __init__(self):
+        self.widths = {}
+        self.rows = []
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params=None):
+        if "sof_events" not in sql:
+            return
+        if "CREATE TABLE" in sql:
+            self.widths.update(re.findall(r"(\w+) NVARCHAR\((\d+|MAX)\)", sql))
+        match = re.search(r"ALTER COLUMN (\w+) NVARCHAR\((\d+|MAX)\)", sql)
+        if match:
+            self.widths[match.group(1)] = match.group(2)
+
+    def executemany(self, sql, rows):
+        if sql.startswith("INSERT INTO sof_events"):
+            columns = re.search(r"\((.*?)\)", sql).group(1).split(", ")
+            for row in rows:
+                for column, value in zip(columns, row):
+                    width = self.widths.get(column, "MAX")
+                    if width != "MAX" and value is not None and len(value) > int(width):
+                        raise ValueError("String or binary data would be truncated")
+            self.rows.extend(rows)
+
+
+def test_event_text_longer_than_1000_characters_is_saved(tmp_path):
+    long_line = "Commenced loading " + "x" * 1500 + " 08:00"
+    document = _document("a", 1)
+    document["events"][0].update({"name": long_line, "start": "01/07/2025 08:00" + " " * 200, "end": "9" * 300})
+
+    store = sqlite_store(str(tmp_path / "sof.db"))
+    assert store.save_documents([document]) == 1
+    assert store.get_document("a")["events"][0]["name"] == long_line
+
+    conn = _WidthCheckingConnection()
+    server = persistence.SqlEventStore(lambda: contextlib.nullcontext(conn), dialect="sqlserver")
+    assert server.save_documents([document]) == 1
+    assert conn.rows[0][2] == long_line
+    assert set(conn.widths.values()) == {"MAX"}
+
+
+def test_filtered_event_and_laytime_rows(tmp_path, monkeypatch):
+    monkeypatch.setattr(persistence, "BATCH_ROWS", 2)
+    store = sqlite_store(str(tmp_path / "sof.db"))
+    other = _document("b", 3, vessel="MV Other")
+    other["events"][1]["name"] = "Cargo_Loading 100%"
+    store.save_documents([_document("a", 4), other])
+    store.save_laytime([{"document_id": "a", "allowed_hours": 72.0}, {"document_id": "b", "net_due": 5.0}])
+
+    batches = list(store.iter_event_rows())
+    assert [len(rows) for rows in batches] == [2, 2, 2, 1]
+    rows = [row for rows in store.iter_event_rows(since=1001, until=1003, vessels=["MV Test"]) for row in rows]
+    assert [(r[0], r[3], r[7]) for r in rows] == [("a", 1, 1001), ("a", 2, 1002)]
+    # Type filters are case-insensitive substrings with LIKE wildcards taken literally
+    rows = [row for rows in store.iter_event_rows(event_types=["cargo_loading 100%"]) for row in rows]
+    assert [(r[0], r[4]) for r in rows] == [("b", "Cargo_Loading 100%")]
+    assert not list(store.iter_event_rows(event_types=["cargo%loading"]))
+
+    laytime = [row for rows in store.iter_laytime_rows(since=1003) for row in rows]
+    assert [(r[0], r[3]) for r in laytime] == [("a", 72.0)]
+    laytime = [row for rows in store.iter_laytime_rows(vessels=["MV Other"]) for row in rows]
+    assert [(r[0], r[2], r[-2]) for r in laytime] == [("b", "MV Other", 5.0)]
+
+
+def test_bulk_export_streams_parquet_and_arrow(tmp_path, monkeypatch):
+    pa = pytest.importorskip("pyarrow")
+    import io
+
+    import pyarrow.parquet as pq
+
+    from app import create_app
+
+    monkeypatch.setenv("PERSISTENCE_BACKEND", "sqlite")
+    monkeypatch.setenv("PERSISTENCE_SQLITE_PATH", str(tmp_path / "sof.db"))
+    monkeypatch.setenv("BULK_EXPORT_ROW_GROUP_ROWS", "4")
+    monkeypatch.setattr(persistence, "_store", None)
+    persistence.get_event_store().save_documents([_document("a", 6), _document("b", 5, vessel="MV Other")])
+    client = create_app().test_client()
+
+    response = client.get("/api/export/bulk/events?from=1970-01-01&vessel=MV Test,MV Other&type=event")
+    assert response.status_code == 200 and response.mimetype == "application/vnd.apache.parquet"
+    parquet = pq.ParquetFile(io.BytesIO(response.get_data()))
+    assert parquet.metadata.num_rows == 11 and parquet.metadata.num_row_groups == 3
+    table = parquet.read()
+    assert table.column("start_ts")[0].as_py().timestamp() == 1000
+    assert table.column("document_id").to_pylist() == ["a"] * 6 + ["b"] * 5
+
+    response = client.get("/api/export/bulk/events?format=arrow&vessel=MV Other")
+    table = pa.ipc.open_stream(response.get_data()).read_all()
+    assert table.column("seq").to_pylist() == [0, 1, 2, 3, 4]
+    # Nothing matches: still a valid stream with the schema
+    response = client.get("/api/export/bulk/laytime?format=arrow&to=1970-01-01 00:16")
+    table = pa.ipc.open_stream(response.get_data()).read_all()
+    assert table.num_rows == 0 and "net_due" in table.column_names
+
+    assert client.get("/api/export/bulk/events?from=yesterday").status_code == 400
+    assert client.get("/api/export/bulk/events?format=xlsx").status_code == 400
+    monkeypatch.setattr(persistence, "_store", None)
+
+
+def test_pool_reuses_connections_up_to_max_size(tmp_path):
+    opened = []
+
+    def connect():
+        conn = sqlite3.connect(str(tmp_path / "pool.db"), check_same_thread=False)
+        opened.append(conn)
+        return conn
+
+    pool = ConnectionPool(connect, max_size=2, timeout=0.05)
+    for _ in range(5):
+        with pool.connection() as conn:
+            conn.execute("SELECT 1")
+    assert len(opened) == 1
+
+    with pool.connection(), pool.connection():
+        with pytest.raises(PoolTimeoutError):
+            with pool.connection():
+                pass
+    assert pool.stats() == {"open": 2, "idle": 2, "max_size": 2}
+
+
+def test_pool_replaces_connections_that_fail_health_check(tmp_path):
+    opened = []
+
+    def connect():
+        conn = sqlite3.connect(str(tmp_path / "pool.db"), check_same_thread=False)
+        opened.append(conn)
+        return conn
+
+    pool = ConnectionPool(connect, max_size=1, health_check_seconds=0)
+    with pool.connection():
+        pass
+    opened[0].close()  # dropped by the server while idle
+    with pool.connection() as conn:
+        assert conn.execute("SELECT 1").fetchone() == (1,)
+    assert len(opened) == 2 and pool.stats()["open"] == 1
+
+
+def test_pool_waiters_get_released_connections(tmp_path):
+    pool = ConnectionPool(lambda: sqlite3.connect(":memory:", check_same_thread=False), max_size=1, timeout=5)
+    results = []
+
+    def worker():
+        with pool.connection() as conn:
+            results.append(conn.execute("SELECT 1").fetchone()[0])
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == [1] * 8 and pool.stats()["open"] == 1
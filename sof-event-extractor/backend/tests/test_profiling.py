@@ -0,0 +1,48 @@
+"""Request profiling: sampling needs no token, reading profiles always does."""
+import pytest
+
+from app import create_app
+from app.services import profiling
+
+
+@pytest.fixture
+def profiled_app(tmp_path, monkeypatch):
+    monkeypatch.setenv("PROFILE_SAMPLE_RATE", "1")
+    monkeypatch.setenv("PROFILE_PATHS", "/api/cache/stats")
+    monkeypatch.setenv("PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(profiling, "_store", None)
+    yield
+    monkeypatch.setattr(profiling, "_store", None)
+
+
+def test_profiles_are_sampled_but_not_readable_without_a_token(profiled_app, monkeypatch):
+    monkeypatch.delenv("PROFILE_TOKEN", raising=False)
+    client = create_app().test_client()
+    profile_id = client.get("/api/cache/stats").headers["X-Profile-Id"]
+    assert profiling.get_profile_store().collapsed_path(profile_id) is not None
+
+    assert client.get("/api/profiles").status_code == 403
+    assert client.get(f"/api/profiles/{profile_id}").status_code == 403
+    assert client.get("/api/profiles", headers={"X-Profile-Token": ""}).status_code == 403
+
+
+def test_profiles_are_readable_with_the_token(profiled_app, monkeypatch):
+    monkeypatch.setenv("PROFILE_TOKEN", "s3cret")
+    client = create_app().test_client()
+    profile_id = client.get("/api/cache/stats").headers["X-Profile-Id"]
+
+    assert client.get("/api/profiles", headers={"X-Profile-Token": "wrong"}).status_code == 403
+    listed = client.get("/api/profiles", headers={"X-Profile-Token": "s3cret"})
+    assert listed.status_code == 200
+    assert [p["id"] for p in listed.get_json()["profiles"]] == [profile_id]
+    download = client.get(f"/api/profiles/{profile_id}", headers={"X-Profile-Token": "s3cret"})
+    assert download.status_code == 200 and download.mimetype == "text/plain"
+    assert client.get("/api/profiles/unknown", headers={"X-Profile-Token": "s3cret"}).status_code == 404
+
+
+def test_profile_routes_are_absent_when_profiling_is_off(monkeypatch):
+    monkeypatch.setenv("PROFILE_SAMPLE_RATE", "0")
+    monkeypatch.delenv("PROFILE_TOKEN", raising=False)
+    client = create_app().test_client()
+    assert "X-Profile-Id" not in client.get("/api/cache/stats").headers
+    assert client.get("/api/profiles").status_code == 404
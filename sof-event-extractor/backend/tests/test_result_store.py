@@ -0,0 +1,51 @@
+import gzip
+import io
+import json
+
+from app.services import result_store
+from app.services.result_store import ResultStore
+
+
+def test_results_expire_after_ttl_and_oldest_go_first(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(result_store.time, "time", lambda: now[0])
+    store = ResultStore(max_results=2, ttl_seconds=60)
+    first = store.put({"n": 1})
+    now[0] += 30
+    second = store.put({"n": 2})
+    third = store.put({"n": 3})
+    assert store.get(first.id) is None  # evicted past max_results
+    assert store.get(second.id).result == {"n": 2}
+    now[0] += 61
+    assert store.get(second.id) is None and store.get(third.id) is None
+    assert store.stats()["results"] == 0
+
+
+def test_export_by_result_id_with_etag_and_gzip(monkeypatch):
+    from app import create_app, routes
+
+    monkeypatch.setenv("RESULT_CACHE_ENABLED", "0")
+    monkeypatch.setattr(routes, "get_blob_uploader", lambda: None)
+    monkeypatch.setattr(result_store, "_store", None)
+    client = create_app().test_client()
+    body = b"Commenced loading 01/07/2025 08:00 - 12:30\nShifting 13:00 14:00\n"
+    upload = client.post("/api/upload", data={"file": (io.BytesIO(body), "sof.txt")}).get_json()
+    url = f"/api/results/{upload['result_id']}/export"
+
+    response = client.get(url + "?format=csv")
+    assert response.status_code == 200 and "Content-Encoding" not in response.headers
+    assert response.get_data().splitlines() == [
+        b"name,start,end",
+        b"Commenced loading 01/07/2025 08:00 - 12:30,08:00,12:30",
+        b"Shifting,13:00,14:00",
+    ]
+
+    response = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip" and response.headers["Vary"] == "Accept-Encoding"
+    assert json.loads(gzip.decompress(response.get_data())) == upload["result"]
+
+    revalidated = client.get(url, headers={"If-None-Match": response.headers["ETag"]})
+    assert revalidated.status_code == 304 and revalidated.get_data() == b""
+    assert client.get(url + "?format=csv", headers={"If-None-Match": response.headers["ETag"]}).status_code == 200
+    assert client.get("/api/results/unknown/export").status_code == 404
+    monkeypatch.setattr(result_store, "_store", None)
@@ -0,0 +1,63 @@
+"""Resolving SOF time stamps to epoch seconds."""
+from app.parsers.timestamps import normalize_events, parse_timestamp
+
+DAY_1 = 1751328000  # 2025-07-01T00:00Z
+H = 3600
+
+
+def ts(events, start_date=None):
+    return [(e["start_ts"], e["end_ts"]) for e in normalize_events(events, start_date)]
+
+
+def test_all_time_pattern_forms():
+    events = [
+        {"name": "Arrived", "start": "2025-07-01 08:30", "end": "2025-07-01 9:45"},
+        {"name": "NOR", "start": "01/07/2025 10:00", "end": "1-7-25 10:15"},
+        {"name": "Pilot", "start": "11:00", "end": "11:30"},
+    ]
+    assert ts(events) == [
+        (DAY_1 + 8 * H + 1800, DAY_1 + 9 * H + 2700),
+        (DAY_1 + 10 * H, DAY_1 + 10 * H + 900),
+        (DAY_1 + 11 * H, DAY_1 + 11 * H + 1800),
+    ]
+    # Other keys are kept and the input is not modified
+    assert normalize_events(events)[0]["name"] == "Arrived" and "start_ts" not in events[0]
+
+
+def test_date_carried_from_an_earlier_line():
+    events = [
+        {"name": "Anchored", "start": "02/07/2025 06:00", "end": ""},
+        {"name": "Remarks", "start": "", "end": ""},
+        {"name": "Berthed", "start": "09:00", "end": "10:00"},
+        {"name": "On 03/07/2025 hoses connected", "start": "07:00", "end": ""},
+        {"name": "Loading", "start": "08:00", "end": ""},
+    ]
+    assert ts(events) == [
+        (DAY_1 + 86400 + 6 * H, None),
+        (None, None),
+        (DAY_1 + 86400 + 9 * H, DAY_1 + 86400 + 10 * H),
+        (DAY_1 + 2 * 86400 + 7 * H, None),  # the date in the name wins
+        (DAY_1 + 2 * 86400 + 8 * H, None),
+    ]
+
+
+def test_midnight_rollover():
+    events = [
+        {"name": "Loading", "start": "23:45", "end": "02:00"},
+        {"name": "Rain", "start": "01:00", "end": "01:30"},
+    ]
+    assert ts(events, "2025-07-01") == [
+        (DAY_1 + 23 * H + 2700, DAY_1 + 86400 + 2 * H),
+        (DAY_1 + 86400 + 1 * H, DAY_1 + 86400 + 1 * H + 1800),
+    ]
+
+
+def test_events_without_a_usable_time():
+    events = [
+        {"name": "Pilot on board", "start": "08:00", "end": ""},  # no date known yet
+        {"name": "Hatches opened"},
+        {"name": "Shifting", "start": "31/02/2025 08:00", "end": "25:00"},
+    ]
+    assert ts(events) == [(None, None), (None, None), (None, None)]
+    assert parse_timestamp("  ", DAY_1) == (None, DAY_1)
+    assert parse_timestamp("12:75", DAY_1) == (None, DAY_1)
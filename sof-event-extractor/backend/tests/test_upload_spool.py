@@ -0,0 +1,45 @@
+import hashlib
+import io
+import os
+
+import pytest
+
+from app.services.result_cache import make_cache_key
+from app.utils.upload_spool import SpooledDocument, UploadTooLarge
+
+
+def test_small_uploads_stay_in_memory():
+    document = SpooledDocument.from_stream(io.BytesIO(b"Cargo loading 08:00"), "sof.txt", spool_bytes=1024)
+    assert document.in_memory
+    assert document.size == 19
+    assert document.getvalue() == b"Cargo loading 08:00"
+    assert document.sha256 == hashlib.sha256(b"Cargo loading 08:00").hexdigest()
+
+
+def test_large_uploads_spool_to_disk_and_clean_up():
+    data = os.urandom(3 * 1024 * 1024 + 17)
+    document = SpooledDocument.from_stream(io.BytesIO(data), "scan.pdf", spool_bytes=1024 * 1024)
+    assert not document.in_memory
+    with document.local_path() as path:
+        assert path.endswith(".pdf")
+        with open(path, "rb") as f:
+            assert f.read() == data
+    assert document.sha256 == hashlib.sha256(data).hexdigest()
+    document.retain()
+    document.close()
+    assert os.path.exists(path)
+    document.close()
+    assert not os.path.exists(path)
+
+
+def test_size_limit_enforced_while_streaming():
+    with pytest.raises(UploadTooLarge):
+        SpooledDocument.from_stream(io.BytesIO(b"x" * 5000), "big.pdf", spool_bytes=1000, max_bytes=4096)
+
+
+def test_cache_key_same_for_bytes_and_spooled_digest():
+    data = b"%PDF-1.4 statement of facts" * 100
+    document = SpooledDocument.from_stream(io.BytesIO(data), "sof.pdf", spool_bytes=64)
+    settings = {"ext": ".pdf"}
+    assert make_cache_key(document.digest(), settings) == make_cache_key(data, settings)
+    document.close()
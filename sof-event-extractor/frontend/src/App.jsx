@@ -30,35 +30,20 @@ function App() {
     }
   }
 
-  // ✅ Export JSON
-  const downloadJSON = async () => {
-    if (!result) return
-    const res = await fetch('http://127.0.0.1:5000/api/export/json', {
-      method: 'POST',
-      headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify(result),
-    })
-    const blob = await res.blob()
-    const url = window.URL.createObjectURL(blob)
-    const a = document.createElement('a')
-    a.href = url
-    a.download = 'sof_export.json'
-    a.click()
-  }
-
-  // ✅ Export CSV
-  const downloadCSV = async () => {
-    if (!result) return
-    const res = await fetch('http://127.0.0.1:5000/api/export/csv', {
-      method: 'POST',
-      headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify(result),
-    })
+  // Exports fetch the stored result by id; nothing is posted back
+  const downloadExport = async (format) => {
+    if (!result?.result_id) return
+    setError('')
+    const res = await fetch(`http://127.0.0.1:5000/api/results/${result.result_id}/export?format=${format}`)
+    if (!res.ok) {
+      setError(res.status === 404 ? 'Result expired, please upload the file again' : `Export failed: ${res.status}`)
+      return
+    }
     const blob = await res.blob()
     const url = window.URL.createObjectURL(blob)
     const a = document.createElement('a')
     a.href = url
-    a.download = 'sof_export.csv'
+    a.download = `sof_export.${format}`
     a.click()
   }
 
@@ -90,8 +75,8 @@ function App() {
 </pre>
 
           <div style={{ marginTop: 12, display: 'flex', gap: 8 }}>
-            <button onClick={downloadJSON}>Download JSON</button>
-            <button onClick={downloadCSV}>Download CSV</button>
+            <button onClick={() => downloadExport('json')}>Download JSON</button>
+            <button onClick={() => downloadExport('csv')}>Download CSV</button>
           </div>
         </>
       )}